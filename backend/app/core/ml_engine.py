@@ -2,6 +2,40 @@
 ML Engine for skill extraction from resumes
 """
 
+import re
+
+# Comprehensive skill list
+SKILL_VOCABULARY = [
+    # Programming Languages
+    "python", "java", "javascript", "typescript", "c++", "c#", "go", "rust", "swift", "kotlin",
+    "ruby", "php", "scala", "r", "matlab", "sql", "bash", "powershell",
+    
+    # Web Technologies
+    "html", "css", "react", "angular", "vue", "node.js", "express", "django", "flask",
+    "fastapi", "spring", "spring boot", "asp.net", "next.js", "nuxt.js", "gatsby",
+    
+    # Databases
+    "mysql", "postgresql", "mongodb", "redis", "cassandra", "elasticsearch", "dynamodb",
+    "oracle", "sqlite", "firebase", "mariadb",
+    
+    # Cloud & DevOps
+    "aws", "azure", "gcp", "docker", "kubernetes", "jenkins", "terraform", "ansible",
+    "ci/cd", "git", "github", "gitlab", "bitbucket", "linux", "nginx", "apache",
+    
+    # Data Science & ML
+    "machine learning", "deep learning", "tensorflow", "pytorch", "keras", "scikit-learn",
+    "pandas", "numpy", "matplotlib", "seaborn", "opencv", "nlp", "computer vision",
+    "data analysis", "data science", "ai", "neural networks",
+    
+    # Mobile Development
+    "android", "ios", "react native", "flutter", "xamarin", "swift", "kotlin",
+    
+    # Other Technologies
+    "rest api", "graphql", "microservices", "websockets", "oauth", "jwt",
+    "agile", "scrum", "jira", "testing", "unit testing", "integration testing"
+]
+
+
 def extract_skills_from_text(text: str):
     """
     Extract technical skills from resume text
@@ -9,41 +43,29 @@ def extract_skills_from_text(text: str):
     """
     text_lower = text.lower()
     
-    # Comprehensive skill list
-    all_skills = [
-        # Programming Languages
-        "python", "java", "javascript", "typescript", "c++", "c#", "go", "rust", "swift", "kotlin",
-        "ruby", "php", "scala", "r", "matlab", "sql", "bash", "powershell",
-        
-        # Web Technologies
-        "html", "css", "react", "angular", "vue", "node.js", "express", "django", "flask",
-        "fastapi", "spring", "spring boot", "asp.net", "next.js", "nuxt.js", "gatsby",
-        
-        # Databases
-        "mysql", "postgresql", "mongodb", "redis", "cassandra", "elasticsearch", "dynamodb",
-        "oracle", "sqlite", "firebase", "mariadb",
-        
-        # Cloud & DevOps
-        "aws", "azure", "gcp", "docker", "kubernetes", "jenkins", "terraform", "ansible",
-        "ci/cd", "git", "github", "gitlab", "bitbucket", "linux", "nginx", "apache",
-        
-        # Data Science & ML
-        "machine learning", "deep learning", "tensorflow", "pytorch", "keras", "scikit-learn",
-        "pandas", "numpy", "matplotlib", "seaborn", "opencv", "nlp", "computer vision",
-        "data analysis", "data science", "ai", "neural networks",
-        
-        # Mobile Development
-        "android", "ios", "react native", "flutter", "xamarin", "swift", "kotlin",
-        
-        # Other Technologies
-        "rest api", "graphql", "microservices", "websockets", "oauth", "jwt",
-        "agile", "scrum", "jira", "testing", "unit testing", "integration testing"
-    ]
-    
     detected = []
-    for skill in all_skills:
+    for skill in SKILL_VOCABULARY:
         if skill in text_lower:
             detected.append(skill.title())
     
     # Remove duplicates and return
     return list(dict.fromkeys(detected))
+
+
+EMAIL_PATTERN = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")
+PHONE_PATTERN = re.compile(r"\+?\d[\d\s-]{8,}\d")
+LINK_PATTERN = re.compile(r"(?:https?://|www\.)\S+|(?:linkedin|github)\.com/\S+")
+
+
+def extract_profile(text: str):
+    """
+    Build a structured profile from resume text
+    Returns skills plus contact details and links found in the text
+    """
+    return {
+        "skills": extract_skills_from_text(text),
+        "emails": list(dict.fromkeys(EMAIL_PATTERN.findall(text))),
+        "phones": list(dict.fromkeys(p.strip() for p in PHONE_PATTERN.findall(text))),
+        "links": list(dict.fromkeys(LINK_PATTERN.findall(text))),
+        "word_count": len(text.split()),
+    }
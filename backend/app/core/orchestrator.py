@@ -1,38 +1,170 @@
+from typing import Dict, Iterator, List, Tuple
 from app.core.ml_engine import extract_skills_from_text
-from app.services.web_scraper import scrape_all_jobs
+from app.core.scoring import job_skills, rank_jobs
+from app.core.sharded_scoring import top_k_for_snapshot
+from app.services.job_snapshot import JobSnapshot, current_snapshot
+from app.services.web_scraper import get_job_snapshot, iter_refresh_snapshot
 
-def generate_recommendations(resume_text: str):
+# Students scored per matrix multiply in batch mode
+BATCH_CHUNK_SIZE = 512
+
+# Jobs sent in each partial (cached / per-source) streaming event
+STREAM_TOP_K = 20
+
+# Ranked results for one job snapshot version: (version, {resume key: result}).
+# Replaced wholesale when the version changes, so stale entries never need sweeping.
+_RESULT_CACHE = (None, {})
+
+
+def _format_job(job: Dict, relevance) -> Dict:
+    """Shape a scraped job for the recommendation response."""
+    return {
+        # Job id for /api/generate (batch and single drafts by reference)
+        "id": job.get("id"),
+        "title": job.get("title"),
+        "company": job.get("company"),
+        "location": job.get("location", "India"),
+        "salary": job.get("salary", "Not specified"),
+        "description": job.get("description"),
+        "source": job.get("source", "Unknown"),
+        "link": job.get("link"),
+        "deadline": job.get("deadline"),
+        "skills_needed": list(job.get("skills", [])),
+        "relevance": relevance,
+    }
+
+
+def generate_recommendations(resume_text: str = None, snapshot: JobSnapshot = None, skills: List[str] = None):
     """
-    Returns REAL jobs matching student skills
+    Returns REAL jobs ranked by how many skills they share with the resume
+
+    Args:
+        resume_text: Student resume text
+        snapshot: Job snapshot to rank (defaults to the current one)
+        skills: Skills already detected in the resume (skips re-scanning the text)
     """
     
     # Extract detected skills from resume
-    detected_skills = extract_skills_from_text(resume_text)
+    detected_skills = skills if skills is not None else extract_skills_from_text(resume_text or "")
     
-    # Scrape jobs filtered by resume skills
-    all_jobs = scrape_all_jobs(resume_text=resume_text)
+    if snapshot is None:
+        snapshot = get_job_snapshot()
+    jobs = snapshot.jobs
     
-    # Format results with full job details
-    internships = [
-        {
-            "title": job.get("title"),
-            "company": job.get("company"),
-            "location": job.get("location", "India"),
-            "salary": job.get("salary", "Not specified"),
-            "description": job.get("description"),
-            "source": job.get("source", "Unknown"),
-            "link": job.get("link"),
-            "deadline": job.get("deadline"),
-            "skills_needed": job.get("skills", []),
-            "relevance": job.get("relevance_score", 0),
-        }
-        for job in all_jobs
-    ]
+    # Rank once; scores stay in this side list, the shared records are untouched
+    ranked = rank_jobs(detected_skills, snapshot.job_skills, snapshot.skill_matrix)
+    internships = [_format_job(jobs[i], score) for i, score in ranked]
+    matching = sum(1 for _, score in ranked if score > 0)
     
     return {
         "internships": internships,
         "skills_detected": detected_skills,
         "total_count": len(internships),
-        "sources": list(set(job["source"] for job in all_jobs)),
-        "message": f"Found {len(internships)} jobs matching your skills!"
+        "sources": list(snapshot.sources),
+        "message": f"Found {matching} jobs matching your skills!"
     }
+
+
+def _pinned_snapshot():
+    """Current snapshot plus its result cache, reset when the version changes."""
+    global _RESULT_CACHE
+
+    snapshot = get_job_snapshot()
+    cached_version, results = _RESULT_CACHE
+    if cached_version != snapshot.version:
+        results = {}
+        _RESULT_CACHE = (snapshot.version, results)
+    return snapshot, results
+
+
+def recommend_for_student(student_id: str, skills: List[str], content_hash: str = None) -> Dict:
+    """
+    Recommendations for one student, pinned to a single job snapshot version.
+
+    The ranked result is cached per (resume, snapshot version), so repeat
+    visits are a dictionary lookup until the job list is refreshed. The
+    resume is identified by its content hash when known, so identical
+    uploads share one ranking.
+    """
+    snapshot, results = _pinned_snapshot()
+    cache_key = content_hash or student_id
+
+    hit = results.get(cache_key)
+    if hit is not None:
+        return hit
+
+    recommendations = generate_recommendations(snapshot=snapshot, skills=skills)
+    recommendations["snapshot_version"] = snapshot.version
+    results[cache_key] = recommendations
+    return recommendations
+
+
+def stream_recommendations(
+    student_id: str,
+    skills: List[str],
+    content_hash: str = None,
+    top_k: int = STREAM_TOP_K,
+) -> Iterator[Tuple[str, Dict]]:
+    """
+    Yield (event, payload) pairs for progressive recommendation delivery.
+
+    Events:
+        cached: top jobs from whatever snapshot is already in memory, sent
+            before any network I/O (flagged stale if past its TTL)
+        increment: top jobs from one source, sent as each fetcher finishes
+            while a stale snapshot is refreshed
+        complete: the full ranking, identical to recommend_for_student()
+    """
+    snapshot = current_snapshot()
+    if snapshot.version > 0:
+        cached = generate_recommendations(snapshot=snapshot, skills=skills)
+        yield "cached", {
+            "internships": cached["internships"][:top_k],
+            "skills_detected": cached["skills_detected"],
+            "snapshot_version": snapshot.version,
+            "stale": not snapshot.is_fresh(),
+        }
+
+    if not snapshot.is_fresh():
+        received = 0
+        for source, jobs in iter_refresh_snapshot():
+            received += len(jobs)
+            ranked = rank_jobs(skills, [job_skills(job) for job in jobs])
+            yield "increment", {
+                "source": source,
+                "internships": [_format_job(jobs[i], score) for i, score in ranked[:top_k]],
+                "jobs_received": received,
+            }
+
+    yield "complete", recommend_for_student(student_id, skills, content_hash)
+
+
+def generate_batch_recommendations(students: Dict[str, List[str]], top_k: int = 10) -> Iterator[Dict]:
+    """
+    Rank the current job list for many students at once.
+
+    Jobs are fetched once for the whole batch and students are scored in
+    chunks of BATCH_CHUNK_SIZE, one matrix multiply per chunk, yielding one
+    result per student as soon as its chunk is ranked.
+
+    Args:
+        students: Mapping of student_id -> detected skills
+        top_k: Number of jobs to keep per student
+    """
+    snapshot, _ = _pinned_snapshot()
+    jobs = snapshot.jobs
+
+    student_ids: List[str] = list(students)
+    for start in range(0, len(student_ids), BATCH_CHUNK_SIZE):
+        chunk = student_ids[start:start + BATCH_CHUNK_SIZE]
+        chunk_skills = [students[sid] for sid in chunk]
+        ranked = top_k_for_snapshot(chunk_skills, snapshot, k=top_k)
+
+        for student_id, skills, matches in zip(chunk, chunk_skills, ranked):
+            internships = [_format_job(jobs[i], score) for i, score in matches]
+            yield {
+                "student_id": student_id,
+                "skills_detected": skills,
+                "internships": internships,
+                "total_count": len(internships),
+            }
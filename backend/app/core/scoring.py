@@ -0,0 +1,154 @@
+"""
+Vectorised skill scoring
+========================
+Scores many students against many jobs on the shared skill vocabulary.
+Students and jobs become rows of a 0/1 skill matrix, so a whole cohort is
+ranked with a single matrix multiply instead of one pass per student.
+"""
+
+from typing import Dict, Iterable, List, Sequence, Tuple
+import logging
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+from app.core.ml_engine import SKILL_VOCABULARY, extract_skills_from_text
+
+logger = logging.getLogger(__name__)
+
+# One column per distinct skill, in vocabulary order
+SKILL_COLUMNS = list(dict.fromkeys(skill.title() for skill in SKILL_VOCABULARY))
+SKILL_INDEX = {skill: i for i, skill in enumerate(SKILL_COLUMNS)}
+
+
+def job_skills(job: Dict) -> List[str]:
+    """Skills for a job: its own tags, else those detected in title + description."""
+    tagged = [s.title() for s in job.get("skills", []) if s.title() in SKILL_INDEX]
+    if tagged:
+        return tagged
+    return extract_skills_from_text(f"{job.get('title', '')} {job.get('description', '')}")
+
+
+def skill_mask(skills: Iterable[str]) -> int:
+    """Pack a skill list into an int bitset over SKILL_COLUMNS."""
+    mask = 0
+    for skill in skills:
+        i = SKILL_INDEX.get(skill.title())
+        if i is not None:
+            mask |= 1 << i
+    return mask
+
+
+def build_skill_matrix(skill_lists: Sequence[Sequence[str]]):
+    """Build a (rows x skills) 0/1 float32 matrix from per-row skill lists."""
+    matrix = np.zeros((len(skill_lists), len(SKILL_COLUMNS)), dtype=np.float32)
+    for row, skills in enumerate(skill_lists):
+        cols = [SKILL_INDEX[s] for s in skills if s in SKILL_INDEX]
+        matrix[row, cols] = 1.0
+    return matrix
+
+
+def top_k_matches(
+    student_skills: Sequence[Sequence[str]],
+    job_skill_lists: Sequence[Sequence[str]],
+    k: int = 10,
+    job_matrix=None,
+) -> List[List[Tuple[int, int]]]:
+    """
+    Rank every job for every student by number of shared skills.
+
+    Returns one list per student of (job_index, shared_skill_count) pairs,
+    best first, keeping only jobs that share at least one skill.
+    job_matrix is job_skill_lists already built with build_skill_matrix
+    (e.g. a snapshot's shared matrix), to skip rebuilding it per call.
+    """
+    if not student_skills or not job_skill_lists or k <= 0:
+        return [[] for _ in student_skills]
+
+    if not NUMPY_AVAILABLE:
+        return _top_k_bitset(student_skills, job_skill_lists, k)
+
+    students = build_skill_matrix(student_skills)
+    jobs = job_matrix if job_matrix is not None else build_skill_matrix(job_skill_lists)
+    scores = students @ jobs.T
+
+    n_jobs = scores.shape[1]
+    return key_pairs(top_keys(rank_keys(scores, n_jobs), k), n_jobs)
+
+
+def rank_keys(scores, n_jobs: int, start: int = 0):
+    """
+    Fold (score desc, job index asc) into one int64 per cell, larger is better.
+
+    Columns of scores are jobs start, start + 1, ... of n_jobs. Keys are
+    unique, so selecting the k largest never has to break a tie, and the
+    order matches rank_jobs and the bitset fallback (lowest index first).
+    """
+    index = np.arange(start, start + scores.shape[1], dtype=np.int64)
+    return scores.astype(np.int64) * n_jobs + (n_jobs - 1 - index)
+
+
+def top_keys(keys, k: int):
+    """The k largest keys of each row, largest first."""
+    k = min(k, keys.shape[1])
+    # argpartition finds the k best per row without sorting the whole row
+    candidates = np.take_along_axis(keys, np.argpartition(-keys, k - 1, axis=1)[:, :k], axis=1)
+    return -np.sort(-candidates, axis=1)
+
+
+def key_pairs(keys, n_jobs: int) -> List[List[Tuple[int, int]]]:
+    """Decode rank_keys back to (job_index, shared_skill_count) pairs, dropping zero scores."""
+    scores, rest = np.divmod(keys, n_jobs)
+    return [
+        [(int(n_jobs - 1 - r), int(s)) for s, r in zip(row_scores, row_rest) if s > 0]
+        for row_scores, row_rest in zip(scores, rest)
+    ]
+
+
+def rank_jobs(
+    skills: Sequence[str],
+    job_skill_lists: Sequence[Sequence[str]],
+    job_matrix=None,
+) -> List[Tuple[int, int]]:
+    """
+    Order all jobs for one student by shared skills, best first.
+
+    Unlike top_k_matches this keeps zero-overlap jobs (at the end, in their
+    original order) so a student always sees the full list.
+    """
+    if not job_skill_lists:
+        return []
+
+    if not NUMPY_AVAILABLE:
+        mask = skill_mask(skills)
+        scored = [
+            (i, (mask & skill_mask(job)).bit_count())
+            for i, job in enumerate(job_skill_lists)
+        ]
+        scored.sort(key=lambda pair: -pair[1])
+        return scored
+
+    student = build_skill_matrix([skills])[0]
+    jobs = job_matrix if job_matrix is not None else build_skill_matrix(job_skill_lists)
+    scores = jobs @ student
+    order = np.argsort(-scores, kind="stable")
+    return [(int(i), int(scores[i])) for i in order]
+
+
+def _top_k_bitset(student_skills, job_skill_lists, k):
+    """Pure-Python fallback: popcount of AND-ed skill bitsets."""
+    job_masks = [skill_mask(skills) for skills in job_skill_lists]
+    results = []
+    for skills in student_skills:
+        mask = skill_mask(skills)
+        scored = [
+            (i, (mask & job_mask).bit_count())
+            for i, job_mask in enumerate(job_masks)
+        ]
+        scored = [pair for pair in scored if pair[1] > 0]
+        scored.sort(key=lambda pair: (-pair[1], pair[0]))
+        results.append(scored[:k])
+    return results
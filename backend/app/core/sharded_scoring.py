@@ -0,0 +1,195 @@
+"""
+Sharded multi-core scoring
+==========================
+Optional process-pool backend for top-k ranking over large job corpora.
+
+The job skill matrix of the current snapshot is written once into a shared
+memory segment. Each worker process attaches to it by name, scores the
+students against its own slice of job rows and returns a local top-k; the
+parent merges the shard results. Only the (small) student matrix and the
+per-shard top-k cross process boundaries.
+
+Enable with SCORING_BACKEND=process. Corpora smaller than
+SHARD_MIN_JOBS are still scored in-process, where pool overhead would
+dominate.
+"""
+
+from concurrent.futures import ProcessPoolExecutor, wait
+from typing import List, Optional, Sequence, Set, Tuple
+import multiprocessing
+import threading
+import logging
+import os
+
+try:
+    import numpy as np
+    from multiprocessing import shared_memory
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+from app.core.scoring import build_skill_matrix, key_pairs, rank_keys, top_k_matches, top_keys
+
+logger = logging.getLogger(__name__)
+
+SCORING_BACKEND = os.getenv("SCORING_BACKEND", "local")
+SCORING_WORKERS = int(os.getenv("SCORING_WORKERS", str(os.cpu_count() or 2)))
+SHARD_MIN_JOBS = int(os.getenv("SHARD_MIN_JOBS", "20000"))
+
+_pool: Optional[ProcessPoolExecutor] = None
+# (snapshot version, SharedJobMatrix) for the matrix currently in shared memory
+_shared = (None, None)
+# Replaced matrices still used by in-flight batches; freed when the last one finishes
+_retired: Set["SharedJobMatrix"] = set()
+_lock = threading.Lock()
+
+# Worker-side cache of attached segments: name -> (SharedMemory, ndarray)
+_attached = {}
+
+
+class SharedJobMatrix:
+    """A job skill matrix placed in a named shared memory segment."""
+
+    def __init__(self, job_skill_lists: Sequence[Sequence[str]]):
+        matrix = build_skill_matrix(job_skill_lists)
+        self.shape = matrix.shape
+        self.dtype = matrix.dtype.str
+        self.shm = shared_memory.SharedMemory(create=True, size=max(matrix.nbytes, 1))
+        view = np.ndarray(self.shape, dtype=matrix.dtype, buffer=self.shm.buf)
+        view[:] = matrix
+        # Batches currently scoring against this segment (guarded by _lock)
+        self.users = 0
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def release(self):
+        self.shm.close()
+        self.shm.unlink()
+
+
+def _attach(name: str, shape, dtype: str):
+    """Map a shared job matrix in a worker, reusing the mapping across tasks."""
+    entry = _attached.get(name)
+    if entry is None:
+        # Drop mappings of older snapshots so their segments can be freed
+        for stale in list(_attached):
+            _attached.pop(stale)[0].close()
+        shm = shared_memory.SharedMemory(name=name)
+        entry = (shm, np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf))
+        _attached[name] = entry
+    return entry[1]
+
+
+def _score_shard(name: str, shape, dtype: str, start: int, stop: int, students, k: int):
+    """Worker task: local top-k rank keys (see scoring.rank_keys) of students against job rows [start, stop)."""
+    jobs = _attach(name, shape, dtype)[start:stop]
+    scores = students @ jobs.T
+    return top_keys(rank_keys(scores, shape[0], start), k)
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn: forking a threaded server process is unsafe
+        _pool = ProcessPoolExecutor(
+            max_workers=SCORING_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        logger.info(f"✓ Sharded scoring pool started ({SCORING_WORKERS} workers)")
+    return _pool
+
+
+def _acquire_matrix(snapshot) -> SharedJobMatrix:
+    """
+    Shared matrix for this snapshot, rebuilt on version change, held for one
+    batch until _release_matrix. A replaced matrix is freed once no batch
+    holds it any more.
+    """
+    global _shared
+    with _lock:
+        version, matrix = _shared
+        if version != snapshot.version:
+            if matrix is not None:
+                if matrix.users:
+                    _retired.add(matrix)
+                else:
+                    matrix.release()
+            matrix = SharedJobMatrix(snapshot.job_skills)
+            _shared = (snapshot.version, matrix)
+        matrix.users += 1
+        return matrix
+
+
+def _release_matrix(matrix: SharedJobMatrix):
+    with _lock:
+        matrix.users -= 1
+        if matrix in _retired and not matrix.users:
+            _retired.discard(matrix)
+            matrix.release()
+
+
+def sharded_top_k(
+    student_skills: Sequence[Sequence[str]],
+    snapshot,
+    k: int = 10,
+) -> List[List[Tuple[int, int]]]:
+    """Same contract as scoring.top_k_matches, fanned out over job shards."""
+    if not student_skills or not snapshot.jobs or k <= 0:
+        return [[] for _ in student_skills]
+
+    matrix = _acquire_matrix(snapshot)
+    students = build_skill_matrix(student_skills)
+    n_jobs = matrix.shape[0]
+    shard_size = -(-n_jobs // SCORING_WORKERS)
+
+    pool = _get_pool()
+    futures = []
+    try:
+        for start in range(0, n_jobs, shard_size):
+            futures.append(pool.submit(
+                _score_shard, matrix.name, matrix.shape, matrix.dtype,
+                start, min(start + shard_size, n_jobs), students, k,
+            ))
+        shard_keys = [future.result() for future in futures]
+    finally:
+        # Shards not started yet must not attach to a freed segment
+        for future in futures:
+            future.cancel()
+        wait(futures)
+        _release_matrix(matrix)
+
+    # Merge: rank keys are unique across shards, so the global top-k is exact
+    return key_pairs(top_keys(np.concatenate(shard_keys, axis=1), k), n_jobs)
+
+
+def top_k_for_snapshot(
+    student_skills: Sequence[Sequence[str]],
+    snapshot,
+    k: int = 10,
+) -> List[List[Tuple[int, int]]]:
+    """Top-k per student against a snapshot, using the process pool when enabled and worthwhile."""
+    if (
+        SCORING_BACKEND == "process"
+        and NUMPY_AVAILABLE
+        and len(snapshot.jobs) >= SHARD_MIN_JOBS
+    ):
+        return sharded_top_k(student_skills, snapshot, k)
+    return top_k_matches(student_skills, snapshot.job_skills, k, snapshot.skill_matrix)
+
+
+def shutdown():
+    """Stop the worker pool and free the shared segment."""
+    global _pool, _shared
+    if _pool is not None:
+        _pool.shutdown()
+        _pool = None
+    with _lock:
+        _, matrix = _shared
+        if matrix is not None:
+            matrix.release()
+        for segment in _retired:
+            segment.release()
+        _shared = (None, None)
+        _retired.clear()
@@ -1,6 +1,8 @@
 from fastapi import FastAPI
 from app.config import setup_cors
 from app.routes import resume, recommend, chat, generate
+from app.services.bulk_ingest import BULK_MAX_REQUEST_BYTES
+from app.services.upload_spool import FORM_OVERHEAD_BYTES, RESUME_MAX_BYTES, UploadSizeLimit
 import logging
 
 logger = logging.getLogger(__name__)
@@ -8,6 +10,11 @@ logger = logging.getLogger(__name__)
 app = FastAPI(title="AIBIR Backend")
 
 setup_cors(app)
+# Refuse oversized uploads before Starlette buffers the multipart body
+app.add_middleware(UploadSizeLimit, limits={
+    "/resume/upload": RESUME_MAX_BYTES + FORM_OVERHEAD_BYTES,
+    "/resume/bulk": BULK_MAX_REQUEST_BYTES,
+})
 
 app.include_router(resume.router)
 app.include_router(recommend.router)
@@ -18,10 +25,45 @@ app.include_router(generate.router)
 def root():
     return {"message": "AIBIR Backend is running 🚀"}
 
+@app.get("/metrics/loop-lag")
+def loop_lag(reset: bool = False):
+    """Event-loop lag percentiles for this worker"""
+    from app.services import loop_monitor
+    stats = loop_monitor.stats()
+    if reset:
+        loop_monitor.reset()
+    return stats
+
+@app.get("/metrics/llm")
+async def llm_dispatch_stats():
+    """LLM queue depth per priority, in-flight calls, budget left, retries and rate-limit pauses (this worker)"""
+    from app.services.llm_dispatch import dispatcher
+    return dispatcher.stats()
+
 @app.on_event("startup")
 async def startup_event():
     """Pre-warm the cache on startup for instant responses"""
+    from app.services import loop_monitor
+    loop_monitor.start()
+
     from app.services.web_scraper import scrape_all_jobs
     logger.info("⏳ Pre-warming job cache...")
     jobs = scrape_all_jobs()
     logger.info(f"✓ Cache ready with {len(jobs)} jobs")
+
+    # One worker becomes the scrape leader; the rest adopt its snapshots
+    from app.services.scheduler import schedule_scraper
+    schedule_scraper()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release worker processes, shared memory and pooled connections"""
+    from app.core import sharded_scoring
+    from app.services import chatbot, loop_monitor, parse_pool
+    from app.services.scheduler import stop_scraper
+    stop_scraper()
+    loop_monitor.stop()
+    sharded_scoring.shutdown()
+    parse_pool.shutdown()
+    await chatbot.close()
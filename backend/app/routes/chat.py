@@ -1,7 +1,19 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional
-from app.services.chatbot import get_chatbot_response
+import asyncio
+import json
+from app.services.chat_cache import CHAT_RESPONSES
+from app.services.chat_sessions import get_session_store, open_session, record_exchange
+from app.services.chatbot import (
+    EMPTY_RESPONSE_MESSAGE,
+    complete_chat,
+    error_message,
+    get_chatbot_response,
+    stream_chatbot_response,
+    unavailable_message,
+)
 
 router = APIRouter()
 
@@ -11,17 +23,37 @@ class ChatMessage(BaseModel):
 
 class ChatRequest(BaseModel):
     message: str
+    # Server-side session from an earlier turn
+    session_id: Optional[str] = None
+    # Set on the first turn to start a server-side session; without it (and
+    # without session_id) chat is stateless and nothing is stored
+    start_session: bool = False
+    # Only for stateless chat, or to seed a new session
     history: Optional[List[ChatMessage]] = []
 
 class ChatResponse(BaseModel):
     response: str
     success: bool
+    session_id: Optional[str] = None
+
+
+def _uses_session(request: ChatRequest) -> bool:
+    # Only on request: a session nobody continues would sit in the store until it expires
+    return request.session_id is not None or request.start_session
 
 @router.post("/chat", response_model=ChatResponse)
 async def chat_with_bot(request: ChatRequest):
     """
     Real-time AI chatbot endpoint for student queries
+
+    With a session (start_session on the first turn), only the new message
+    is sent: the conversation so far (recent turns plus a digest of older
+    ones) is kept server-side and the returned session_id is passed back on
+    the next turn.
     """
+    if _uses_session(request):
+        return await _session_chat(request)
+
     try:
         # Convert history to format expected by chatbot
         chat_history = [
@@ -30,7 +62,7 @@ async def chat_with_bot(request: ChatRequest):
         ]
         
         # Get AI response
-        response_text = get_chatbot_response(
+        response_text = await get_chatbot_response(
             user_message=request.message,
             chat_history=chat_history
         )
@@ -42,3 +74,81 @@ async def chat_with_bot(request: ChatRequest):
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+async def _session_chat(request: ChatRequest) -> ChatResponse:
+    seed = [{"role": msg.role, "content": msg.content} for msg in request.history or []]
+    session = await asyncio.to_thread(open_session, request.session_id, seed)
+
+    unavailable = unavailable_message()
+    if unavailable:
+        return ChatResponse(response=unavailable, success=True, session_id=session.session_id)
+    try:
+        response_text = await complete_chat(request.message, session.turns, session.digest_text(), max_history=None)
+    except Exception as e:
+        return ChatResponse(response=error_message(e), success=True, session_id=session.session_id)
+    if not response_text:
+        return ChatResponse(response=EMPTY_RESPONSE_MESSAGE, success=True, session_id=session.session_id)
+
+    await asyncio.to_thread(record_exchange, session, request.message, response_text)
+    return ChatResponse(response=response_text, success=True, session_id=session.session_id)
+
+
+@router.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """
+    Streaming chatbot endpoint (Server-Sent Events).
+
+    Events: session {"session_id"} first when a server-side session is
+    used (session_id or start_session given), token {"text"} per chunk as the model writes it, then done, or
+    error {"message"}. If the client disconnects, the response task is
+    cancelled, which closes the upstream stream and stops generation; an
+    interrupted exchange is not added to the session.
+    """
+    chat_history = [
+        {"role": msg.role, "content": msg.content}
+        for msg in request.history or []
+    ]
+
+    async def events():
+        session = None
+        history, digest, max_history = chat_history, None, 5
+        if _uses_session(request):
+            session = await asyncio.to_thread(open_session, request.session_id, chat_history)
+            history, digest, max_history = session.turns, session.digest_text(), None
+            yield f"event: session\ndata: {json.dumps({'session_id': session.session_id})}\n\n"
+
+        unavailable = unavailable_message()
+        if unavailable:
+            yield f"event: error\ndata: {json.dumps({'message': unavailable})}\n\n"
+            return
+        parts = []
+        try:
+            async for text in stream_chatbot_response(request.message, history, digest, max_history):
+                parts.append(text)
+                yield f"event: token\ndata: {json.dumps({'text': text})}\n\n"
+        except Exception as e:
+            yield f"event: error\ndata: {json.dumps({'message': error_message(e)})}\n\n"
+            return
+        if session is not None and parts:
+            await asyncio.to_thread(record_exchange, session, request.message, "".join(parts))
+        yield "event: done\ndata: {}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.delete("/chat/sessions/{session_id}")
+async def end_chat_session(session_id: str):
+    """Forget a server-side chat session (e.g. "new conversation")"""
+    await asyncio.to_thread(get_session_store().delete, session_id)
+    return {"session_id": session_id, "deleted": True}
+
+
+@router.get("/chat/cache/stats")
+async def chat_cache_stats():
+    """Response cache size, exact and near-duplicate hits, misses and hit rate (this worker)"""
+    return CHAT_RESPONSES.stats()
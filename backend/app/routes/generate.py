@@ -1,15 +1,34 @@
 """
 Email & Cover Letter Generation Endpoints
 ==========================================
-Provides endpoints for generating cold emails and cover letters.
+Provides endpoints for generating cold emails and cover letters, one job
+at a time or for many jobs in one request (/batch).
+
+The resume can be given as a student_id and the job as a job_id (the "id"
+of jobs from the recommend and search endpoints) instead of full text;
+both are resolved server-side and drafts are memoized (see draft_cache).
 """
 
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional, Tuple
+import asyncio
+import json
+from app.services import draft_cache
+from app.services.batch_generation import BATCH_MAX_JOBS, KINDS, iter_batch_drafts
+from app.services.data_store import get_student
+from app.services.draft_cache import (
+    DraftInputError,
+    JobInput,
+    ResumeInput,
+    cover_letter_draft,
+    email_draft,
+    job_input,
+    resolve_job,
+    resolve_resume,
+)
 from app.services.email_cover_letter_generator import (
-    generate_cold_email,
-    generate_cover_letter,
     generate_email_subject_variations,
     generate_follow_up_email,
 )
@@ -21,21 +40,42 @@ router = APIRouter(prefix="/api/generate", tags=["Generate"])
 
 
 class EmailRequest(BaseModel):
-    job_title: str
-    company_name: str
+    # The resume: student_id or resume_text
+    student_id: Optional[str] = None
+    resume_text: Optional[str] = None
+    # The job: job_id, or job_title + company_name + job_description
+    job_id: Optional[str] = None
+    job_title: Optional[str] = None
+    company_name: Optional[str] = None
+    job_description: Optional[str] = None
     recruiter_name: Optional[str] = None
-    resume_text: str
-    job_description: str
-    user_name: str = "Candidate"
+    # Defaults to the student's name when student_id is given
+    user_name: Optional[str] = None
 
 
 class CoverLetterRequest(BaseModel):
-    job_title: str
-    company_name: str
-    resume_text: str
-    job_description: str
-    user_name: str = "Candidate"
-    user_email: str = "your.email@example.com"
+    student_id: Optional[str] = None
+    resume_text: Optional[str] = None
+    job_id: Optional[str] = None
+    job_title: Optional[str] = None
+    company_name: Optional[str] = None
+    job_description: Optional[str] = None
+    # Default to the student's record when student_id is given
+    user_name: Optional[str] = None
+    user_email: Optional[str] = None
+    user_phone: str = "+91-XXXX-XXXX-XX"
+
+
+class BatchGenerateRequest(BaseModel):
+    job_ids: List[str]
+    # Exactly one of the two
+    student_id: Optional[str] = None
+    resume_text: Optional[str] = None
+    kinds: List[str] = list(KINDS)
+    recruiter_name: Optional[str] = None
+    # Default to the student's record when student_id is given
+    user_name: Optional[str] = None
+    user_email: Optional[str] = None
     user_phone: str = "+91-XXXX-XXXX-XX"
 
 
@@ -46,21 +86,51 @@ class FollowUpEmailRequest(BaseModel):
     days_since: int = 3
 
 
+async def _resolve_resume(student_id: Optional[str], resume_text: Optional[str]) -> ResumeInput:
+    """The pre-analysed resume for a student_id or inline text (400/404 on bad input)."""
+    if (student_id is None) == (resume_text is None):
+        raise HTTPException(status_code=400, detail="Give either student_id or resume_text")
+    student = None
+    if student_id is not None:
+        student = await asyncio.to_thread(get_student, student_id)
+        if not student:
+            raise HTTPException(status_code=404, detail="Student not found")
+    return await asyncio.to_thread(resolve_resume, student, resume_text)
+
+
+async def _resolve_inputs(request) -> Tuple[ResumeInput, JobInput]:
+    """Resume and job for a single-job request, by reference or inline."""
+    inline = (request.job_title, request.company_name, request.job_description)
+    if request.job_id is None and None in inline:
+        raise HTTPException(
+            status_code=400, detail="Give either job_id or job_title, company_name and job_description"
+        )
+    resume = await _resolve_resume(request.student_id, request.resume_text)
+    if request.job_id is None:
+        job = job_input({"title": inline[0], "company": inline[1], "description": inline[2]})
+    else:
+        try:
+            job = resolve_job(request.job_id)
+        except DraftInputError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+    return resume, job
+
+
 @router.post("/email")
 async def generate_email(request: EmailRequest):
     """Generate a personalized cold email for a job application."""
+    resume, job = await _resolve_inputs(request)
     try:
-        email_data = generate_cold_email(
-            job_title=request.job_title,
-            company_name=request.company_name,
-            recruiter_name=request.recruiter_name,
-            resume_text=request.resume_text,
-            job_description=request.job_description,
-            user_name=request.user_name,
+        email_data = await asyncio.to_thread(
+            email_draft,
+            resume,
+            job,
+            request.user_name or resume.name or "Candidate",
+            request.recruiter_name,
         )
-        
-        logger.info(f"✓ Generated cold email for {request.job_title} @ {request.company_name}")
-        
+
+        logger.info(f"✓ Generated cold email for {job.title} @ {job.company}")
+
         return {
             "status": "success",
             "data": email_data,
@@ -73,19 +143,19 @@ async def generate_email(request: EmailRequest):
 @router.post("/cover-letter")
 async def generate_cover_letter_endpoint(request: CoverLetterRequest):
     """Generate a personalized cover letter for a job application."""
+    resume, job = await _resolve_inputs(request)
     try:
-        cover_letter_data = generate_cover_letter(
-            job_title=request.job_title,
-            company_name=request.company_name,
-            resume_text=request.resume_text,
-            job_description=request.job_description,
-            user_name=request.user_name,
-            user_email=request.user_email,
-            user_phone=request.user_phone,
+        cover_letter_data = await asyncio.to_thread(
+            cover_letter_draft,
+            resume,
+            job,
+            request.user_name or resume.name or "Candidate",
+            request.user_email or resume.email or "your.email@example.com",
+            request.user_phone,
         )
-        
-        logger.info(f"✓ Generated cover letter for {request.job_title} @ {request.company_name}")
-        
+
+        logger.info(f"✓ Generated cover letter for {job.title} @ {job.company}")
+
         return {
             "status": "success",
             "data": cover_letter_data,
@@ -95,6 +165,42 @@ async def generate_cover_letter_endpoint(request: CoverLetterRequest):
         raise HTTPException(status_code=500, detail=f"Cover letter generation failed: {str(e)}")
 
 
+@router.post("/batch")
+async def generate_batch(request: BatchGenerateRequest):
+    """
+    Cold emails and/or cover letters for one resume across many jobs,
+    streamed as NDJSON: one line per job id as it is drafted, then a
+    {"status": "complete"} summary. Job ids are the "id" of jobs returned
+    by the recommend and search endpoints.
+    """
+    unknown = [kind for kind in request.kinds if kind not in KINDS]
+    if unknown or not request.kinds:
+        raise HTTPException(status_code=400, detail=f"kinds must be from {list(KINDS)}")
+    if not request.job_ids or len(request.job_ids) > BATCH_MAX_JOBS:
+        raise HTTPException(status_code=400, detail=f"Give 1 to {BATCH_MAX_JOBS} job_ids")
+    resume = await _resolve_resume(request.student_id, request.resume_text)
+
+    user = {
+        "recruiter_name": request.recruiter_name,
+        "user_name": request.user_name or resume.name or "Candidate",
+        "user_email": request.user_email or resume.email or "your.email@example.com",
+        "user_phone": request.user_phone,
+    }
+
+    async def lines():
+        async for result in iter_batch_drafts(resume, request.job_ids, request.kinds, user):
+            yield json.dumps(result) + "\n"
+        logger.info(f"✓ Batch-generated drafts for {len(request.job_ids)} jobs")
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@router.get("/cache/stats")
+async def draft_cache_stats():
+    """Hit rates of the analysed-resume and memoized-draft caches."""
+    return draft_cache.stats()
+
+
 @router.get("/email-subjects")
 async def get_email_subjects(job_title: str, company_name: str, count: int = 3):
     """Get multiple email subject line variations."""
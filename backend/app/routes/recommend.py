@@ -1,11 +1,22 @@
 from fastapi import APIRouter, HTTPException, Query
-from typing import List, Dict, Any
-from app.services.data_store import get_student
-from app.core.orchestrator import generate_recommendations
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from typing import List, Dict, Any, Optional
+import json
+from app.services.data_store import get_student, list_students
+from app.services.student_records import record_skills
+from app.core.orchestrator import recommend_for_student, generate_batch_recommendations, stream_recommendations
 from app.services.web_scraper import scrape_all_jobs, search_jobs, get_jobs_by_source
+from app.services.scheduler import get_schedule_stats
 
 router = APIRouter(prefix="/recommend")
 
+
+class BatchRecommendRequest(BaseModel):
+    student_ids: Optional[List[str]] = None  # None = every student
+    top_k: int = 10
+
+
 @router.get("/{student_id}", response_model=Dict[str, Any])
 def recommend(student_id: str):
     """Get recommendations with scraped jobs"""
@@ -14,15 +25,46 @@ def recommend(student_id: str):
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
 
-    recommendations = generate_recommendations(student["resume_text"])
-    
-    # Add scraped internships instead of LinkedIn URLs
-    all_jobs = scrape_all_jobs()
-    recommendations["internships"] = all_jobs
-    recommendations["total_count"] = len(all_jobs)
-    recommendations["sources"] = list(set(job["source"] for job in all_jobs))
-    
-    return recommendations
+    return recommend_for_student(student_id, record_skills(student), student.get("content_hash"))
+
+
+@router.get("/{student_id}/stream")
+def recommend_stream(student_id: str):
+    """Stream recommendations as Server-Sent Events: cached -> increment (per source) -> complete"""
+    student = get_student(student_id)
+
+    if not student:
+        raise HTTPException(status_code=404, detail="Student not found")
+
+    def events():
+        for event, payload in stream_recommendations(student_id, record_skills(student), student.get("content_hash")):
+            yield f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/batch")
+def recommend_batch(request: BatchRecommendRequest):
+    """Rank jobs for many students at once, streamed as NDJSON (one line per student)"""
+    if request.student_ids is None:
+        students = {sid: record_skills(s) for sid, s in list_students().items()}
+    else:
+        missing = [sid for sid in request.student_ids if not get_student(sid)]
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Students not found: {missing}")
+        students = {sid: record_skills(get_student(sid)) for sid in request.student_ids}
+
+    top_k = max(1, min(request.top_k, 100))
+
+    def stream():
+        for result in generate_batch_recommendations(students, top_k=top_k):
+            yield json.dumps(result) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
 
 
 @router.get("/search/jobs", response_model=Dict[str, Any])
@@ -63,6 +105,12 @@ def get_all_jobs():
     }
 
 
+@router.get("/jobs/schedule", response_model=Dict[str, Any])
+def get_refresh_schedule():
+    """Per-source refresh stats: interval, next run, last duration, failures"""
+    return get_schedule_stats()
+
+
 @router.get("/jobs/source/{source_name}", response_model=Dict[str, Any])
 def get_jobs_by_source_endpoint(source_name: str):
     """Get jobs from specific source"""
@@ -1,6 +1,14 @@
-from fastapi import APIRouter, UploadFile, Form, File
-from app.services.resume_parser import extract_text_from_pdf
-from app.services.data_store import create_student
+from fastapi import APIRouter, UploadFile, Form, File, HTTPException
+from fastapi.responses import StreamingResponse
+from typing import List
+import asyncio
+import json
+import zipfile
+from app.services import bulk_ingest
+from app.services.parse_pool import ParseQueueFull
+from app.services.resume_parser import ResumeLimitExceeded
+from app.services.resume_ingest import ingest_resume
+from app.services.upload_spool import RESUME_MAX_BYTES, UploadTooLarge, spool_upload
 
 router = APIRouter(prefix="/resume")
 
@@ -10,15 +18,87 @@ async def upload_resume(
     student_name: str = Form(...),
     student_email: str = Form(...)
 ):
-    text = extract_text_from_pdf(resume.file)
-
-    student_id = create_student({
-        "name": student_name,
-        "email": student_email,
-        "resume_text": text
-    })
-
-    return {
-        "student_id": student_id,
-        "message": "Resume processed using AI"
-    }
+    try:
+        upload = await spool_upload(resume)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+    try:
+        return await ingest_resume(upload, student_name, student_email)
+    except ParseQueueFull as e:
+        raise HTTPException(
+            status_code=429,
+            detail="Resume parser is busy, please retry shortly",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    except ResumeLimitExceeded as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=422, detail="Resume took too long to parse")
+    finally:
+        upload.cleanup()
+
+
+@router.post("/bulk")
+async def upload_resumes_bulk(files: List[UploadFile] = File(...)):
+    """
+    Ingest many resumes in the background.
+
+    Accepts any mix of PDFs and zip archives of PDFs. Returns a job ID to poll
+    (GET /resume/bulk/{job_id}) or stream (GET /resume/bulk/{job_id}/stream).
+    Student name and email are taken from the file name and resume text.
+    """
+    items = []
+    spooled = []
+
+    def cleanup():
+        for upload in spooled:
+            upload.cleanup()
+
+    try:
+        for file in files:
+            name = file.filename or "resume.pdf"
+            if name.lower().endswith(".zip"):
+                archive = await spool_upload(file, max_bytes=bulk_ingest.BULK_MAX_ARCHIVE_BYTES)
+                spooled.append(archive)
+                items.extend(bulk_ingest.archive_items(archive, RESUME_MAX_BYTES))
+            else:
+                upload = await spool_upload(file)
+                spooled.append(upload)
+                items.append((name, lambda upload=upload: upload))
+        job = bulk_ingest.start_job(items, cleanup=cleanup)
+    except UploadTooLarge as e:
+        cleanup()
+        raise HTTPException(status_code=413, detail=str(e))
+    except bulk_ingest.BulkLimitExceeded as e:
+        cleanup()
+        raise HTTPException(status_code=413, detail=str(e))
+    except zipfile.BadZipFile:
+        cleanup()
+        raise HTTPException(status_code=422, detail="Invalid zip archive")
+
+    return job.progress()
+
+
+@router.get("/bulk/{job_id}")
+def bulk_status(job_id: str):
+    """Progress of a bulk ingestion job, with per-file results so far"""
+    job = bulk_ingest.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Bulk job not found")
+    return {**job.progress(), "results": job.results}
+
+
+@router.get("/bulk/{job_id}/stream")
+async def bulk_stream(job_id: str):
+    """Stream per-file results as NDJSON as they complete, then a final progress line"""
+    job = bulk_ingest.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Bulk job not found")
+
+    async def lines():
+        async for result in job.iter_results():
+            yield json.dumps(result) + "\n"
+        yield json.dumps(job.progress()) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
@@ -0,0 +1,81 @@
+"""
+Content-addressed artifact cache
+================================
+Maps a content hash (sha256 of the uploaded bytes) to everything derived
+from that content: extracted text, skills, structured profile. Identical
+uploads reuse the artifacts instead of re-parsing.
+
+Bounded by entry count and approximate size; least recently used entries
+are evicted first.
+"""
+
+from collections import OrderedDict
+from typing import Dict, Optional
+import hashlib
+import os
+import threading
+
+RESUME_CACHE_ENTRIES = int(os.getenv("RESUME_CACHE_ENTRIES", "2048"))
+RESUME_CACHE_MB = int(os.getenv("RESUME_CACHE_MB", "64"))
+
+
+def content_hash(data: bytes) -> str:
+    """Stable content address for raw bytes."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def _approx_size(artifacts: Dict) -> int:
+    return sum(len(v) if isinstance(v, (str, bytes)) else 64 for v in artifacts.values())
+
+
+class ArtifactCache:
+    """Thread-safe LRU cache of derived artifacts keyed by content hash."""
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, digest: str) -> Optional[Dict]:
+        with self._lock:
+            artifacts = self._entries.get(digest)
+            if artifacts is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(digest)
+            self.hits += 1
+            return artifacts
+
+    def put(self, digest: str, artifacts: Dict):
+        size = _approx_size(artifacts)
+        with self._lock:
+            if digest in self._entries:
+                self._bytes -= self._sizes[digest]
+            self._entries[digest] = artifacts
+            self._entries.move_to_end(digest)
+            self._sizes[digest] = size
+            self._bytes += size
+            while self._entries and (
+                len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+            ):
+                evicted, _ = self._entries.popitem(last=False)
+                self._bytes -= self._sizes.pop(evicted)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+RESUME_ARTIFACTS = ArtifactCache(RESUME_CACHE_ENTRIES, RESUME_CACHE_MB * 1024 * 1024)
@@ -0,0 +1,95 @@
+"""
+Batch email & cover-letter generation
+=====================================
+Drafts cold emails and/or cover letters for one resume against many jobs
+in a single request. The resume is analysed (skills extracted) once, jobs
+are looked up by id in the current snapshot, and drafts (memoized, see
+draft_cache) are rendered in chunks of BATCH_CHUNK_SIZE, up to
+BATCH_PARALLELISM chunks at a time in worker threads. Results are yielded
+per job as their chunk finishes, so callers can stream them; order follows
+completion, not the request.
+"""
+
+from typing import AsyncIterator, Dict, List, Optional
+import asyncio
+import os
+
+from app.services.draft_cache import ResumeInput, cover_letter_draft, email_draft, job_input
+from app.services.job_snapshot import JobSnapshot, current_snapshot
+
+BATCH_MAX_JOBS = int(os.getenv("BATCH_MAX_JOBS", "200"))
+BATCH_CHUNK_SIZE = int(os.getenv("BATCH_CHUNK_SIZE", "16"))
+BATCH_PARALLELISM = int(os.getenv("BATCH_PARALLELISM", "4"))
+
+KINDS = ("email", "cover_letter")
+
+
+def draft_job(job: Dict, kinds: List[str], resume: ResumeInput, user: Dict) -> Dict:
+    """All requested drafts for one job, from the pre-analysed resume."""
+    target = job_input(job)
+    result = {"job_id": target.id, "status": "ok", "title": target.title, "company": target.company}
+    if "email" in kinds:
+        result["email"] = email_draft(resume, target, user["user_name"], user.get("recruiter_name"))
+    if "cover_letter" in kinds:
+        result["cover_letter"] = cover_letter_draft(
+            resume, target, user["user_name"], user["user_email"], user["user_phone"]
+        )
+    return result
+
+
+def _draft_chunk(jobs: List[Dict], kinds: List[str], resume: ResumeInput, user: Dict) -> List[Dict]:
+    results = []
+    for job in jobs:
+        try:
+            results.append(draft_job(job, kinds, resume, user))
+        except Exception as e:
+            results.append({"job_id": job.get("id"), "status": "error", "error": str(e)})
+    return results
+
+
+async def iter_batch_drafts(
+    resume: ResumeInput,
+    job_ids: List[str],
+    kinds: List[str],
+    user: Dict,
+    snapshot: Optional[JobSnapshot] = None,
+) -> AsyncIterator[Dict]:
+    """
+    Yield one result per requested job id, then a summary:
+
+        {"job_id", "status": "ok", "title", "company", "email"?, "cover_letter"?}
+        {"job_id", "status": "not_found"}     id not in the current snapshot
+        {"job_id", "status": "error", "error"}
+        {"status": "complete", "generated", "not_found", "failed"}
+    """
+    snapshot = snapshot or current_snapshot()
+    found, counts = [], {"generated": 0, "not_found": 0, "failed": 0}
+    for key in dict.fromkeys(job_ids):  # duplicates drafted once
+        job = snapshot.get_job(key)
+        if job is None:
+            counts["not_found"] += 1
+            yield {"job_id": key, "status": "not_found"}
+        else:
+            found.append(job)
+
+    limit = asyncio.Semaphore(BATCH_PARALLELISM)
+
+    async def run(chunk):
+        async with limit:
+            return await asyncio.to_thread(_draft_chunk, chunk, kinds, resume, user)
+
+    tasks = [
+        asyncio.ensure_future(run(found[i:i + BATCH_CHUNK_SIZE]))
+        for i in range(0, len(found), BATCH_CHUNK_SIZE)
+    ]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            for result in await finished:
+                counts["generated" if result["status"] == "ok" else "failed"] += 1
+                yield result
+    finally:
+        # Client went away: do not render the chunks nobody will read
+        for task in tasks:
+            task.cancel()
+
+    yield {"status": "complete", **counts}
@@ -0,0 +1,200 @@
+"""
+Bulk resume ingestion
+=====================
+Background jobs that ingest many resumes at once (a zip archive or a
+multi-file upload). Files are parsed in parallel through the shared parse
+pool; each job records per-file results that can be polled or streamed
+while the job runs.
+
+Jobs live in memory and only the last BULK_JOB_HISTORY are kept.
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import PurePosixPath
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+import asyncio
+import io
+import logging
+import os
+import time
+import uuid
+import zipfile
+
+from app.services.parse_pool import RESUME_PARSE_QUEUE, ParseQueueFull
+from app.services.resume_ingest import ingest_resume
+from app.services.upload_spool import SpooledUpload, spool_file
+
+logger = logging.getLogger(__name__)
+
+BULK_MAX_FILES = int(os.getenv("BULK_MAX_FILES", "1000"))
+BULK_MAX_ARCHIVE_BYTES = int(os.getenv("BULK_MAX_ARCHIVE_BYTES", str(500 * 1024 * 1024)))
+# Whole /resume/bulk request body, all files together
+BULK_MAX_REQUEST_BYTES = int(os.getenv("BULK_MAX_REQUEST_BYTES", str(BULK_MAX_ARCHIVE_BYTES)))
+BULK_JOB_HISTORY = int(os.getenv("BULK_JOB_HISTORY", "50"))
+# Leave some parse queue capacity for single uploads arriving meanwhile
+BULK_CONCURRENCY = max(1, RESUME_PARSE_QUEUE // 2)
+
+# (filename, loader) - loaders spool the file only when its turn comes
+BulkItem = Tuple[str, Callable[[], SpooledUpload]]
+
+
+class BulkLimitExceeded(ValueError):
+    """Raised when a bulk request has too many files."""
+
+
+@dataclass
+class BulkJob:
+    job_id: str
+    total: int
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    results: List[Dict] = field(default_factory=list)
+    succeeded: int = 0
+    failed: int = 0
+    cancelled: bool = False
+    _updated: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+    @property
+    def done(self) -> bool:
+        return self.finished_at is not None
+
+    def record(self, result: Dict):
+        self.results.append(result)
+        if result["status"] == "ok":
+            self.succeeded += 1
+        else:
+            self.failed += 1
+        self._notify()
+
+    def finish(self):
+        self.finished_at = time.time()
+        self._notify()
+
+    def _notify(self):
+        # Swap in a fresh event so waiters wake once per change
+        updated, self._updated = self._updated, asyncio.Event()
+        updated.set()
+
+    def progress(self) -> Dict:
+        processed = len(self.results)
+        end = self.finished_at or time.time()
+        return {
+            "job_id": self.job_id,
+            "status": "cancelled" if self.cancelled else "completed" if self.done else "running",
+            "total": self.total,
+            "processed": processed,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "percent": round(100 * processed / self.total, 1) if self.total else 100.0,
+            "elapsed_seconds": round(end - self.created_at, 2),
+        }
+
+    async def iter_results(self) -> AsyncIterator[Dict]:
+        """Yield every per-file result, waiting for new ones until the job finishes."""
+        sent = 0
+        while True:
+            updated = self._updated
+            while sent < len(self.results):
+                yield self.results[sent]
+                sent += 1
+            if self.done:
+                return
+            await updated.wait()
+
+
+_jobs: "OrderedDict[str, BulkJob]" = OrderedDict()
+# Strong references so running jobs are not garbage collected
+_tasks = set()
+
+
+def get_job(job_id: str) -> Optional[BulkJob]:
+    return _jobs.get(job_id)
+
+
+def _is_resume(name: str) -> bool:
+    path = PurePosixPath(name)
+    return (
+        path.suffix.lower() == ".pdf"
+        and not path.name.startswith(".")
+        and "__MACOSX" not in path.parts
+    )
+
+
+def archive_items(archive: SpooledUpload, max_member_bytes: int) -> List[BulkItem]:
+    """List the PDFs in a zip archive as lazily-spooled items."""
+    source = archive.source
+    opener = (lambda: zipfile.ZipFile(io.BytesIO(source))) if isinstance(source, bytes) else (lambda: zipfile.ZipFile(source))
+
+    with opener() as zf:
+        members = [m for m in zf.infolist() if not m.is_dir() and _is_resume(m.filename)]
+    if len(members) > BULK_MAX_FILES:
+        raise BulkLimitExceeded(f"Archive has {len(members)} resumes (limit {BULK_MAX_FILES})")
+
+    def loader(member):
+        def load():
+            # Declared size is checked up front; spool_file re-checks while reading
+            if member.file_size > max_member_bytes:
+                raise ValueError(f"{member.filename} exceeds the per-file size limit")
+            with opener() as zf, zf.open(member) as f:
+                return spool_file(f, max_bytes=max_member_bytes)
+        return load
+
+    return [(PurePosixPath(m.filename).name, loader(m)) for m in members]
+
+
+async def _ingest_one(job: BulkJob, filename: str, load: Callable[[], SpooledUpload], slots: asyncio.Semaphore):
+    async with slots:
+        upload = None
+        try:
+            upload = await asyncio.to_thread(load)
+            while True:
+                try:
+                    outcome = await ingest_resume(upload, default_name=PurePosixPath(filename).stem)
+                    break
+                except ParseQueueFull as e:
+                    # Shared queue is busy with other uploads: wait our turn
+                    await asyncio.sleep(e.retry_after)
+            job.record({"filename": filename, "status": "ok", **outcome})
+        except Exception as e:
+            job.record({"filename": filename, "status": "error", "error": str(e) or type(e).__name__})
+        finally:
+            if upload is not None:
+                upload.cleanup()
+
+
+async def _run(job: BulkJob, items: List[BulkItem], cleanup: Callable[[], None]):
+    slots = asyncio.Semaphore(BULK_CONCURRENCY)
+    try:
+        await asyncio.gather(*(_ingest_one(job, name, load, slots) for name, load in items))
+    except asyncio.CancelledError:
+        # Server shutting down mid-job
+        job.cancelled = True
+        raise
+    finally:
+        cleanup()
+        job.finish()
+        progress = job.progress()
+        logger.info(
+            f"✓ Bulk job {job.job_id}: {progress['succeeded']}/{job.total} ingested "
+            f"in {progress['elapsed_seconds']}s"
+        )
+
+
+def start_job(items: List[BulkItem], cleanup: Callable[[], None] = lambda: None) -> BulkJob:
+    """Register a bulk job and start ingesting in the background."""
+    if len(items) > BULK_MAX_FILES:
+        raise BulkLimitExceeded(f"{len(items)} resumes submitted (limit {BULK_MAX_FILES})")
+
+    job = BulkJob(job_id=str(uuid.uuid4()), total=len(items))
+    _jobs[job.job_id] = job
+    while len(_jobs) > BULK_JOB_HISTORY:
+        oldest_id, oldest = next(iter(_jobs.items()))
+        if not oldest.done:
+            break
+        _jobs.pop(oldest_id)
+
+    task = asyncio.create_task(_run(job, items, cleanup))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    return job
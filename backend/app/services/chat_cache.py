@@ -0,0 +1,201 @@
+"""
+Chat response cache
+===================
+Students ask the same career questions over and over. Answers to
+history-free questions are cached per worker, keyed on the normalised
+question text, so repeats skip the LLM entirely. With
+CHAT_CACHE_MAX_HISTORY > 0, short conversations are cached too, keyed on
+the question plus a hash of the history before it, so a follow-up such as
+"can you give an example?" is only reused after the same exchange.
+
+Near-duplicates ("how do i write a resume" / "how to write a good
+resume?") can also hit: each question is shingled into hashed character
+3-grams and summarised by a MinHash signature. LSH bands of the signature
+find candidate entries in O(1); a candidate is accepted if the Jaccard
+similarity of the shingle sets reaches CHAT_CACHE_SIMILARITY.
+
+Bounded by CHAT_CACHE_ENTRIES (least recently used evicted first) and
+CHAT_CACHE_TTL seconds per answer.
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+import zlib
+
+CHAT_CACHE_ENTRIES = int(os.getenv("CHAT_CACHE_ENTRIES", "5000"))
+CHAT_CACHE_TTL = int(os.getenv("CHAT_CACHE_TTL", str(24 * 3600)))
+# Requests with more history than this are never cached (0 = history-free only)
+CHAT_CACHE_MAX_HISTORY = int(os.getenv("CHAT_CACHE_MAX_HISTORY", "0"))
+CHAT_CACHE_NEAR_DUPLICATES = os.getenv("CHAT_CACHE_NEAR_DUPLICATES", "1") != "0"
+CHAT_CACHE_SIMILARITY = float(os.getenv("CHAT_CACHE_SIMILARITY", "0.8"))
+
+SHINGLE_SIZE = 3
+BANDS, ROWS = 16, 4  # 64 MinHash values; ~0.8 similarity is where banding starts to catch pairs
+_PRIME = (1 << 61) - 1
+_rng = random.Random(1729)
+_HASH_PARAMS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(BANDS * ROWS)]
+
+_PUNCTUATION = re.compile(r"[^\w\s+#]")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_question(text: str) -> str:
+    """Lowercase, drop punctuation (keeping c++ / c#) and collapse whitespace."""
+    return _SPACES.sub(" ", _PUNCTUATION.sub(" ", text.lower())).strip()
+
+
+def shingles(normalized: str) -> FrozenSet[int]:
+    """Hashed character 3-grams of a normalised question."""
+    padded = f" {normalized} "
+    return frozenset(
+        zlib.crc32(padded[i:i + SHINGLE_SIZE].encode("utf-8"))
+        for i in range(max(1, len(padded) - SHINGLE_SIZE + 1))
+    )
+
+
+def minhash(shingle_set: FrozenSet[int]) -> List[int]:
+    return [min((a * h + b) % _PRIME for h in shingle_set) for a, b in _HASH_PARAMS]
+
+
+def _bands(signature: List[int]) -> List[Tuple[int, Tuple[int, ...]]]:
+    return [(band, tuple(signature[band * ROWS:(band + 1) * ROWS])) for band in range(BANDS)]
+
+
+def jaccard(a: FrozenSet[int], b: FrozenSet[int]) -> float:
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+def cache_context(chat_history: Optional[list], digest: Optional[str] = None) -> Optional[str]:
+    """
+    Cache context of a request: "" when history-free, a hash of the
+    history for short conversations, None when the answer must not be
+    cached (long history, or a digest of an older conversation).
+    """
+    if digest or len(chat_history or []) > CHAT_CACHE_MAX_HISTORY:
+        return None
+    if not chat_history:
+        return ""
+    turns = [[m.get("role"), m.get("content")] for m in chat_history]
+    return hashlib.sha256(json.dumps(turns).encode("utf-8")).hexdigest()
+
+
+@dataclass
+class _Entry:
+    answer: str
+    created_at: float
+    shingles: FrozenSet[int]
+    context: str = ""
+    bands: List[Tuple[int, Tuple[int, ...]]] = field(default_factory=list)
+
+
+class ChatResponseCache:
+    """Thread-safe TTL + LRU cache of answers, with near-duplicate lookup."""
+
+    def __init__(self, max_entries: int, ttl: float, near_duplicates: bool = True, similarity: float = 0.8):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.near_duplicates = near_duplicates
+        self.similarity = similarity
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        # (band, band values) -> keys of entries sharing that band
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], Set[str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(normalized: str, context: str = "") -> str:
+        return hashlib.sha256(f"{context}\n{normalized}".encode("utf-8")).hexdigest()
+
+    def _drop(self, key: str):
+        entry = self._entries.pop(key)
+        for band in entry.bands:
+            bucket = self._buckets.get(band)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band]
+
+    def _live(self, key: str, now: float) -> Optional[_Entry]:
+        entry = self._entries.get(key)
+        if entry is not None and now - entry.created_at > self.ttl:
+            self._drop(key)
+            return None
+        return entry
+
+    def get(self, question: str, context: str = "") -> Optional[str]:
+        normalized = normalize_question(question)
+        key = self._key(normalized, context)
+        now = time.time()
+        with self._lock:
+            entry = self._live(key, now)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry.answer
+
+        if self.near_duplicates and normalized:
+            probe = shingles(normalized)
+            candidates = set()
+            signature_bands = _bands(minhash(probe))
+            with self._lock:
+                for band in signature_bands:
+                    candidates |= self._buckets.get(band, set())
+                best, best_score = None, self.similarity
+                for candidate in candidates:
+                    entry = self._live(candidate, now)
+                    if entry is None or entry.context != context:
+                        continue
+                    score = jaccard(probe, entry.shingles)
+                    if score >= best_score:
+                        best, best_score = candidate, score
+                if best is not None:
+                    self._entries.move_to_end(best)
+                    self.near_hits += 1
+                    return self._entries[best].answer
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, question: str, answer: str, context: str = ""):
+        normalized = normalize_question(question)
+        if not normalized:
+            return
+        key = self._key(normalized, context)
+        entry = _Entry(answer=answer, created_at=time.time(), shingles=shingles(normalized), context=context)
+        if self.near_duplicates:
+            entry.bands = _bands(minhash(entry.shingles))
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = entry
+            for band in entry.bands:
+                self._buckets.setdefault(band, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.near_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "near_hits": self.near_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.near_hits) / lookups, 3) if lookups else 0.0,
+            }
+
+
+CHAT_RESPONSES = ChatResponseCache(
+    CHAT_CACHE_ENTRIES, CHAT_CACHE_TTL, CHAT_CACHE_NEAR_DUPLICATES, CHAT_CACHE_SIMILARITY
+)
@@ -0,0 +1,377 @@
+"""
+Server-side chat sessions
+=========================
+Clients send only the new message plus a session_id; the conversation is
+kept here instead of being resent (and re-tokenised) on every turn.
+
+Each session holds a rolling digest of older turns and the most recent
+turns verbatim. After every exchange the session is compacted:
+
+- a stored message longer than CHAT_MAX_MESSAGE_TOKENS is cut to that
+  length (the client already shows the full text; the model only needs
+  the gist for context)
+- while the recent turns exceed CHAT_HISTORY_TOKEN_BUDGET, the oldest
+  exchange is folded into the digest as one short line
+- the digest itself is capped at CHAT_DIGEST_TOKEN_BUDGET, oldest lines
+  dropped first
+
+So every prompt is bounded by system prompt + digest budget + history
+budget + the new message, however long the conversation runs. Token
+counts are estimated at ~4 characters per token, which is close enough
+for budgeting.
+
+Sessions are stored zlib-compressed, in a store selected with
+CHAT_SESSION_STORE (sqlite by default, shared by all workers on the host;
+redis; or memory). Sessions idle for CHAT_SESSION_TTL are dropped.
+
+Saves are versioned: a store only writes a session if nobody else saved
+it since it was loaded. When two requests on one session race (two tabs,
+a client retry), the loser re-applies its exchange to the winner's
+version, so neither exchange is lost. Session ids are always generated
+here; an unknown id from a client starts a session under a new id.
+"""
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+
+from app.services.student_repository import REDIS_AVAILABLE, REDIS_URL, STUDENT_DB_PATH
+
+if REDIS_AVAILABLE:
+    import redis
+
+logger = logging.getLogger(__name__)
+
+CHAT_SESSION_STORE = os.getenv("CHAT_SESSION_STORE", "sqlite")
+CHAT_SESSION_DB_PATH = os.getenv("CHAT_SESSION_DB_PATH", STUDENT_DB_PATH)
+CHAT_SESSION_TTL = int(os.getenv("CHAT_SESSION_TTL", str(7 * 24 * 3600)))
+CHAT_HISTORY_TOKEN_BUDGET = int(os.getenv("CHAT_HISTORY_TOKEN_BUDGET", "1200"))
+CHAT_DIGEST_TOKEN_BUDGET = int(os.getenv("CHAT_DIGEST_TOKEN_BUDGET", "300"))
+CHAT_MAX_MESSAGE_TOKENS = int(os.getenv("CHAT_MAX_MESSAGE_TOKENS", "400"))
+
+CHARS_PER_TOKEN = 4
+# Times record_exchange re-applies an exchange after losing a save race
+SAVE_ATTEMPTS = 5
+# Per-side length of a digest line, in characters
+DIGEST_QUESTION_CHARS = 120
+DIGEST_ANSWER_CHARS = 160
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+_SPACES = re.compile(r"\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _clip(text: str, max_chars: int) -> str:
+    text = _SPACES.sub(" ", text).strip()
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars].rsplit(" ", 1)[0] + "…"
+
+
+def digest_line(question: str, answer: str) -> str:
+    """One line standing in for an exchange: the question and the answer's opening sentence."""
+    first_sentence = _SENTENCE_END.split(_SPACES.sub(" ", answer).strip(), 1)[0]
+    return f"- Student asked: {_clip(question, DIGEST_QUESTION_CHARS)} | Advisor: {_clip(first_sentence, DIGEST_ANSWER_CHARS)}"
+
+
+@dataclass
+class ChatSession:
+    session_id: str
+    digest: List[str] = field(default_factory=list)
+    turns: List[Dict[str, str]] = field(default_factory=list)
+    updated_at: float = field(default_factory=time.time)
+    # Saves so far; a store only accepts a save from the latest version
+    version: int = 0
+
+    def history_tokens(self) -> int:
+        return sum(estimate_tokens(turn["content"]) for turn in self.turns)
+
+    def digest_text(self) -> Optional[str]:
+        return "\n".join(self.digest) if self.digest else None
+
+    def add_exchange(self, question: str, answer: str):
+        max_chars = CHAT_MAX_MESSAGE_TOKENS * CHARS_PER_TOKEN
+        self.turns.append({"role": "user", "content": _clip(question, max_chars)})
+        self.turns.append({"role": "assistant", "content": _clip(answer, max_chars)})
+        self.updated_at = time.time()
+        self.compact()
+
+    def compact(self):
+        """Fold the oldest exchanges into the digest until history fits its budget."""
+        while len(self.turns) > 2 and self.history_tokens() > CHAT_HISTORY_TOKEN_BUDGET:
+            first, second = self.turns[0], self.turns[1]
+            if first["role"] == "user" and second["role"] == "assistant":
+                self.digest.append(digest_line(first["content"], second["content"]))
+                del self.turns[:2]
+            else:
+                # Unpaired turn (e.g. seeded history starting mid-conversation)
+                self.digest.append(f"- {first['role'].title()}: {_clip(first['content'], DIGEST_QUESTION_CHARS)}")
+                del self.turns[0]
+        while len(self.digest) > 1 and estimate_tokens("\n".join(self.digest)) > CHAT_DIGEST_TOKEN_BUDGET:
+            self.digest.pop(0)
+
+    def to_bytes(self, version: int = None) -> bytes:
+        payload = {
+            "d": self.digest,
+            "t": [[t["role"][0], t["content"]] for t in self.turns],
+            "u": self.updated_at,
+            "v": self.version if version is None else version,
+        }
+        return zlib.compress(json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+
+    @classmethod
+    def from_bytes(cls, session_id: str, data: bytes) -> "ChatSession":
+        payload = json.loads(zlib.decompress(data))
+        roles = {"u": "user", "a": "assistant", "s": "system"}
+        return cls(
+            session_id=session_id,
+            digest=payload["d"],
+            turns=[{"role": roles[role], "content": content} for role, content in payload["t"]],
+            updated_at=payload["u"],
+            version=payload.get("v", 0),
+        )
+
+
+class ChatSessionStore(ABC):
+    """Interface shared by all session stores."""
+
+    @abstractmethod
+    def load(self, session_id: str) -> Optional[ChatSession]:
+        ...
+
+    @abstractmethod
+    def save(self, session: ChatSession) -> bool:
+        """
+        Write the session if the stored copy is still at session.version
+        (absent, for version 0) and bump its version. Returns False,
+        writing nothing, if another save got there first.
+        """
+
+    @abstractmethod
+    def delete(self, session_id: str):
+        ...
+
+    @abstractmethod
+    def evict_idle(self, max_idle: float) -> int:
+        """Remove sessions not updated for max_idle seconds; returns how many."""
+
+
+class MemoryChatSessionStore(ChatSessionStore):
+    """Process-local store. Not shared between workers."""
+
+    def __init__(self):
+        self._sessions: Dict[str, Tuple[float, bytes]] = {}
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def load(self, session_id):
+        entry = self._sessions.get(session_id)
+        return ChatSession.from_bytes(session_id, entry[1]) if entry else None
+
+    def save(self, session):
+        with self._lock:
+            if self._versions.get(session.session_id, 0) != session.version:
+                return False
+            self._sessions[session.session_id] = (session.updated_at, session.to_bytes(session.version + 1))
+            self._versions[session.session_id] = session.version + 1
+        session.version += 1
+        return True
+
+    def delete(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+            self._versions.pop(session_id, None)
+
+    def evict_idle(self, max_idle):
+        cutoff = time.time() - max_idle
+        idle = [sid for sid, (updated, _) in list(self._sessions.items()) if updated < cutoff]
+        for session_id in idle:
+            self.delete(session_id)
+        return len(idle)
+
+
+class SQLiteChatSessionStore(ChatSessionStore):
+    """Sessions in a WAL-mode SQLite table (by default next to the students)."""
+
+    def __init__(self, path: str = CHAT_SESSION_DB_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._local = threading.local()
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS chat_sessions (
+                id TEXT PRIMARY KEY,
+                updated_at REAL NOT NULL,
+                data BLOB NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_chat_sessions_updated ON chat_sessions (updated_at);
+        """)
+        # Tables created before versioned saves lack version
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(chat_sessions)")}
+        if "version" not in columns:
+            conn.execute("ALTER TABLE chat_sessions ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    def load(self, session_id):
+        row = self._connection().execute(
+            "SELECT data FROM chat_sessions WHERE id = ?", (session_id,)
+        ).fetchone()
+        return ChatSession.from_bytes(session_id, row[0]) if row else None
+
+    def save(self, session):
+        version = session.version + 1
+        data = session.to_bytes(version)
+        if session.version == 0:
+            cursor = self._connection().execute(
+                "INSERT OR IGNORE INTO chat_sessions (id, updated_at, data, version) VALUES (?, ?, ?, ?)",
+                (session.session_id, session.updated_at, data, version),
+            )
+        else:
+            cursor = self._connection().execute(
+                "UPDATE chat_sessions SET updated_at = ?, data = ?, version = ? WHERE id = ? AND version = ?",
+                (session.updated_at, data, version, session.session_id, session.version),
+            )
+        if cursor.rowcount != 1:
+            return False
+        session.version = version
+        return True
+
+    def delete(self, session_id):
+        self._connection().execute("DELETE FROM chat_sessions WHERE id = ?", (session_id,))
+
+    def evict_idle(self, max_idle):
+        cursor = self._connection().execute(
+            "DELETE FROM chat_sessions WHERE updated_at < ?", (time.time() - max_idle,)
+        )
+        return cursor.rowcount
+
+
+class RedisChatSessionStore(ChatSessionStore):
+    """Sessions as redis keys that expire after CHAT_SESSION_TTL."""
+
+    PREFIX = "aibir:chat_session:"
+
+    def __init__(self, client=None, url: str = REDIS_URL, ttl: int = CHAT_SESSION_TTL):
+        if client is None:
+            if not REDIS_AVAILABLE:
+                raise RuntimeError("CHAT_SESSION_STORE=redis needs the redis package: pip install redis")
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.ttl = ttl
+
+    def load(self, session_id):
+        data = self.client.get(self.PREFIX + session_id)
+        return ChatSession.from_bytes(session_id, data) if data else None
+
+    def save(self, session):
+        key = self.PREFIX + session.session_id
+        version = session.version + 1
+        with self.client.pipeline() as pipe:
+            try:
+                # WATCH makes the SET fail if anyone writes the key before EXEC
+                pipe.watch(key)
+                data = pipe.get(key)
+                stored = ChatSession.from_bytes(session.session_id, data).version if data else 0
+                if stored != session.version:
+                    return False
+                pipe.multi()
+                pipe.set(key, session.to_bytes(version), ex=self.ttl if self.ttl > 0 else None)
+                pipe.execute()
+            except redis.WatchError:
+                return False
+        session.version = version
+        return True
+
+    def delete(self, session_id):
+        self.client.delete(self.PREFIX + session_id)
+
+    def evict_idle(self, max_idle):
+        # Keys expire on their own
+        return 0
+
+
+def create_session_store(kind: str = CHAT_SESSION_STORE) -> ChatSessionStore:
+    """Build the store named by CHAT_SESSION_STORE."""
+    if kind == "memory":
+        return MemoryChatSessionStore()
+    if kind == "redis":
+        return RedisChatSessionStore()
+    if kind != "sqlite":
+        logger.warning(f"Unknown CHAT_SESSION_STORE '{kind}', using sqlite")
+    return SQLiteChatSessionStore()
+
+
+# Created on first use
+_store: Optional[ChatSessionStore] = None
+
+
+def get_session_store() -> ChatSessionStore:
+    global _store
+    if _store is None:
+        _store = create_session_store()
+    return _store
+
+
+def set_session_store(store: ChatSessionStore):
+    global _store
+    _store = store
+
+
+def open_session(session_id: Optional[str] = None, seed_history: List[Dict] = None) -> ChatSession:
+    """
+    The stored session, or a new one (optionally seeded with client-side
+    history). New sessions always get a fresh id, also when the client sent
+    one that is unknown (expired, deleted, or made up).
+    """
+    if session_id:
+        session = get_session_store().load(session_id)
+        if session is not None:
+            return session
+    session = ChatSession(session_id=uuid.uuid4().hex)
+    for turn in seed_history or []:
+        session.turns.append({"role": turn["role"], "content": turn["content"]})
+    session.compact()
+    return session
+
+
+def record_exchange(session: ChatSession, question: str, answer: str):
+    """Add an exchange and save it, re-applying it on top of any save that raced ahead."""
+    store = get_session_store()
+    for _ in range(SAVE_ATTEMPTS):
+        session.add_exchange(question, answer)
+        if store.save(session):
+            return
+        latest = store.load(session.session_id)
+        if latest is None:
+            # Deleted meanwhile ("new conversation"): nothing to add to
+            return
+        session.digest, session.turns, session.version = latest.digest, latest.turns, latest.version
+    logger.warning(f"Chat session {session.session_id}: exchange dropped after {SAVE_ATTEMPTS} conflicting saves")
+
+
+def evict_idle_sessions(max_idle: float = CHAT_SESSION_TTL) -> int:
+    if max_idle <= 0:
+        return 0
+    return get_session_store().evict_idle(max_idle)
@@ -1,98 +1,288 @@
 """
 Real-time AI chatbot for student career guidance
 Uses Groq API for fast, intelligent responses
+
+Calls go through one AsyncGroq client per worker, sharing a pooled
+httpx connection pool, so chat never blocks the event loop. Every
+completion is queued through the LLM dispatcher (services/llm_dispatch.py),
+which keeps traffic within the provider's request/token limits, puts
+interactive chat ahead of background work and retries rate-limited or
+failed calls.
+
+Answers to history-free questions are served from the
+per-worker response cache (services/chat_cache.py) when a same or
+near-identical question was answered recently. Multi-turn conversations
+are kept server-side with a bounded context (services/chat_sessions.py).
 """
 
 try:
-    from groq import Groq
+    from groq import (
+        APIConnectionError,
+        AsyncGroq,
+        AuthenticationError,
+        BadRequestError,
+        PermissionDeniedError,
+        RateLimitError,
+    )
     GROQ_AVAILABLE = True
 except ImportError:
     GROQ_AVAILABLE = False
 
+from typing import AsyncIterator, Dict, List, Optional
+import asyncio
+import logging
 import os
+
+import httpx
 from dotenv import load_dotenv
 
+from app.services.chat_cache import CHAT_RESPONSES, cache_context
+from app.services.llm_dispatch import INTERACTIVE, LLMBusyError, dispatcher
+
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+GROQ_MODEL = os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile")  # Fast, smart, and free!
+GROQ_TIMEOUT = float(os.getenv("GROQ_TIMEOUT", "60"))
+GROQ_MAX_CONNECTIONS = int(os.getenv("GROQ_MAX_CONNECTIONS", "100"))
+CHAT_MAX_TOKENS = 500
+
+# System prompt for career guidance context
+SYSTEM_MESSAGE = """You are an expert career counselor and internship advisor for students in India.
+Your role is to:
+- Help students with career guidance and internship questions
+- Provide advice on resume building, skill development, and job searching
+- Answer questions about different tech roles, companies, and career paths
+- Give practical, actionable advice for students starting their careers
+- Be encouraging, supportive, and professional
+
+Keep responses concise (2-4 paragraphs max) but helpful. Use emojis sparingly for a friendly tone."""
+
+class IncompleteResponseError(Exception):
+    """The provider closed a stream before the answer finished."""
+
+
+EMPTY_RESPONSE_MESSAGE = "⚠️ I couldn't generate a response. Please try rephrasing your question."
 
-# Initialize Groq client
+# Created on first use, inside the worker's event loop
 groq_client = None
-if GROQ_AVAILABLE and GROQ_API_KEY:
-    try:
-        groq_client = Groq(api_key=GROQ_API_KEY)
-    except Exception as e:
-        print(f"Warning: Could not configure Groq: {e}")
-        GROQ_AVAILABLE = False
 
-def get_chatbot_response(user_message: str, chat_history: list = None) -> str:
+
+def _get_client():
+    """Shared AsyncGroq client backed by one pooled httpx.AsyncClient."""
+    global groq_client
+    if groq_client is None:
+        http_client = httpx.AsyncClient(
+            timeout=GROQ_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=GROQ_MAX_CONNECTIONS,
+                max_keepalive_connections=GROQ_MAX_CONNECTIONS,
+            ),
+        )
+        # Retries are the dispatcher's job, so each attempt is budgeted and queued
+        groq_client = AsyncGroq(api_key=GROQ_API_KEY, http_client=http_client, max_retries=0)
+    return groq_client
+
+
+def estimate_tokens(messages: List[Dict]) -> int:
+    """Prompt tokens (~4 characters each) plus the completion allowance."""
+    return sum(len(m["content"]) for m in messages) // 4 + CHAT_MAX_TOKENS
+
+
+def build_messages(user_message: str, chat_history: list = None, digest: str = None,
+                   max_history: Optional[int] = 5) -> List[Dict]:
+    """System prompt, the session digest, recent history and the new question.
+
+    Stateless requests keep the last max_history messages; server-side
+    sessions pass history already trimmed to their token budget (None).
+    """
+    messages = [{"role": "system", "content": SYSTEM_MESSAGE}]
+
+    if digest:
+        messages.append({"role": "system", "content": f"Summary of the earlier conversation:\n{digest}"})
+
+    # Add chat history (last 5 messages for context)
+    if chat_history:
+        for msg in (chat_history[-max_history:] if max_history else chat_history):
+            messages.append(msg)
+
+    # Add current user message
+    messages.append({"role": "user", "content": user_message})
+    return messages
+
+
+def unavailable_message() -> Optional[str]:
+    """User-facing reason chat cannot run, or None if it can."""
+    if not GROQ_AVAILABLE:
+        return "⚠️ Chatbot library not available. Please install: pip install groq"
+    if not GROQ_API_KEY:
+        return "⚠️ Chatbot is not configured. Please add GROQ_API_KEY to backend/.env file."
+    return None
+
+
+def error_message(e: Exception) -> str:
+    """Map a provider error to a user-facing message, logging it (with a traceback if unexpected)."""
+    message = _known_error_message(e)
+    if message is None:
+        logger.error(f"Chatbot error: {type(e).__name__}: {e}", exc_info=e)
+        return "⚠️ Sorry, I encountered an error. Please try again."
+    logger.warning(f"Chatbot error: {type(e).__name__}: {e}")
+    return message
+
+
+def _known_error_message(e: Exception) -> Optional[str]:
+    if isinstance(e, IncompleteResponseError):
+        return "⚠️ The answer was cut off. Please ask again."
+    if isinstance(e, LLMBusyError):
+        return "⚠️ The advisor is busy right now. Please try again in a moment."
+    if GROQ_AVAILABLE:
+        if isinstance(e, (AuthenticationError, PermissionDeniedError)):
+            return "⚠️ API key issue. Please check your GROQ_API_KEY in backend/.env"
+        if isinstance(e, RateLimitError):
+            # Still limited after the dispatcher's retries
+            return "⚠️ Rate limit reached. Please try again in a moment."
+        if isinstance(e, BadRequestError):
+            return "⚠️ The request was rejected (it may have been blocked by safety filters). Please rephrase your question."
+        if isinstance(e, APIConnectionError):
+            return "⚠️ Could not reach the AI service. Please try again in a moment."
+    return None
+
+
+async def complete_chat(user_message: str, chat_history: list = None, digest: str = None,
+                        max_history: Optional[int] = 5, priority: int = INTERACTIVE) -> str:
+    """
+    One completion, through the response cache and the dispatcher.
+    Provider errors (after retries) are raised; an empty string means the
+    model returned nothing.
+    """
+
+    context = cache_context(chat_history, digest)
+    if context is not None:
+        cached = CHAT_RESPONSES.get(user_message, context)
+        if cached is not None:
+            return cached
+
+    client = _get_client()
+    messages = build_messages(user_message, chat_history, digest, max_history)
+
+    reserved = estimate_tokens(messages)
+
+    async with dispatcher.request(
+        lambda: client.chat.completions.with_raw_response.create(
+            messages=messages,
+            model=GROQ_MODEL,
+            temperature=0.7,
+            max_tokens=CHAT_MAX_TOKENS,
+        ),
+        priority=priority,
+        tokens=reserved,
+    ) as raw:
+        chat_completion = await raw.parse()
+
+    usage = getattr(chat_completion, "usage", None)
+    dispatcher.settle(reserved, usage.total_tokens if usage else None)
+    response_text = chat_completion.choices[0].message.content or ""
+    if context is not None and response_text:
+        CHAT_RESPONSES.put(user_message, response_text, context)
+    return response_text
+
+
+async def get_chatbot_response(user_message: str, chat_history: list = None) -> str:
     """
     Get real-time AI response for student queries using Groq
-    
+
     Args:
         user_message: The student's question
         chat_history: Previous conversation context
-        
+
     Returns:
         AI-generated response
     """
-    
-    if not GROQ_AVAILABLE:
-        return "⚠️ Chatbot library not available. Please install: pip install groq"
-    
-    if not groq_client:
-        return "⚠️ Chatbot is not configured. Please add GROQ_API_KEY to backend/.env file."
-    
+
+    unavailable = unavailable_message()
+    if unavailable:
+        return unavailable
+
     try:
-        # System prompt for career guidance context
-        system_message = """You are an expert career counselor and internship advisor for students in India. 
-Your role is to:
-- Help students with career guidance and internship questions
-- Provide advice on resume building, skill development, and job searching
-- Answer questions about different tech roles, companies, and career paths
-- Give practical, actionable advice for students starting their careers
-- Be encouraging, supportive, and professional
+        response_text = await complete_chat(user_message, chat_history)
+    except Exception as e:
+        return error_message(e)
 
-Keep responses concise (2-4 paragraphs max) but helpful. Use emojis sparingly for a friendly tone."""
+    if not response_text:
+        return EMPTY_RESPONSE_MESSAGE
+
+    return response_text
+
+
+async def stream_chatbot_response(user_message: str, chat_history: list = None, digest: str = None,
+                                  max_history: Optional[int] = 5,
+                                  priority: int = INTERACTIVE) -> AsyncIterator[str]:
+    """
+    Yield the AI response as text deltas, as the model produces them.
+
+    Closing the generator early (e.g. the client disconnected) closes the
+    upstream stream, which stops generation on the provider's side.
+    Provider errors are raised; callers check unavailable_message() first
+    and turn errors into messages with error_message().
+
+    A cached answer is yielded as a single chunk. Only streams that run to
+    completion are cached; one the provider cuts off raises
+    IncompleteResponseError after its last chunk.
+    """
 
-        # Build conversation messages for Groq API
-        messages = [{"role": "system", "content": system_message}]
-        
-        # Add chat history (last 5 messages for context)
-        if chat_history:
-            for msg in chat_history[-5:]:
-                messages.append(msg)
-        
-        # Add current user message
-        messages.append({"role": "user", "content": user_message})
-        
-        # Get response from Groq (using llama-3.3-70b-versatile - best free model)
-        chat_completion = groq_client.chat.completions.create(
+    context = cache_context(chat_history, digest)
+    if context is not None:
+        cached = CHAT_RESPONSES.get(user_message, context)
+        if cached is not None:
+            yield cached
+            return
+
+    client = _get_client()
+    messages = build_messages(user_message, chat_history, digest, max_history)
+
+    reserved = estimate_tokens(messages)
+    parts = []
+
+    # The dispatch slot is held until the stream is fully read (or closed)
+    async with dispatcher.request(
+        lambda: client.chat.completions.with_raw_response.create(
             messages=messages,
-            model="llama-3.3-70b-versatile",  # Fast, smart, and free!
+            model=GROQ_MODEL,
             temperature=0.7,
-            max_tokens=500,
-        )
-        
-        response_text = chat_completion.choices[0].message.content
-        
-        if not response_text:
-            return "⚠️ I couldn't generate a response. Please try rephrasing your question."
-        
-        return response_text
-        
-    except Exception as e:
-        error_msg = str(e)
-        print(f"Chatbot error: {error_msg}")
-        
-        # Handle specific errors
-        if "api" in error_msg.lower() and "key" in error_msg.lower():
-            return "⚠️ API key issue. Please check your GROQ_API_KEY in backend/.env"
-        elif "rate" in error_msg.lower() or "limit" in error_msg.lower():
-            return "⚠️ Rate limit reached. Please try again in a moment."
-        elif "quota" in error_msg.lower():
-            return "⚠️ API quota exceeded. Please try again later."
-        elif "blocked" in error_msg.lower():
-            return "⚠️ Content was blocked by safety filters. Please rephrase your question."
-        else:
-            return "⚠️ Sorry, I encountered an error. Please try again."
+            max_tokens=CHAT_MAX_TOKENS,
+            stream=True,
+        ),
+        priority=priority,
+        tokens=reserved,
+    ) as raw:
+        stream = await raw.parse()
+        finished = False
+        try:
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                if chunk.choices[0].delta.content:
+                    parts.append(chunk.choices[0].delta.content)
+                    yield parts[-1]
+                finished = finished or chunk.choices[0].finish_reason is not None
+        finally:
+            # Shielded so the close still happens when we are being cancelled
+            await asyncio.shield(stream.close())
+            # Streams report no usage here; settle on prompt + text produced
+            dispatcher.settle(reserved, reserved - CHAT_MAX_TOKENS + sum(len(p) for p in parts) // 4)
+
+    if not finished:
+        # The connection ended without a finish_reason: the answer is cut off
+        raise IncompleteResponseError(f"Stream ended after {len(parts)} chunks without finishing")
+    if context is not None and parts:
+        CHAT_RESPONSES.put(user_message, "".join(parts), context)
+
+
+async def close():
+    """Close the pooled connections (app shutdown)."""
+    global groq_client
+    if groq_client is not None:
+        await groq_client.close()
+        groq_client = None
@@ -1,11 +1,39 @@
-import uuid
+from app.services.student_repository import (
+    STUDENT_ARCHIVE_DIR,
+    STUDENT_IDLE_TTL,
+    StudentRepository,
+    create_repository,
+)
 
-STUDENTS_DB = {}
+# Chosen by STUDENT_STORE (sqlite by default); created on first use
+_repository = None
+
+def get_repository() -> StudentRepository:
+    global _repository
+    if _repository is None:
+        _repository = create_repository()
+    return _repository
+
+def set_repository(repository: StudentRepository):
+    global _repository
+    _repository = repository
 
 def create_student(profile):
-    student_id = str(uuid.uuid4())
-    STUDENTS_DB[student_id] = profile
-    return student_id
+    return get_repository().create(profile)
+
+def create_students(profiles):
+    return get_repository().create_many(profiles)
 
 def get_student(student_id):
-    return STUDENTS_DB.get(student_id)
+    return get_repository().get(student_id)
+
+def find_student_by_content(content_hash, email, name):
+    return get_repository().find_by_content(content_hash, email, name)
+
+def list_students():
+    return dict(get_repository().iter_all())
+
+def evict_idle_students(max_idle=STUDENT_IDLE_TTL, archive_dir=STUDENT_ARCHIVE_DIR):
+    if max_idle <= 0:
+        return 0
+    return get_repository().evict_idle(max_idle, archive_dir or None)
@@ -0,0 +1,142 @@
+"""
+Draft inputs & memoized drafts
+==============================
+The generate endpoints accept references instead of full text: a
+student_id for the resume and a job_id for the job. They are resolved here
+against pre-analysed artifacts:
+
+- resumes: the skills the templates quote. For a student they are read
+  from the record (stored at upload, see student_records.draft_skills),
+  so the resume text is never decompressed; inline text is analysed once
+  per resume hash (the sha256 of the text) and cached
+- jobs: looked up by id in the current snapshot; the job hash covers the
+  title, company and description, so an edited posting is a new job
+
+Finished drafts are memoized per (template, resume hash, job hash, user
+details), plus the date for cover letters since they are dated; callers
+get a copy, so the memo cannot be changed through a result. Both caches
+are LRU-bounded by DRAFT_CACHE_ENTRIES / DRAFT_CACHE_MB.
+"""
+
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Callable, Dict, List, Optional, Tuple
+import hashlib
+import json
+import os
+
+from app.services.artifact_cache import ArtifactCache, content_hash
+from app.services.email_cover_letter_generator import (
+    extract_skills_from_resume,
+    generate_cold_email,
+    generate_cover_letter,
+)
+from app.services.job_snapshot import JobSnapshot, current_snapshot, job_id
+from app.services.student_records import record_draft_skills, record_text
+
+DRAFT_CACHE_ENTRIES = int(os.getenv("DRAFT_CACHE_ENTRIES", "4096"))
+DRAFT_CACHE_MB = int(os.getenv("DRAFT_CACHE_MB", "64"))
+# Bump when a template's wording changes, so memoized drafts are not reused
+TEMPLATE_VERSION = 1
+
+RESUME_DRAFT_INPUTS = ArtifactCache(DRAFT_CACHE_ENTRIES, DRAFT_CACHE_MB * 1024 * 1024)
+DRAFTS = ArtifactCache(DRAFT_CACHE_ENTRIES, DRAFT_CACHE_MB * 1024 * 1024)
+
+
+class DraftInputError(ValueError):
+    """A referenced student or job does not exist."""
+
+
+@dataclass(frozen=True)
+class ResumeInput:
+    hash: str
+    skills: Tuple[str, ...]
+    # From the student record, when resolved by student_id
+    name: Optional[str] = None
+    email: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class JobInput:
+    id: str
+    hash: str
+    title: str
+    company: str
+    description: str = field(repr=False)
+
+
+def _analyse(resume_hash: str, extract: Callable[[], List[str]]) -> Tuple[str, ...]:
+    inputs = RESUME_DRAFT_INPUTS.get(resume_hash)
+    if inputs is None:
+        inputs = {"skills": list(extract())}
+        RESUME_DRAFT_INPUTS.put(resume_hash, inputs)
+    return tuple(inputs["skills"])
+
+
+def resolve_resume(student: Optional[Dict] = None, resume_text: Optional[str] = None) -> ResumeInput:
+    """Draft inputs for a student record (its stored analysis) or inline text (analysed once per content)."""
+    if student is not None:
+        resume_hash = student.get("content_hash") or content_hash(record_text(student).encode("utf-8"))
+        skills = _analyse(resume_hash, lambda: record_draft_skills(student))
+        return ResumeInput(resume_hash, skills, student.get("name"), student.get("email"))
+    text = resume_text or ""
+    resume_hash = content_hash(text.encode("utf-8"))
+    return ResumeInput(resume_hash, _analyse(resume_hash, lambda: extract_skills_from_resume(text)))
+
+
+def job_input(job: Dict) -> JobInput:
+    title, company, description = job.get("title") or "", job.get("company") or "", job.get("description") or ""
+    digest = content_hash(json.dumps([title, company, description]).encode("utf-8"))
+    return JobInput(job.get("id") or job_id(title, company, job.get("source")), digest, title, company, description)
+
+
+def resolve_job(key: str, snapshot: Optional[JobSnapshot] = None) -> JobInput:
+    job = (snapshot or current_snapshot()).get_job(key)
+    if job is None:
+        raise DraftInputError(f"Job {key} not found (ids come from the recommend and search endpoints)")
+    return job_input(job)
+
+
+def _memo_key(template: str, resume: ResumeInput, job: JobInput, user: Dict) -> str:
+    parts = [template, TEMPLATE_VERSION, resume.hash, job.hash, sorted(user.items())]
+    if template == "cover_letter":
+        parts.append(date.today().isoformat())
+    return hashlib.sha256(json.dumps(parts).encode("utf-8")).hexdigest()
+
+
+def email_draft(resume: ResumeInput, job: JobInput, user_name: str, recruiter_name: Optional[str] = None) -> Dict:
+    key = _memo_key("email", resume, job, {"user_name": user_name, "recruiter_name": recruiter_name})
+    draft = DRAFTS.get(key)
+    if draft is None:
+        draft = generate_cold_email(
+            job_title=job.title,
+            company_name=job.company,
+            recruiter_name=recruiter_name,
+            resume_text="",  # only read to extract skills, which are given
+            job_description=job.description,
+            user_name=user_name,
+            skills=list(resume.skills),
+        )
+        DRAFTS.put(key, draft)
+    return dict(draft)
+
+
+def cover_letter_draft(resume: ResumeInput, job: JobInput, user_name: str, user_email: str, user_phone: str) -> Dict:
+    user = {"user_name": user_name, "user_email": user_email, "user_phone": user_phone}
+    key = _memo_key("cover_letter", resume, job, user)
+    draft = DRAFTS.get(key)
+    if draft is None:
+        draft = generate_cover_letter(
+            job_title=job.title,
+            company_name=job.company,
+            resume_text="",  # only read to extract skills, which are given
+            job_description=job.description,
+            skills=list(resume.skills),
+            **user,
+        )
+        DRAFTS.put(key, draft)
+    return dict(draft)
+
+
+def stats() -> Dict:
+    return {"resumes": RESUME_DRAFT_INPUTS.stats(), "drafts": DRAFTS.stats()}
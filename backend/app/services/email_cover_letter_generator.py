@@ -28,8 +28,8 @@ def extract_skills_from_resume(resume_text: str) -> list:
     ]
     
     resume_lower = resume_text.lower()
-    found_skills = [skill for skill in COMMON_SKILLS if skill in resume_lower]
-    return list(set(found_skills))  # Remove duplicates
+    # In vocabulary order, so the same resume always yields the same list
+    return [skill for skill in COMMON_SKILLS if skill in resume_lower]
 
 
 def generate_cold_email(
@@ -38,7 +38,8 @@ def generate_cold_email(
     recruiter_name: Optional[str],
     resume_text: str,
     job_description: str,
-    user_name: str = "Candidate"
+    user_name: str = "Candidate",
+    skills: Optional[list] = None
 ) -> Dict[str, str]:
     """
     Generate a personalized cold email to recruiter.
@@ -50,12 +51,14 @@ def generate_cold_email(
         resume_text: User's resume content
         job_description: Job description
         user_name: User's name for signature
+        skills: Skills already extracted from resume_text (batch generation)
     
     Returns:
         Dict with subject and body
     """
     
-    skills = extract_skills_from_resume(resume_text)
+    if skills is None:
+        skills = extract_skills_from_resume(resume_text)
     skills_str = ", ".join(skills[:5]) if skills else "software development"
     
     # Extract key requirements from job description
@@ -118,7 +121,8 @@ def generate_cover_letter(
     job_description: str,
     user_name: str = "Candidate",
     user_email: str = "your.email@example.com",
-    user_phone: str = "+91-XXXX-XXXX-XX"
+    user_phone: str = "+91-XXXX-XXXX-XX",
+    skills: Optional[list] = None
 ) -> Dict[str, str]:
     """
     Generate a personalized cover letter based on job and resume.
@@ -131,12 +135,14 @@ def generate_cover_letter(
         user_name: User's full name
         user_email: User's email
         user_phone: User's phone number
+        skills: Skills already extracted from resume_text (batch generation)
     
     Returns:
         Dict with formatted cover letter
     """
     
-    skills = extract_skills_from_resume(resume_text)
+    if skills is None:
+        skills = extract_skills_from_resume(resume_text)
     skills_highlight = skills[:3] if skills else ["Software Development", "Problem Solving", "Collaboration"]
     
     today = datetime.now().strftime("%B %d, %Y")
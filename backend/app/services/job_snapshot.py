@@ -0,0 +1,187 @@
+"""
+Immutable job snapshots
+=======================
+The scraped job list is published as a frozen, versioned JobSnapshot and
+swapped in with a single reference assignment. Readers grab the current
+snapshot once and use it for the whole request: no locks, no copies, and
+no chance of seeing half of one refresh and half of another.
+
+Per-request data (relevance scores etc.) must live in side structures keyed
+by job index, never in the shared records.
+
+Every job carries a stable id (job_id(): a hash of title|company|source),
+so clients can refer to a job across requests and snapshot versions.
+
+With several uvicorn workers, each published snapshot is also written to a
+shared memory-mapped file (see shared_snapshot); the other workers adopt
+it on their next read instead of scraping themselves.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Optional, Tuple
+import hashlib
+import threading
+import time
+import logging
+
+from app.core.scoring import NUMPY_AVAILABLE, SKILL_COLUMNS, SKILL_INDEX, build_skill_matrix, job_skills
+from app.services.shared_snapshot import SNAPSHOT_SHARE, SnapshotFileReader, write_snapshot_file
+
+logger = logging.getLogger(__name__)
+
+# Default TTL; scraped snapshots get one derived from the scrape intervals
+# (web_scraper.SNAPSHOT_EXPIRES_IN)
+SNAPSHOT_TTL_SECONDS = 900
+
+
+def job_id(title: str, company: str, source: str) -> str:
+    """Stable job ID: the same posting from the same source keeps it across refreshes."""
+    key = f"{(title or '').strip().lower()}|{(company or '').strip().lower()}|{source or ''}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+class FrozenJob(dict):
+    """
+    A job record that refuses mutation.
+
+    Subclasses dict (rather than wrapping it in a MappingProxyType) so it
+    still serialises as a plain JSON object in responses.
+    """
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("Job snapshot records are read-only")
+
+    __setitem__ = __delitem__ = _readonly
+    clear = pop = popitem = setdefault = update = __ior__ = _readonly
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        # Default dict pickling refills the dict item by item via __setitem__
+        return (FrozenJob, (dict(self),))
+
+
+@dataclass(frozen=True)
+class JobSnapshot:
+    """One published, read-only version of the job list and its indexes."""
+    version: int
+    created_at: float
+    jobs: Tuple[FrozenJob, ...]
+    # Skills per job, parallel to jobs; computed once at publish time
+    job_skills: Tuple[Tuple[str, ...], ...]
+    expires_in: int = SNAPSHOT_TTL_SECONDS
+    sources: Tuple[str, ...] = ()
+    # job_skills as a (jobs x SKILL_COLUMNS) float32 matrix, when numpy is available
+    skill_matrix: Any = field(default=None, compare=False, repr=False)
+    # job id -> index into jobs
+    ids: Dict[str, int] = field(default_factory=dict, compare=False, repr=False)
+
+    def is_fresh(self) -> bool:
+        return (time.time() - self.created_at) < self.expires_in
+
+    def get_job(self, key: str) -> Optional[FrozenJob]:
+        index = self.ids.get(key)
+        return self.jobs[index] if index is not None else None
+
+
+EMPTY_SNAPSHOT = JobSnapshot(version=0, created_at=0.0, jobs=(), job_skills=(), expires_in=0)
+
+_current: JobSnapshot = EMPTY_SNAPSHOT
+# Serialises writers only, so versions stay monotonic; readers never take it
+_publish_lock = threading.Lock()
+_reader = SnapshotFileReader() if SNAPSHOT_SHARE else None
+
+
+def _freeze(job: Dict) -> FrozenJob:
+    return FrozenJob(job, skills=tuple(job.get("skills", ())))
+
+
+def _index_ids(jobs: Tuple[FrozenJob, ...]) -> Dict[str, int]:
+    ids = {}
+    for i, job in enumerate(jobs):
+        # Jobs from snapshots written before ids existed get theirs computed
+        key = job.get("id") or job_id(job.get("title"), job.get("company"), job.get("source"))
+        ids.setdefault(key, i)
+    return ids
+
+
+def _adopt(data: Dict):
+    """Make a snapshot read from the shared file current, if still newer."""
+    global _current
+    jobs = tuple(_freeze(job) for job in data["jobs"])
+    snapshot = JobSnapshot(
+        version=data["version"],
+        created_at=data["created_at"],
+        jobs=jobs,
+        job_skills=tuple(tuple(SKILL_COLUMNS[i] for i in cols) for cols in data["skills"]),
+        expires_in=data["expires_in"],
+        sources=tuple(data["sources"]),
+        skill_matrix=data["matrix"],
+        ids=_index_ids(jobs),
+    )
+    with _publish_lock:
+        if snapshot.version > _current.version:
+            _current = snapshot
+            logger.info(f"✓ Adopted shared job snapshot v{snapshot.version} ({len(snapshot.jobs)} jobs)")
+
+
+def current_snapshot(sync: bool = False) -> JobSnapshot:
+    """
+    Return the currently published snapshot (may be empty or stale).
+
+    Picks up a newer snapshot published by another worker; the shared file
+    is checked at most once per SNAPSHOT_POLL_SECONDS unless sync is set.
+    """
+    if _reader is not None:
+        data = _reader.poll(_current.version, force=sync)
+        if data is not None:
+            _adopt(data)
+    return _current
+
+
+def publish_snapshot(jobs: Iterable[Dict], expires_in: int = SNAPSHOT_TTL_SECONDS) -> JobSnapshot:
+    """Freeze jobs into a new snapshot and make it current in one atomic swap."""
+    global _current
+
+    frozen = tuple(_freeze(job) for job in jobs)
+    ids = _index_ids(frozen)
+    skills = tuple(tuple(job_skills(job)) for job in frozen)
+    sources = tuple(dict.fromkeys(job.get("source", "Unknown") for job in frozen))
+    matrix = None
+    if NUMPY_AVAILABLE:
+        matrix = build_skill_matrix(skills)
+        matrix.flags.writeable = False
+
+    with _publish_lock:
+        version = _current.version
+        if _reader is not None:
+            version = max(version, _reader.latest_version())
+        snapshot = JobSnapshot(
+            version=version + 1,
+            created_at=time.time(),
+            jobs=frozen,
+            job_skills=skills,
+            expires_in=expires_in,
+            sources=sources,
+            skill_matrix=matrix,
+            ids=ids,
+        )
+        _current = snapshot
+
+        if _reader is not None:
+            try:
+                write_snapshot_file(
+                    snapshot.version, snapshot.created_at, expires_in, frozen,
+                    [[SKILL_INDEX[s] for s in job] for job in skills], sources, matrix,
+                )
+                # Remember the file we just wrote so it is not adopted back
+                _reader.poll(snapshot.version, force=True)
+            except OSError as e:
+                logger.error(f"Could not share job snapshot: {e}")
+
+    logger.info(f"✓ Published job snapshot v{snapshot.version} ({len(frozen)} jobs)")
+    return snapshot
@@ -0,0 +1,353 @@
+"""
+LLM dispatch
+============
+Every call to the LLM provider goes through one dispatcher per worker,
+which shapes traffic to stay under the provider's limits instead of
+finding them by hitting 429s:
+
+- priority queue: waiting calls are granted in priority order
+  (INTERACTIVE chat before BACKGROUND work), FIFO within a priority
+- budget: token buckets for requests and tokens per minute (LLM_RPM,
+  LLM_TPM; 0 = unlimited) and a cap on calls in flight
+  (CHAT_MAX_CONCURRENCY). A call reserves its estimated tokens up front;
+  the estimate is corrected from the reported usage afterwards.
+- adaptive limits: x-ratelimit-remaining-* / x-ratelimit-reset-* response
+  headers clamp the buckets, and a 429 pauses all dispatch until its
+  retry-after has passed, so one rate-limit response does not turn into a
+  storm of them
+- retries: 429, 5xx and connection errors are retried up to
+  LLM_MAX_RETRIES times, waiting retry-after when the provider sends one
+  and jittered exponential backoff otherwise. The SDK's own retries are
+  off so that every attempt passes through the queue.
+
+Budgets are per worker: with several uvicorn workers sharing one API key,
+divide the provider's limits between them. stats() reports queue depth,
+in-flight calls, waits, retries and rate-limit pauses (GET /metrics/llm).
+"""
+
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Dict, List, Optional
+import asyncio
+import heapq
+import itertools
+import logging
+import os
+import random
+import re
+import time
+
+try:
+    from groq import APIConnectionError, APIStatusError
+    RETRYABLE_CONNECTION_ERRORS = (APIConnectionError,)
+except ImportError:
+    APIStatusError = None
+    RETRYABLE_CONNECTION_ERRORS = ()
+
+logger = logging.getLogger(__name__)
+
+LLM_RPM = float(os.getenv("LLM_RPM", "0"))
+LLM_TPM = float(os.getenv("LLM_TPM", "0"))
+LLM_MAX_CONCURRENCY = int(os.getenv("CHAT_MAX_CONCURRENCY", "64"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "20"))
+# Longest a call may wait in the queue before giving up (0 = no limit)
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "60"))
+
+INTERACTIVE = 0
+BACKGROUND = 10
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+_DURATION_PART = re.compile(r"([\d.]+)(ms|h|m|s)")
+_UNIT_SECONDS = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+
+
+class LLMBusyError(Exception):
+    """A call waited longer than LLM_QUEUE_TIMEOUT for its turn."""
+
+
+def parse_duration(value: str) -> Optional[float]:
+    """Seconds in a rate-limit reset header: "7.66s", "2m59.56s", "1h2m", "120ms" or plain seconds."""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    return sum(float(n) * _UNIT_SECONDS[unit] for n, unit in parts) if parts else None
+
+
+def retry_after(headers) -> Optional[float]:
+    """Seconds to wait from retry-after-ms / retry-after, if the provider sent one."""
+    if headers is None:
+        return None
+    if headers.get("retry-after-ms"):
+        try:
+            return float(headers["retry-after-ms"]) / 1000
+        except ValueError:
+            pass
+    return parse_duration(headers.get("retry-after", ""))
+
+
+class TokenBucket:
+    """
+    Refills continuously at per_minute / 60 per second, up to one minute's
+    worth. After clamp() it refills no faster than the provider's own
+    window, until that window resets.
+    """
+
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60.0
+        self.capacity = per_minute
+        self.level = per_minute
+        self.updated = time.monotonic()
+        # Slower refill rate in force until reset_until (monotonic time)
+        self.reset_rate = self.rate
+        self.reset_until = 0.0
+
+    @property
+    def limited(self) -> bool:
+        return self.capacity > 0
+
+    def _refill(self, now: float):
+        slow = max(0.0, min(now, self.reset_until) - self.updated)
+        gained = slow * self.reset_rate + (now - self.updated - slow) * self.rate
+        self.level = min(self.capacity, self.level + gained)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until amount can be taken (0 if now). Oversized amounts only need a full bucket."""
+        if not self.limited:
+            return 0.0
+        self._refill(now)
+        missing = min(amount, self.capacity) - self.level
+        if missing <= 0:
+            return 0.0
+        slow = max(0.0, self.reset_until - now)
+        if missing <= slow * self.reset_rate:
+            return missing / self.reset_rate
+        return slow + (missing - slow * self.reset_rate) / self.rate
+
+    def take(self, amount: float):
+        if self.limited:
+            self.level -= amount
+
+    def clamp(self, remaining: float, reset: Optional[float], now: float):
+        """Never believe we have more left than the provider says."""
+        if not self.limited:
+            return
+        self._refill(now)
+        if remaining < self.level:
+            self.level = remaining
+            # Refill no faster than the provider's window actually resets:
+            # it is full again after reset seconds, not sooner
+            if reset:
+                self.reset_rate = min(self.rate, (self.capacity - remaining) / reset)
+                self.reset_until = now + reset
+
+
+class LLMDispatcher:
+    """Priority queue + request/token budget in front of one provider."""
+
+    def __init__(
+        self,
+        rpm: float = LLM_RPM,
+        tpm: float = LLM_TPM,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        max_retries: int = LLM_MAX_RETRIES,
+        queue_timeout: float = LLM_QUEUE_TIMEOUT,
+    ):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self._queue: List[tuple] = []  # (priority, seq, tokens, future)
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._stats = {
+            "granted": 0,
+            "completed": 0,
+            "failed": 0,
+            "retries": 0,
+            "rate_limited": 0,
+            "timeouts": 0,
+            "wait_total_s": 0.0,
+            "wait_max_s": 0.0,
+            "max_queue_depth": 0,
+        }
+
+    # ---- granting -------------------------------------------------------
+
+    def _pump(self):
+        """Grant queued calls, in priority order, while budget and concurrency allow."""
+        self._timer = None
+        while self._queue:
+            priority, _, tokens, future = self._queue[0]
+            if future.done():  # cancelled or timed out while waiting
+                heapq.heappop(self._queue)
+                continue
+            if self.in_flight >= self.max_concurrency:
+                return  # a release will pump again
+            now = time.monotonic()
+            delay = max(
+                self.paused_until - now,
+                self.requests.wait_time(1, now),
+                self.tokens.wait_time(tokens, now),
+            )
+            if delay > 0:
+                self._timer = asyncio.get_running_loop().call_later(delay, self._pump)
+                return
+            heapq.heappop(self._queue)
+            self.requests.take(1)
+            self.tokens.take(tokens)
+            self.in_flight += 1
+            self._stats["granted"] += 1
+            future.set_result(None)
+
+    async def _acquire(self, priority: int, tokens: int):
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (priority, next(self._seq), tokens, future))
+        self._stats["max_queue_depth"] = max(self._stats["max_queue_depth"], len(self._queue))
+        if self._timer is None:
+            self._pump()
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(future, self.queue_timeout or None)
+        except asyncio.TimeoutError:
+            self._stats["timeouts"] += 1
+            raise LLMBusyError(f"No LLM capacity within {self.queue_timeout:.0f}s")
+        except asyncio.CancelledError:
+            # Granted just as we were cancelled: give the slot back
+            if future.done() and not future.cancelled():
+                self._release()
+            raise
+        waited = time.monotonic() - started
+        self._stats["wait_total_s"] += waited
+        self._stats["wait_max_s"] = max(self._stats["wait_max_s"], waited)
+
+    def _release(self):
+        self.in_flight -= 1
+        if self._timer is None:
+            self._pump()
+
+    # ---- provider feedback ---------------------------------------------
+
+    def observe(self, headers):
+        """Clamp the budgets to the provider's x-ratelimit-* headers."""
+        if headers is None:
+            return
+        now = time.monotonic()
+        for bucket, kind in ((self.requests, "requests"), (self.tokens, "tokens")):
+            remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+            if remaining is None:
+                continue
+            try:
+                remaining = float(remaining)
+            except ValueError:
+                continue
+            reset = parse_duration(headers.get(f"x-ratelimit-reset-{kind}", ""))
+            bucket.clamp(remaining, reset, now)
+            if remaining <= 0 and reset:
+                self.pause(reset)
+
+    def settle(self, reserved: int, used: Optional[int]):
+        """Correct a token reservation once the real usage is known."""
+        if used is not None:
+            self.tokens.take(used - reserved)
+
+    def pause(self, seconds: float):
+        """Hold all dispatch for seconds (e.g. after a 429)."""
+        until = time.monotonic() + seconds
+        if until > self.paused_until:
+            self.paused_until = until
+            logger.warning(f"LLM dispatch paused for {seconds:.1f}s (provider rate limit)")
+
+    def _retry_delay(self, error: Exception, attempt: int) -> Optional[float]:
+        """Seconds before retrying error, or None if it should not be retried."""
+        status = getattr(error, "status_code", None)
+        if status is None and not isinstance(error, RETRYABLE_CONNECTION_ERRORS):
+            return None
+        if status is not None and status not in RETRYABLE_STATUS:
+            return None
+        response = getattr(error, "response", None)
+        wait = retry_after(response.headers if response is not None else None)
+        if status == 429:
+            self._stats["rate_limited"] += 1
+            if response is not None:
+                self.observe(response.headers)
+        if wait is None:
+            # Full jitter: spreads retries so they do not arrive together
+            wait = random.uniform(0, min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * 2 ** attempt))
+        else:
+            wait *= random.uniform(1.0, 1.2)
+            if status == 429:
+                self.pause(wait)
+        return wait
+
+    # ---- public API -----------------------------------------------------
+
+    @asynccontextmanager
+    async def request(self, create: Callable[[], Awaitable], priority: int = INTERACTIVE, tokens: int = 0):
+        """
+        Run create() when budget allows and yield its result; the call's
+        slot is held until the block exits, so streams count as in flight
+        until fully read. Failed attempts are retried per the provider's
+        retry-after, or with backoff; the last error is raised.
+        """
+        attempt = 0
+        while True:
+            await self._acquire(priority, tokens)
+            try:
+                result = await create()
+                break
+            except Exception as e:
+                # The failed attempt used no tokens: refund its reservation,
+                # and set any 429 pause, before the slot is released, so the
+                # pump cannot grant the next call straight into the limit
+                self.tokens.take(-tokens)
+                delay = self._retry_delay(e, attempt)
+                self._release()
+                if delay is None or attempt >= self.max_retries:
+                    self._stats["failed"] += 1
+                    raise
+                attempt += 1
+                self._stats["retries"] += 1
+                await asyncio.sleep(delay)
+        try:
+            self.observe(getattr(result, "headers", None))
+            yield result
+            self._stats["completed"] += 1
+        finally:
+            self._release()
+
+    def stats(self) -> Dict:
+        depth = {name: 0 for name in PRIORITY_NAMES.values()}
+        for priority, _, _, future in self._queue:
+            if not future.done():
+                name = PRIORITY_NAMES.get(priority, str(priority))
+                depth[name] = depth.get(name, 0) + 1
+        granted = self._stats["granted"]
+        return {
+            "pid": os.getpid(),
+            "queue_depth": depth,
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "paused_for_s": round(max(0.0, self.paused_until - time.monotonic()), 2),
+            "budget": {
+                "rpm": self.requests.capacity or None,
+                "tpm": self.tokens.capacity or None,
+                "requests_left": round(self.requests.level, 1) if self.requests.limited else None,
+                "tokens_left": round(self.tokens.level) if self.tokens.limited else None,
+            },
+            **{k: v for k, v in self._stats.items() if not k.startswith("wait_")},
+            "wait_avg_ms": round(self._stats["wait_total_s"] / granted * 1e3, 1) if granted else 0.0,
+            "wait_max_ms": round(self._stats["wait_max_s"] * 1e3, 1),
+        }
+
+
+dispatcher = LLMDispatcher()
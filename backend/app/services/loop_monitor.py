@@ -0,0 +1,68 @@
+"""
+Event-loop lag monitor
+======================
+A background task that sleeps for a fixed interval and records how late
+it wakes up. Anything that blocks the event loop (sync I/O or CPU work in
+an async route) shows up directly as lag. Exposed per worker at
+GET /metrics/loop-lag; the load-test harness reads it.
+"""
+
+from collections import deque
+from typing import Dict, Optional
+import asyncio
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+LOOP_LAG_INTERVAL = float(os.getenv("LOOP_LAG_INTERVAL", "0.05"))
+# Samples kept (at the default interval, about 8 minutes)
+LOOP_LAG_SAMPLES = 10_000
+
+_samples: deque = deque(maxlen=LOOP_LAG_SAMPLES)
+_task: Optional[asyncio.Task] = None
+
+
+async def _probe(interval: float):
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        _samples.append(max(0.0, loop.time() - started - interval))
+
+
+def start(interval: float = LOOP_LAG_INTERVAL):
+    """Start probing the running loop (idempotent)."""
+    global _task
+    if _task is None or _task.done():
+        _task = asyncio.get_running_loop().create_task(_probe(interval))
+
+
+def stop():
+    global _task
+    if _task is not None:
+        _task.cancel()
+        _task = None
+
+
+def reset():
+    _samples.clear()
+
+
+def _percentile(ordered, q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def stats() -> Dict:
+    """Lag percentiles in milliseconds over the retained samples."""
+    ordered = sorted(_samples)
+    if not ordered:
+        return {"pid": os.getpid(), "samples": 0}
+    return {
+        "pid": os.getpid(),
+        "samples": len(ordered),
+        "p50_ms": round(_percentile(ordered, 0.50) * 1e3, 2),
+        "p95_ms": round(_percentile(ordered, 0.95) * 1e3, 2),
+        "p99_ms": round(_percentile(ordered, 0.99) * 1e3, 2),
+        "max_ms": round(ordered[-1] * 1e3, 2),
+    }
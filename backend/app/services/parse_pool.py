@@ -0,0 +1,119 @@
+"""
+Resume parsing pool
+===================
+Runs CPU-bound PDF extraction in a bounded process pool so a large upload
+never blocks the event loop (and with it chat, search and every other
+route).
+
+Backpressure: at most RESUME_PARSE_QUEUE documents may be queued or in
+flight. Beyond that, parse_resume raises ParseQueueFull carrying a
+Retry-After estimate, which the route turns into HTTP 429.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Union
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+
+from app.services.resume_parser import extract_text_from_pdf
+
+logger = logging.getLogger(__name__)
+
+RESUME_PARSE_WORKERS = int(os.getenv("RESUME_PARSE_WORKERS", "2"))
+RESUME_PARSE_QUEUE = int(os.getenv("RESUME_PARSE_QUEUE", "16"))
+RESUME_MAX_PAGES = int(os.getenv("RESUME_MAX_PAGES", "20"))
+RESUME_PARSE_TIMEOUT = float(os.getenv("RESUME_PARSE_TIMEOUT", "30"))
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pending = 0
+_pending_lock = threading.Lock()
+# Moving average of parse time, used for Retry-After
+_avg_parse_seconds = 1.0
+
+
+class ParseQueueFull(Exception):
+    """Raised when the parse queue is at capacity."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Resume parser busy, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+def _parse_source(source: Union[bytes, str], max_pages: int, time_limit: float) -> str:
+    """Worker task: extract text from PDF bytes or a spooled file path."""
+    return extract_text_from_pdf(source, max_pages=max_pages, time_limit=time_limit)
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn: forking a threaded server process is unsafe
+        _pool = ProcessPoolExecutor(
+            max_workers=RESUME_PARSE_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        logger.info(f"✓ Resume parse pool started ({RESUME_PARSE_WORKERS} workers)")
+    return _pool
+
+
+def _retry_after() -> int:
+    backlog = _pending / max(RESUME_PARSE_WORKERS, 1)
+    return max(1, round(backlog * _avg_parse_seconds))
+
+
+def _release_slot(future):
+    global _pending
+    with _pending_lock:
+        _pending -= 1
+
+
+def queue_depth() -> int:
+    """Documents currently queued or being parsed."""
+    return _pending
+
+
+async def parse_resume(source: Union[bytes, str]) -> str:
+    """
+    Parse a PDF (bytes or file path) in the process pool without blocking the event loop.
+
+    Large uploads should be passed as a path so only the path crosses the
+    process boundary.
+
+    Raises:
+        ParseQueueFull: the queue is at capacity
+        ResumeLimitExceeded: too many pages or the worker hit its time budget
+        asyncio.TimeoutError: the worker did not answer within the timeout
+    """
+    global _pending, _avg_parse_seconds
+
+    with _pending_lock:
+        if _pending >= RESUME_PARSE_QUEUE:
+            raise ParseQueueFull(_retry_after())
+        _pending += 1
+
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    try:
+        future = _get_pool().submit(_parse_source, source, RESUME_MAX_PAGES, RESUME_PARSE_TIMEOUT)
+    except Exception:
+        with _pending_lock:
+            _pending -= 1
+        raise
+    # The slot is freed when the worker actually finishes, even if we time out first
+    future.add_done_callback(_release_slot)
+
+    # Small grace period over the worker's own budget for IPC
+    text = await asyncio.wait_for(asyncio.wrap_future(future), timeout=RESUME_PARSE_TIMEOUT + 5)
+    _avg_parse_seconds = 0.8 * _avg_parse_seconds + 0.2 * (loop.time() - started)
+    return text
+
+
+def shutdown():
+    """Stop the parse pool."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
@@ -0,0 +1,81 @@
+"""
+Resume ingestion
+================
+Turns a spooled resume upload into a student record: content-hash
+dedup, cached or freshly parsed artifacts, then the store write. Shared
+by the single-upload and bulk endpoints; errors are raised as the
+parser/pool exceptions and mapped to HTTP statuses by the routes.
+"""
+
+from typing import Dict
+import asyncio
+
+from app.core.ml_engine import extract_profile
+from app.services.artifact_cache import RESUME_ARTIFACTS
+from app.services.data_store import create_student, find_student_by_content
+from app.services.parse_pool import parse_resume
+from app.services.student_records import compact_artifacts
+from app.services.upload_spool import SpooledUpload
+
+
+async def parse_artifacts(source) -> Dict:
+    """Parse a PDF and derive everything we keep per resume content (compact form)."""
+    text = await parse_resume(source)
+    return compact_artifacts(text, extract_profile(text))
+
+
+async def ingest_resume(
+    upload: SpooledUpload,
+    student_name: str = None,
+    student_email: str = None,
+    default_name: str = "Student",
+) -> Dict:
+    """
+    Create (or reuse) the student record for a spooled resume.
+
+    When student_email is not given (bulk uploads) the first email found in
+    the resume is used, and student_name falls back to default_name.
+    """
+    digest = upload.digest
+    student_name = student_name or default_name
+
+    # Same PDF from the same student (same email and name): nothing to redo.
+    # The same PDF under another name is someone else's upload.
+    if student_email is not None:
+        existing_id = await asyncio.to_thread(find_student_by_content, digest, student_email, student_name)
+        if existing_id:
+            return _deduplicated(existing_id)
+
+    artifacts = RESUME_ARTIFACTS.get(digest)
+    if artifacts is None:
+        artifacts = await parse_artifacts(upload.source)
+        RESUME_ARTIFACTS.put(digest, artifacts)
+
+    if student_email is None:
+        emails = artifacts["profile"]["emails"]
+        student_email = emails[0] if emails else ""
+        existing_id = await asyncio.to_thread(find_student_by_content, digest, student_email, student_name)
+        if existing_id:
+            return _deduplicated(existing_id)
+
+    # Store I/O runs off the event loop
+    student_id = await asyncio.to_thread(create_student, {
+        "name": student_name,
+        "email": student_email,
+        "content_hash": digest,
+        **artifacts,
+    })
+
+    return {
+        "student_id": student_id,
+        "message": "Resume processed using AI",
+        "deduplicated": False,
+    }
+
+
+def _deduplicated(student_id: str) -> Dict:
+    return {
+        "student_id": student_id,
+        "message": "Resume already processed",
+        "deduplicated": True,
+    }
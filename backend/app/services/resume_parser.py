@@ -1,8 +1,249 @@
+"""
+Resume PDF text extraction
+==========================
+Pluggable extraction backends, tried in preference order with automatic
+fallback (run `python -m benchmarks.pdf_backends` to compare them):
+
+- pdftotext: poppler's C extractor via subprocess (when installed)
+- pypdf: maintained successor of PyPDF2, handles more malformed files
+- pypdf2: PyPDF2, always available (it is in requirements.txt)
+- pdfminer: pdfminer.six, slowest but best layout fidelity
+
+Set PDF_BACKEND to force one backend (fallback still applies on failure).
+Long documents are split into page ranges extracted concurrently; this only
+pays off for pdftotext, whose work happens outside the GIL.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+import io
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import time
+import logging
+
 import PyPDF2
 
-def extract_text_from_pdf(file):
-    reader = PyPDF2.PdfReader(file)
-    text = ""
+try:
+    import pypdf
+    PYPDF_AVAILABLE = True
+except ImportError:
+    PYPDF_AVAILABLE = False
+
+try:
+    from pdfminer.high_level import extract_pages as pdfminer_layout_pages
+    from pdfminer.layout import LTTextContainer
+    from pdfminer.pdfpage import PDFPage
+    PDFMINER_AVAILABLE = True
+except ImportError:
+    PDFMINER_AVAILABLE = False
+
+PDFTOTEXT_PATH = shutil.which("pdftotext")
+# Ships with pdftotext in poppler-utils; used to count pages without parsing in Python
+PDFINFO_PATH = shutil.which("pdfinfo")
+_PDFINFO_PAGES = re.compile(rb"^Pages:\s+(\d+)", re.MULTILINE)
+
+logger = logging.getLogger(__name__)
+
+PDF_BACKEND = os.getenv("PDF_BACKEND", "auto")
+# Documents with more pages than this are extracted in parallel page ranges
+PARALLEL_PAGE_THRESHOLD = int(os.getenv("PDF_PARALLEL_PAGES", "8"))
+PARALLEL_WORKERS = int(os.getenv("PDF_PARALLEL_WORKERS", "4"))
+
+
+class ResumeLimitExceeded(ValueError):
+    """Raised when a PDF exceeds the page or time budget for parsing."""
+
+
+class _Deadline:
+    """Tracks the per-document time budget across pages."""
+
+    def __init__(self, time_limit: float = None):
+        self.time_limit = time_limit
+        self.started = time.monotonic()
+
+    def check(self):
+        if self.time_limit is not None and time.monotonic() - self.started > self.time_limit:
+            raise ResumeLimitExceeded(f"Resume parsing exceeded {self.time_limit:.0f}s")
+
+    def remaining(self):
+        if self.time_limit is None:
+            return None
+        return max(0.0, self.time_limit - (time.monotonic() - self.started))
+
+
+@contextmanager
+def _open_stream(source):
+    """Yield a seekable binary stream for bytes, a path, or a file object."""
+    if isinstance(source, (bytes, bytearray)):
+        yield io.BytesIO(source)
+    elif isinstance(source, (str, os.PathLike)):
+        # Read lazily from disk: readers pull pages on demand
+        with open(source, "rb") as f:
+            yield f
+    else:
+        yield source
+
+
+def _check_pages(count: int, max_pages: int = None):
+    if max_pages is not None and count > max_pages:
+        raise ResumeLimitExceeded(f"Resume has {count} pages (limit {max_pages})")
+
+
+# ---------------------------------------------------------------------------
+# Backends: (stream, max_pages, deadline) -> list of page texts
+# ---------------------------------------------------------------------------
+
+def _extract_pypdf2(stream, max_pages: int, deadline: _Deadline) -> List[str]:
+    reader = PyPDF2.PdfReader(stream)
+    _check_pages(len(reader.pages), max_pages)
+    pages = []
+    for page in reader.pages:
+        deadline.check()
+        pages.append(page.extract_text() or "")
+    return pages
+
+
+def _extract_pypdf(stream, max_pages: int, deadline: _Deadline) -> List[str]:
+    reader = pypdf.PdfReader(stream)
+    _check_pages(len(reader.pages), max_pages)
+    pages = []
     for page in reader.pages:
-        text += page.extract_text() or ""
-    return text.lower()
+        deadline.check()
+        pages.append(page.extract_text() or "")
+    return pages
+
+
+def _extract_pdfminer(stream, max_pages: int, deadline: _Deadline) -> List[str]:
+    count = sum(1 for _ in PDFPage.get_pages(stream))
+    _check_pages(count, max_pages)
+    stream.seek(0)
+    pages = []
+    for layout in pdfminer_layout_pages(stream):
+        deadline.check()
+        pages.append("".join(
+            element.get_text() for element in layout if isinstance(element, LTTextContainer)
+        ))
+    return pages
+
+
+def _pdftotext_range(path: str, first: int, last: Optional[int], timeout) -> str:
+    """Text of pages first..last (to the end when last is None), each followed by a form feed."""
+    command = [PDFTOTEXT_PATH, "-q", "-enc", "UTF-8", "-f", str(first)]
+    if last is not None:
+        command += ["-l", str(last)]
+    result = subprocess.run(command + [path, "-"], capture_output=True, timeout=timeout, check=True)
+    return result.stdout.decode("utf-8", errors="replace")
+
+
+def _pdfinfo_pages(path: str, timeout) -> Optional[int]:
+    """Page count from pdfinfo, or None when it is not installed."""
+    if not PDFINFO_PATH:
+        return None
+    result = subprocess.run([PDFINFO_PATH, path], capture_output=True, timeout=timeout, check=True)
+    match = _PDFINFO_PAGES.search(result.stdout)
+    return int(match.group(1)) if match else None
+
+
+def _extract_pdftotext(stream, max_pages: int, deadline: _Deadline) -> List[str]:
+    path = getattr(stream, "name", None)
+    if isinstance(path, str) and os.path.isfile(path):
+        return _pdftotext_pages(path, max_pages, deadline)
+    with tempfile.NamedTemporaryFile(suffix=".pdf") as tmp:
+        stream.seek(0)
+        shutil.copyfileobj(stream, tmp)
+        tmp.flush()
+        return _pdftotext_pages(tmp.name, max_pages, deadline)
+
+
+def _pdftotext_pages(path: str, max_pages: int, deadline: _Deadline) -> List[str]:
+    try:
+        count = _pdfinfo_pages(path, deadline.remaining())
+        if count is None:
+            # No page count up front: one pass, stopping a page past the
+            # limit so an oversized document is still caught
+            text = _pdftotext_range(path, 1, max_pages + 1 if max_pages is not None else None, deadline.remaining())
+            pages = text.split("\f")
+            _check_pages(len(pages) - 1, max_pages)
+            return pages
+
+        _check_pages(count, max_pages)
+        if count <= PARALLEL_PAGE_THRESHOLD:
+            text = _pdftotext_range(path, 1, count, deadline.remaining())
+            return text.split("\f")
+
+        # Contiguous page ranges, one pdftotext process each
+        step = -(-count // PARALLEL_WORKERS)
+        ranges = [(first, min(first + step - 1, count)) for first in range(1, count + 1, step)]
+        with ThreadPoolExecutor(max_workers=len(ranges)) as executor:
+            chunks = executor.map(
+                lambda r: _pdftotext_range(path, r[0], r[1], deadline.remaining()),
+                ranges,
+            )
+            return [page for chunk in chunks for page in chunk.split("\f")]
+    except subprocess.TimeoutExpired:
+        raise ResumeLimitExceeded(f"Resume parsing exceeded {deadline.time_limit:.0f}s")
+
+
+# Preference order for "auto"
+BACKENDS: Dict[str, Callable] = {}
+if PDFTOTEXT_PATH:
+    BACKENDS["pdftotext"] = _extract_pdftotext
+if PYPDF_AVAILABLE:
+    BACKENDS["pypdf"] = _extract_pypdf
+BACKENDS["pypdf2"] = _extract_pypdf2
+if PDFMINER_AVAILABLE:
+    BACKENDS["pdfminer"] = _extract_pdfminer
+
+
+def available_backends() -> List[str]:
+    """Names of the extraction backends usable in this environment."""
+    return list(BACKENDS)
+
+
+def _backend_order(backend: str = None) -> List[str]:
+    preferred = backend or PDF_BACKEND
+    order = list(BACKENDS)
+    if preferred in BACKENDS:
+        order.remove(preferred)
+        order.insert(0, preferred)
+    return order
+
+
+def extract_pages(source, max_pages: int = None, time_limit: float = None, backend: str = None) -> List[str]:
+    """
+    Extract per-page text, falling back to the next backend on failure.
+
+    Limit violations are not failures: they propagate immediately.
+    """
+    deadline = _Deadline(time_limit)
+    last_error = None
+    with _open_stream(source) as stream:
+        for name in _backend_order(backend):
+            try:
+                stream.seek(0)
+                return BACKENDS[name](stream, max_pages, deadline)
+            except ResumeLimitExceeded:
+                raise
+            except Exception as e:
+                logger.warning(f"PDF backend '{name}' failed, falling back: {e}")
+                last_error = e
+    raise last_error
+
+
+def extract_text_from_pdf(file, max_pages: int = None, time_limit: float = None, backend: str = None):
+    """
+    Extract lowercased text from a PDF.
+
+    Args:
+        file: Binary file-like object, raw bytes or a path
+        max_pages: Reject documents with more pages than this
+        time_limit: Abort if extraction runs longer than this many seconds
+        backend: Preferred backend name (see BACKENDS)
+    """
+    pages = extract_pages(file, max_pages=max_pages, time_limit=time_limit, backend=backend)
+    return "".join(page.lower() for page in pages)
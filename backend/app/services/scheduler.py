@@ -1,41 +1,227 @@
 """
 Background scheduler for periodic web scraping
-Refreshes job cache every hour
+==============================================
+Runs in every uvicorn worker, but only one of them - the leader, holding
+an flock on SCHEDULER_LOCK_PATH - actually scrapes. The others retry the
+lock every LEADER_RETRY_SECONDS and take over if the leader exits.
+
+The leader refreshes each source on its own interval (SCRAPE_INTERVAL,
+overridden per source with SCRAPE_INTERVALS="Naukri=1800,Internshala=7200")
+and publishes it merged into the shared job snapshot. Every run is
+jittered by up to SCRAPE_JITTER of the interval so sources (and hosts) do
+not fire in lockstep. A failing source backs off exponentially, up to
+SCRAPE_MAX_BACKOFF, and its previous jobs stay in the snapshot meanwhile.
+Snapshots are published with an expiry past the longest interval, so
+request paths keep serving them between runs instead of scraping inline.
+
+Per-source stats (next run, last duration, failures) are written to
+SCHEDULER_STATE_PATH so any worker can serve them.
 """
 
+from datetime import datetime, timedelta
+from typing import Dict
+import json
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+
 from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.triggers.date import DateTrigger
 from apscheduler.triggers.interval import IntervalTrigger
-import logging
-from app.services.web_scraper import scrape_all_jobs
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+from app.services.chat_sessions import evict_idle_sessions
+from app.services.data_store import evict_idle_students
+from app.services.job_snapshot import current_snapshot
+from app.services.shared_snapshot import SNAPSHOT_PATH
+from app.services.web_scraper import SCRAPE_JITTER, SOURCE_INTERVALS, refresh_source
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# First retry after a failure; doubles per consecutive failure
+SCRAPE_RETRY_SECONDS = int(os.getenv("SCRAPE_RETRY_SECONDS", "60"))
+SCRAPE_MAX_BACKOFF = int(os.getenv("SCRAPE_MAX_BACKOFF", str(6 * 3600)))
+LEADER_RETRY_SECONDS = int(os.getenv("LEADER_RETRY_SECONDS", "30"))
+SCHEDULER_LOCK_PATH = os.getenv("SCHEDULER_LOCK_PATH", SNAPSHOT_PATH + ".scheduler")
+SCHEDULER_STATE_PATH = os.getenv("SCHEDULER_STATE_PATH", SNAPSHOT_PATH + ".schedule.json")
+
 scheduler = BackgroundScheduler()
 
+_leader_file = None
+_stats: Dict[str, Dict] = {}
+_stats_lock = threading.Lock()
+
+
+def _jittered(seconds: float) -> float:
+    return seconds * (1 + random.uniform(-SCRAPE_JITTER, SCRAPE_JITTER))
+
+
+def _try_lead() -> bool:
+    """Take the leader lock if nobody holds it. Without fcntl every worker leads."""
+    global _leader_file
+    if _leader_file is not None:
+        return True
+    if not FCNTL_AVAILABLE:
+        _leader_file = True
+        return True
+    os.makedirs(os.path.dirname(os.path.abspath(SCHEDULER_LOCK_PATH)), exist_ok=True)
+    f = open(SCHEDULER_LOCK_PATH, "a")
+    try:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        f.close()
+        return False
+    _leader_file = f
+    return True
+
+
+def _resign():
+    global _leader_file
+    if _leader_file is not None and _leader_file is not True:
+        fcntl.flock(_leader_file.fileno(), fcntl.LOCK_UN)
+        _leader_file.close()
+    _leader_file = None
+
+
+def is_leader() -> bool:
+    return _leader_file is not None
+
+
+def _write_state():
+    state = {"leader_pid": os.getpid(), "updated_at": time.time(), "sources": _stats}
+    directory = os.path.dirname(os.path.abspath(SCHEDULER_STATE_PATH))
+    fd, tmp_path = tempfile.mkstemp(prefix=".schedule-", dir=directory)
+    with os.fdopen(fd, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, SCHEDULER_STATE_PATH)
+
+
+def _schedule_source(name: str, delay: float):
+    run_at = datetime.now() + timedelta(seconds=delay)
+    scheduler.add_job(
+        _run_source,
+        DateTrigger(run_date=run_at),
+        args=[name],
+        id=f"scrape:{name}",
+        name=f"Scrape {name}",
+        replace_existing=True,
+    )
+    _stats[name]["next_run"] = run_at.isoformat()
+
+
+def _run_source(name: str):
+    """Refresh one source, then schedule its next run (backing off on failure)."""
+    started = time.monotonic()
+    try:
+        jobs, error = refresh_source(name), None
+    except Exception as e:
+        jobs, error = None, e
+    duration = time.monotonic() - started
+
+    with _stats_lock:
+        stats = _stats[name]
+        if error is None:
+            stats.update(last_jobs=jobs, failures=0, last_error=None)
+            delay = _jittered(stats["interval"])
+        else:
+            stats["failures"] += 1
+            stats["last_error"] = str(error)
+            delay = _jittered(min(SCRAPE_RETRY_SECONDS * 2 ** (stats["failures"] - 1), SCRAPE_MAX_BACKOFF))
+            logger.warning(f"Scrape of {name} failed ({stats['failures']} in a row), retrying in {delay:.0f}s: {error}")
+        stats["last_run"] = datetime.now().isoformat()
+        stats["last_duration"] = round(duration, 3)
+        _schedule_source(name, delay)
+        _write_state()
+
+
+def _start_leading():
+    """Schedule every source, starting each when its jobs in the snapshot go stale."""
+    snapshot = current_snapshot(sync=True)
+    age = time.time() - snapshot.created_at if snapshot.version else None
+    with _stats_lock:
+        for name, interval in SOURCE_INTERVALS.items():
+            _stats[name] = {
+                "interval": interval,
+                "next_run": None,
+                "last_run": None,
+                "last_duration": None,
+                "last_jobs": None,
+                "failures": 0,
+                "last_error": None,
+            }
+            # A just-published snapshot (e.g. the startup pre-warm) is not scraped again
+            due = interval - age if age is not None else 0
+            _schedule_source(name, max(due, 0) + random.uniform(0, SCRAPE_JITTER * interval))
+        _write_state()
+
+    # Drop (or archive) students idle past STUDENT_IDLE_TTL
+    scheduler.add_job(
+        evict_idle_students,
+        IntervalTrigger(hours=24),
+        id='student_eviction',
+        name='Daily idle student eviction',
+        replace_existing=True
+    )
+    # Chat sessions idle past CHAT_SESSION_TTL (redis expires them itself)
+    scheduler.add_job(
+        evict_idle_sessions,
+        IntervalTrigger(hours=24),
+        id='chat_session_eviction',
+        name='Daily idle chat session eviction',
+        replace_existing=True
+    )
+    logger.info(f"✓ Scheduler leader elected (pid {os.getpid()}), refreshing {len(SOURCE_INTERVALS)} sources")
+
+
+def _elect():
+    if not is_leader() and _try_lead():
+        scheduler.remove_job('leader_election')
+        _start_leading()
+
 
 def schedule_scraper():
-    """Start background scraper scheduler"""
+    """Start the scheduler; this worker scrapes only if it wins (or later takes over) the leader lock"""
     if not scheduler.running:
-        # Scrape every hour
+        scheduler.start()
         scheduler.add_job(
-            scrape_all_jobs,
-            IntervalTrigger(hours=1),
-            id='job_scraper',
-            name='Hourly job scraper',
+            _elect,
+            IntervalTrigger(seconds=LEADER_RETRY_SECONDS),
+            id='leader_election',
+            name='Scheduler leader election',
+            next_run_time=datetime.now(),
             replace_existing=True
         )
-        scheduler.start()
-        logger.info("✓ Job scraper scheduler started (hourly refresh)")
+        logger.info("✓ Job scraper scheduler started")
 
 
 def stop_scraper():
     """Stop the scheduler"""
     if scheduler.running:
         scheduler.shutdown()
+        _resign()
         logger.info("✓ Job scraper scheduler stopped")
 
 
+def get_schedule_stats() -> Dict:
+    """Per-source refresh stats as last written by the leader (any worker can serve them)."""
+    try:
+        with open(SCHEDULER_STATE_PATH) as f:
+            state = json.load(f)
+    except (FileNotFoundError, ValueError):
+        state = {"leader_pid": None, "updated_at": None, "sources": {}}
+    state["is_leader"] = is_leader()
+    return state
+
+
 def get_scheduler():
     """Get scheduler instance"""
     return scheduler
@@ -0,0 +1,266 @@
+"""
+SerpAPI record / replay
+=======================
+Captures raw upstream responses to disk and serves them back, so the
+scrape and recommendation pipeline can be exercised offline without
+spending SerpAPI quota.
+
+Selected with SERPAPI_MODE:
+
+- live (default): plain requests to SERPAPI_BASE
+- record: live requests, every response also written to the cassette
+- replay: no network; responses come from the cassette, shaped by a
+  latency/error profile (SERPAPI_REPLAY_PROFILE)
+
+The cassette (SERPAPI_CASSETTE_DIR) is content-addressed:
+
+    index/<request key>.json   status, content type and body digest
+    blobs/<digest[:2]>/<digest>  raw response body
+
+The request key is the sha256 of the method, URL path and sorted query
+parameters with api_key removed, so recordings never contain the key and
+the same query always maps to the same file whichever host serves it.
+Identical bodies are stored once.
+
+benchmarks/serpapi_server.py serves a cassette over HTTP for tools that
+cannot use the in-process transport (point SERPAPI_BASE at it).
+"""
+
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+import hashlib
+import json
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+SERPAPI_MODE = os.getenv("SERPAPI_MODE", "live")
+SERPAPI_CASSETTE_DIR = os.getenv(
+    "SERPAPI_CASSETTE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "serpapi_cassette"),
+)
+SERPAPI_REPLAY_PROFILE = os.getenv("SERPAPI_REPLAY_PROFILE", "instant")
+
+# Never part of a request key or a recording
+SECRET_PARAMS = {"api_key"}
+
+
+@dataclass(frozen=True)
+class ReplayProfile:
+    """How replayed responses are delayed and degraded."""
+    latency: float = 0.0      # mean seconds per response
+    jitter: float = 0.0       # +/- seconds, uniform around latency
+    error_rate: float = 0.0   # share of responses replaced by error_status
+    error_status: int = 503
+    timeout_rate: float = 0.0  # share of requests that hang until the client timeout
+    seed: int = 0
+
+    def delay(self, rng: random.Random) -> float:
+        return max(0.0, self.latency + rng.uniform(-self.jitter, self.jitter))
+
+
+PROFILES = {
+    "instant": ReplayProfile(),
+    "realistic": ReplayProfile(latency=0.8, jitter=0.4, error_rate=0.01),
+    "flaky": ReplayProfile(latency=1.5, jitter=1.0, error_rate=0.1, timeout_rate=0.02),
+}
+
+
+def parse_profile(spec: str) -> ReplayProfile:
+    """A named profile, optionally followed by overrides: "flaky,error_rate=0.3,seed=7"."""
+    parts = [part.strip() for part in spec.split(",") if part.strip()]
+    base = PROFILES["instant"]
+    if parts and "=" not in parts[0]:
+        name = parts.pop(0)
+        if name not in PROFILES:
+            raise ValueError(f"Unknown replay profile '{name}' (choose from {', '.join(PROFILES)})")
+        base = PROFILES[name]
+    overrides = {}
+    for part in parts:
+        key, _, value = part.partition("=")
+        if key not in ReplayProfile.__dataclass_fields__:
+            raise ValueError(f"Unknown replay profile setting '{key}'")
+        overrides[key] = int(value) if key in ("error_status", "seed") else float(value)
+    return ReplayProfile(**{**base.__dict__, **overrides})
+
+
+def request_key(method: str, url: str) -> str:
+    """Stable content address of a request, ignoring secrets and parameter order."""
+    parts = urlsplit(url)
+    params = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k not in SECRET_PARAMS)
+    canonical = json.dumps([method.upper(), parts.path, params])
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    """On-disk store of recorded responses, keyed by request_key()."""
+
+    def __init__(self, directory: str = SERPAPI_CASSETTE_DIR):
+        self.directory = directory
+
+    def _index_path(self, key: str) -> str:
+        return os.path.join(self.directory, "index", f"{key}.json")
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.directory, "blobs", digest[:2], digest)
+
+    @staticmethod
+    def _write_atomic(path: str, data: bytes):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def put(self, key: str, status: int, content_type: str, body: bytes, meta: Dict = None):
+        digest = hashlib.sha256(body).hexdigest()
+        blob = self._blob_path(digest)
+        if not os.path.exists(blob):
+            self._write_atomic(blob, body)
+        entry = {"status": status, "content_type": content_type, "body": digest, **(meta or {})}
+        self._write_atomic(self._index_path(key), json.dumps(entry, indent=2).encode("utf-8"))
+
+    def get(self, key: str) -> Optional[Tuple[int, str, bytes]]:
+        try:
+            with open(self._index_path(key)) as f:
+                entry = json.load(f)
+            with open(self._blob_path(entry["body"]), "rb") as f:
+                return entry["status"], entry["content_type"], f.read()
+        except FileNotFoundError:
+            return None
+
+    def __len__(self) -> int:
+        index = os.path.join(self.directory, "index")
+        return len(os.listdir(index)) if os.path.isdir(index) else 0
+
+
+def _build_response(request, status: int, content_type: str, body: bytes) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status
+    response.headers["Content-Type"] = content_type
+    response._content = body
+    response.url = request.url
+    response.request = request
+    response.encoding = "utf-8"
+    return response
+
+
+class RecordingAdapter(HTTPAdapter):
+    """Live transport that also writes every response to a cassette."""
+
+    def __init__(self, cassette: Cassette, **kwargs):
+        super().__init__(**kwargs)
+        self.cassette = cassette
+
+    def send(self, request, **kwargs):
+        response = super().send(request, **kwargs)
+        try:
+            query = urlsplit(request.url).query
+            meta = {"params": {k: v for k, v in parse_qsl(query) if k not in SECRET_PARAMS}}
+            self.cassette.put(
+                request_key(request.method, request.url),
+                response.status_code,
+                response.headers.get("Content-Type", "application/json"),
+                response.content,
+                meta,
+            )
+        except OSError as e:
+            logger.warning(f"Could not record upstream response: {e}")
+        return response
+
+
+class ReplayAdapter(BaseAdapter):
+    """
+    Offline transport serving cassette responses under a ReplayProfile.
+
+    Delays and injected failures come from an RNG seeded by the profile
+    seed, the request key and how often that request has been seen, so a
+    run is reproducible regardless of thread scheduling. Unrecorded
+    requests get a 404, or whatever fallback(params) returns as JSON.
+    """
+
+    def __init__(
+        self,
+        cassette: Cassette,
+        profile: ReplayProfile = PROFILES["instant"],
+        fallback: Callable[[Dict], Dict] = None,
+    ):
+        super().__init__()
+        self.cassette = cassette
+        self.profile = profile
+        self.fallback = fallback
+        self._seen: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.served = 0
+        self.misses = 0
+        self.injected_errors = 0
+
+    def _rng(self, key: str) -> random.Random:
+        with self._lock:
+            count = self._seen.get(key, 0)
+            self._seen[key] = count + 1
+        return random.Random(f"{self.profile.seed}:{key}:{count}")
+
+    def respond(self, method: str, url: str, timeout: float = None) -> Tuple[int, str, bytes]:
+        """Recorded (or fallback) status, content type and body for a request, with the profile applied."""
+        key = request_key(method, url)
+        rng = self._rng(key)
+
+        if rng.random() < self.profile.timeout_rate:
+            time.sleep(timeout if timeout is not None else 30)
+            raise requests.exceptions.ReadTimeout(f"Replay timeout for {url}")
+        time.sleep(self.profile.delay(rng))
+        if rng.random() < self.profile.error_rate:
+            self.injected_errors += 1
+            return self.profile.error_status, "application/json", b'{"error": "Injected replay error"}'
+
+        recorded = self.cassette.get(key)
+        if recorded is not None:
+            self.served += 1
+            return recorded
+        self.misses += 1
+        if self.fallback is not None:
+            params = dict(parse_qsl(urlsplit(url).query))
+            return 200, "application/json", json.dumps(self.fallback(params)).encode("utf-8")
+        return 404, "application/json", b'{"error": "Not in cassette"}'
+
+    def send(self, request, timeout=None, **kwargs):
+        if isinstance(timeout, tuple):
+            timeout = timeout[-1]
+        status, content_type, body = self.respond(request.method, request.url, timeout)
+        return _build_response(request, status, content_type, body)
+
+    def close(self):
+        pass
+
+
+def build_session(
+    mode: str = SERPAPI_MODE,
+    cassette_dir: str = SERPAPI_CASSETTE_DIR,
+    profile: str = SERPAPI_REPLAY_PROFILE,
+    fallback: Callable[[Dict], Dict] = None,
+) -> requests.Session:
+    """A requests session wired for live, record or replay mode."""
+    session = requests.Session()
+    if mode == "record":
+        adapter = RecordingAdapter(Cassette(cassette_dir))
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        logger.info(f"⏺ Recording upstream responses to {cassette_dir}")
+    elif mode == "replay":
+        adapter = ReplayAdapter(Cassette(cassette_dir), parse_profile(profile), fallback)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        logger.info(f"⏵ Replaying upstream responses from {cassette_dir} ({profile})")
+    elif mode != "live":
+        logger.warning(f"Unknown SERPAPI_MODE '{mode}', using live")
+    return session
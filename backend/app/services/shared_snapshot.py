@@ -0,0 +1,201 @@
+"""
+Shared job snapshot file
+========================
+Lets every uvicorn worker on a host serve the same job snapshot from one
+memory-mapped file instead of each scraping and holding its own copy.
+
+Layout (little-endian):
+
+    header   magic, version, created_at, expires_in, payload length,
+             matrix offset, matrix rows, matrix cols
+    payload  JSON: {"jobs": [...], "skills": [[column, ...], ...], "sources": [...]}
+    matrix   float32 job x skill matrix, 64-byte aligned (absent without numpy)
+
+The file is written to a temp name and renamed over the old one, so a
+reader always maps one complete version. Workers keep their old mapping
+until they pick up the new file; the skill matrix is used in place as a
+read-only numpy view, so its pages are shared between processes.
+
+Refreshes are serialised across processes with an advisory lock on
+SNAPSHOT_PATH + ".lock": whoever holds it scrapes and publishes, the
+others wait and then adopt the file.
+
+SNAPSHOT_SHARE=off keeps snapshots process-local.
+"""
+
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Sequence
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_SHARE = os.getenv("SNAPSHOT_SHARE", "file") != "off"
+# /dev/shm keeps the file in memory where available
+SNAPSHOT_PATH = os.getenv(
+    "SNAPSHOT_PATH",
+    os.path.join("/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir(), "aibir-jobs.snapshot"),
+)
+# How often a worker stats the file for a newer version
+SNAPSHOT_POLL_SECONDS = float(os.getenv("SNAPSHOT_POLL_SECONDS", "1"))
+
+MAGIC = b"AIBJ"
+HEADER = struct.Struct("<4sQddQQQQ")
+ALIGN = 64
+
+
+def write_snapshot_file(
+    version: int,
+    created_at: float,
+    expires_in: int,
+    jobs: Sequence[Dict],
+    skill_columns: Sequence[Sequence[int]],
+    sources: Sequence[str],
+    matrix=None,
+    path: str = SNAPSHOT_PATH,
+):
+    """Atomically replace the shared snapshot file."""
+    payload = json.dumps(
+        {"jobs": list(jobs), "skills": [list(c) for c in skill_columns], "sources": list(sources)},
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+    matrix_offset, rows, cols = 0, 0, 0
+    if matrix is not None:
+        rows, cols = matrix.shape
+        matrix_offset = -(-(HEADER.size + len(payload)) // ALIGN) * ALIGN
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".snapshot-", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(HEADER.pack(MAGIC, version, created_at, expires_in, len(payload), matrix_offset, rows, cols))
+            f.write(payload)
+            if matrix is not None:
+                f.write(b"\0" * (matrix_offset - HEADER.size - len(payload)))
+                f.write(np.ascontiguousarray(matrix, dtype=np.float32).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def _read_version(path: str) -> int:
+    try:
+        with open(path, "rb") as f:
+            header = f.read(HEADER.size)
+    except FileNotFoundError:
+        return 0
+    if len(header) < HEADER.size or header[:4] != MAGIC:
+        return 0
+    return HEADER.unpack(header)[1]
+
+
+class SnapshotFileReader:
+    """Maps the shared snapshot file and decodes versions newer than the caller's."""
+
+    def __init__(self, path: str = SNAPSHOT_PATH):
+        self.path = path
+        self._inode = None
+        self._last_poll = 0.0
+        self._lock = threading.Lock()
+
+    def latest_version(self) -> int:
+        return _read_version(self.path)
+
+    def poll(self, known_version: int, force: bool = False) -> Optional[Dict]:
+        """
+        Return the file's snapshot as a dict if it is newer than known_version.
+
+        Stats the file at most once per SNAPSHOT_POLL_SECONDS unless forced.
+        The dict holds version, created_at, expires_in, jobs, skills (column
+        index lists), sources and matrix (a read-only view, or None).
+        """
+        now = time.monotonic()
+        if not force and now - self._last_poll < SNAPSHOT_POLL_SECONDS:
+            return None
+        with self._lock:
+            self._last_poll = now
+            try:
+                stat = os.stat(self.path)
+            except FileNotFoundError:
+                return None
+            if (stat.st_ino, stat.st_mtime_ns) == self._inode:
+                return None
+
+            with open(self.path, "rb") as f:
+                if stat.st_size < HEADER.size:
+                    return None
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+            magic, version, created_at, expires_in, length, offset, rows, cols = HEADER.unpack_from(mapped)
+            if magic != MAGIC:
+                logger.warning(f"Ignoring unrecognised snapshot file {self.path}")
+                return None
+            self._inode = (stat.st_ino, stat.st_mtime_ns)
+            if version <= known_version:
+                return None
+
+            data = json.loads(mapped[HEADER.size:HEADER.size + length])
+            matrix = None
+            if offset and NUMPY_AVAILABLE:
+                # The view keeps the mapping alive for as long as the snapshot uses it
+                matrix = np.frombuffer(mapped, dtype=np.float32, count=rows * cols, offset=offset).reshape(rows, cols)
+            return {
+                "version": version,
+                "created_at": created_at,
+                "expires_in": int(expires_in),
+                "jobs": data["jobs"],
+                "skills": data["skills"],
+                "sources": data["sources"],
+                "matrix": matrix,
+            }
+
+
+@contextmanager
+def refresh_lock(blocking: bool = True, path: str = SNAPSHOT_PATH) -> Iterator[bool]:
+    """
+    Cross-process refresh lock. Yields whether it was acquired.
+
+    Without fcntl (or with sharing off) there is nothing to coordinate
+    with, so it always succeeds.
+    """
+    if not (SNAPSHOT_SHARE and FCNTL_AVAILABLE):
+        yield True
+        return
+
+    lock_path = path + ".lock"
+    os.makedirs(os.path.dirname(os.path.abspath(lock_path)), exist_ok=True)
+    with open(lock_path, "a") as f:
+        flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+        try:
+            fcntl.flock(f.fileno(), flags)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
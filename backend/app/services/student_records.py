@@ -0,0 +1,103 @@
+"""
+Compact student records
+=======================
+Student records keep the resume text compressed (zstd with the
+zstandard package from requirements.txt; zlib when it is missing).
+Detected skills are packed into an int bitset over the shared skill
+vocabulary, and the skills the email / cover-letter templates quote are
+stored alongside. Everything downstream (ranking, search queries, email
+and cover-letter drafts) reads these instead of re-scanning the text; the
+raw text is only decompressed on demand.
+
+Record layout:
+    name, email, content_hash   as given at upload
+    resume_z                    base64 of the compressed resume text
+    codec                       "zstd" or "zlib"
+    skill_bits                  hex string bitset over SKILL_COLUMNS
+    draft_skills                skills for email / cover-letter drafts
+                                (the generator's own, smaller vocabulary)
+    profile                     structured profile (contacts, links, word count)
+
+When a student was last read is tracked by the repository itself (see
+student_repository.evict_idle), not in the record.
+"""
+
+from typing import Dict, List
+import base64
+import zlib
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+    _compressor = zstandard.ZstdCompressor(level=10)
+    _decompressor = zstandard.ZstdDecompressor()
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+from app.core.ml_engine import extract_skills_from_text
+from app.core.scoring import SKILL_COLUMNS, skill_mask
+from app.services.email_cover_letter_generator import extract_skills_from_resume
+
+
+def compress_text(text: str) -> Dict[str, str]:
+    raw = text.encode("utf-8")
+    if ZSTD_AVAILABLE:
+        codec, packed = "zstd", _compressor.compress(raw)
+    else:
+        codec, packed = "zlib", zlib.compress(raw, 9)
+    return {"codec": codec, "resume_z": base64.b64encode(packed).decode("ascii")}
+
+
+def decompress_text(record: Dict) -> str:
+    packed = base64.b64decode(record["resume_z"])
+    if record.get("codec") == "zstd":
+        if not ZSTD_AVAILABLE:
+            raise RuntimeError("Record is zstd-compressed: pip install zstandard")
+        return _decompressor.decompress(packed).decode("utf-8")
+    return zlib.decompress(packed).decode("utf-8")
+
+
+def skills_from_bits(bits: int) -> List[str]:
+    """Unpack a skill bitset into skill names, in vocabulary order."""
+    return [skill for i, skill in enumerate(SKILL_COLUMNS) if bits >> i & 1]
+
+
+def compact_artifacts(text: str, profile: Dict) -> Dict:
+    """Everything kept per resume content, in compact form."""
+    skills = profile.get("skills")
+    if skills is None:
+        skills = extract_skills_from_text(text)
+    return {
+        **compress_text(text),
+        "skill_bits": format(skill_mask(skills), "x"),
+        "draft_skills": extract_skills_from_resume(text),
+        "profile": {k: v for k, v in profile.items() if k != "skills"},
+    }
+
+
+def record_skills(record: Dict) -> List[str]:
+    """Skills of a student record, without touching the resume text."""
+    if "skill_bits" in record:
+        return skills_from_bits(int(record["skill_bits"], 16))
+    # Records written before compaction
+    return extract_skills_from_text(record.get("resume_text", ""))
+
+
+def record_draft_skills(record: Dict) -> List[str]:
+    """Skills for email / cover-letter drafts, without touching the resume text when stored."""
+    if "draft_skills" in record:
+        return record["draft_skills"]
+    # Records written before draft skills were stored
+    return extract_skills_from_resume(record_text(record))
+
+
+def record_text(record: Dict) -> str:
+    """Full resume text of a student record (decompressed on demand)."""
+    if "resume_z" in record:
+        return decompress_text(record)
+    return record.get("resume_text", "")
+
+
+def record_profile(record: Dict) -> Dict:
+    """Structured profile with skills filled back in from the bitset."""
+    return {**record.get("profile", {}), "skills": record_skills(record)}
@@ -0,0 +1,393 @@
+"""
+Student repositories
+====================
+Pluggable storage for student records, selected with STUDENT_STORE:
+
+- sqlite (default): a WAL-mode SQLite file shared by every uvicorn worker
+  on the host. Lookups go through the primary key or the
+  (content_hash, email) index. Concurrent inserts are group-committed: one
+  writer thread commits whatever is queued in a single transaction, and
+  each caller returns once its row is durable, so a student can upload on
+  one worker and fetch recommendations from another straight away.
+- redis: any redis-py compatible client (REDIS_URL), for multi-host setups.
+  Writes for a batch go out in one pipeline.
+- memory: process-local dict, the old behaviour; handy for tests and as a
+  stand-in when nothing else is configured.
+
+Uploads are deduplicated on (content hash, email, name): the same PDF
+under the same email but another name is a different student, not a
+re-upload, so the two are never merged. Names are compared ignoring case
+and spacing.
+
+Every store tracks when each student was last read. evict_idle() drops
+students idle for longer than STUDENT_IDLE_TTL, first appending them to a
+gzipped JSONL file under STUDENT_ARCHIVE_DIR when one is configured.
+"""
+
+from abc import ABC, abstractmethod
+from typing import Dict, Iterator, List, Optional, Tuple
+import gzip
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+STUDENT_STORE = os.getenv("STUDENT_STORE", "sqlite")
+STUDENT_DB_PATH = os.getenv(
+    "STUDENT_DB_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "students.db"),
+)
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+# Most rows committed in one transaction by the SQLite writer
+WRITE_BATCH_SIZE = 256
+# Students not read for this long are evicted (0 disables eviction)
+STUDENT_IDLE_TTL = int(os.getenv("STUDENT_IDLE_TTL", str(30 * 24 * 3600)))
+# Evicted records are appended here first; empty means discard
+STUDENT_ARCHIVE_DIR = os.getenv("STUDENT_ARCHIVE_DIR", "")
+# last_seen is only rewritten when older than this, so reads stay reads
+TOUCH_INTERVAL = int(os.getenv("STUDENT_TOUCH_INTERVAL", "3600"))
+
+
+def name_key(name: Optional[str]) -> str:
+    """Name as compared for dedup: case- and whitespace-insensitive."""
+    return " ".join((name or "").split()).casefold()
+
+
+def archive_records(records: List[Tuple[str, Dict]], archive_dir: str) -> str:
+    """Append (student_id, record) pairs to a gzipped JSONL file in archive_dir."""
+    os.makedirs(archive_dir, exist_ok=True)
+    path = os.path.join(archive_dir, f"students-{time.strftime('%Y%m%d')}.jsonl.gz")
+    with gzip.open(path, "at", encoding="utf-8") as f:
+        for student_id, record in records:
+            f.write(json.dumps({"id": student_id, **record}) + "\n")
+    return path
+
+
+class StudentRepository(ABC):
+    """Interface shared by all student stores."""
+
+    def create(self, profile: Dict) -> str:
+        return self.create_many([profile])[0]
+
+    @abstractmethod
+    def create_many(self, profiles: List[Dict]) -> List[str]:
+        ...
+
+    @abstractmethod
+    def get(self, student_id: str) -> Optional[Dict]:
+        ...
+
+    @abstractmethod
+    def find_by_content(self, content_hash: str, email: str, name: str) -> Optional[str]:
+        """The student who uploaded this content under this email and name, if any."""
+
+    @abstractmethod
+    def iter_all(self) -> Iterator[Tuple[str, Dict]]:
+        ...
+
+    @abstractmethod
+    def count(self) -> int:
+        ...
+
+    @abstractmethod
+    def evict_idle(self, max_idle: float, archive_dir: str = None) -> int:
+        """Remove students not read for max_idle seconds; returns how many."""
+
+
+class MemoryStudentRepository(StudentRepository):
+    """Process-local store. Not shared between workers."""
+
+    def __init__(self):
+        self._students: Dict[str, Dict] = {}
+        self._by_content: Dict[Tuple[str, str, str], str] = {}
+        self._last_seen: Dict[str, float] = {}
+
+    def create_many(self, profiles):
+        ids = []
+        now = time.time()
+        for profile in profiles:
+            student_id = str(uuid.uuid4())
+            self._students[student_id] = profile
+            self._last_seen[student_id] = now
+            if profile.get("content_hash"):
+                self._by_content[self._content_key(profile)] = student_id
+            ids.append(student_id)
+        return ids
+
+    @staticmethod
+    def _content_key(profile: Dict) -> Tuple[str, str, str]:
+        return profile.get("content_hash"), profile.get("email"), name_key(profile.get("name"))
+
+    def get(self, student_id):
+        student = self._students.get(student_id)
+        if student is not None:
+            self._last_seen[student_id] = time.time()
+        return student
+
+    def find_by_content(self, content_hash, email, name):
+        return self._by_content.get((content_hash, email, name_key(name)))
+
+    def iter_all(self):
+        return iter(list(self._students.items()))
+
+    def count(self):
+        return len(self._students)
+
+    def evict_idle(self, max_idle, archive_dir=None):
+        cutoff = time.time() - max_idle
+        idle = [sid for sid, seen in list(self._last_seen.items()) if seen < cutoff]
+        if archive_dir and idle:
+            archive_records([(sid, self._students[sid]) for sid in idle], archive_dir)
+        for student_id in idle:
+            profile = self._students.pop(student_id)
+            self._last_seen.pop(student_id, None)
+            self._by_content.pop(self._content_key(profile), None)
+        return len(idle)
+
+
+class SQLiteStudentRepository(StudentRepository):
+    """WAL-mode SQLite store with group-committed writes."""
+
+    def __init__(self, path: str = STUDENT_DB_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._local = threading.local()
+        self._writes: "queue.Queue" = queue.Queue()
+        self._writer_lock = threading.Lock()
+        self._writer: Optional[threading.Thread] = None
+
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS students (
+                id TEXT PRIMARY KEY,
+                email TEXT,
+                content_hash TEXT,
+                created_at REAL NOT NULL,
+                data TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_students_content ON students (content_hash, email);
+        """)
+        # Databases created before idle eviction lack last_seen
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(students)")}
+        if "last_seen" not in columns:
+            conn.execute("ALTER TABLE students ADD COLUMN last_seen REAL")
+            conn.execute("UPDATE students SET last_seen = created_at")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_students_last_seen ON students (last_seen)")
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    def _ensure_writer(self):
+        with self._writer_lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._write_loop, name="student-writer", daemon=True)
+                self._writer.start()
+
+    def _write_loop(self):
+        conn = self._connection()
+        while True:
+            batch = [self._writes.get()]
+            while len(batch) < WRITE_BATCH_SIZE:
+                try:
+                    batch.append(self._writes.get_nowait())
+                except queue.Empty:
+                    break
+
+            rows = [row for rows, _ in batch for row in rows]
+            error = None
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.executemany(
+                    "INSERT INTO students (id, email, content_hash, created_at, last_seen, data) VALUES (?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+                conn.execute("COMMIT")
+            except Exception as e:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                logger.error(f"Student write failed: {e}")
+                error = e
+            for _, waiter in batch:
+                waiter["error"] = error
+                waiter["done"].set()
+
+    def create_many(self, profiles):
+        now = time.time()
+        rows = []
+        ids = []
+        for profile in profiles:
+            student_id = str(uuid.uuid4())
+            rows.append((student_id, profile.get("email"), profile.get("content_hash"), now, now, json.dumps(profile)))
+            ids.append(student_id)
+
+        # Hand the rows to the writer and wait until they are committed
+        waiter = {"done": threading.Event(), "error": None}
+        self._ensure_writer()
+        self._writes.put((rows, waiter))
+        waiter["done"].wait()
+        if waiter["error"] is not None:
+            raise waiter["error"]
+        return ids
+
+    def get(self, student_id):
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT data, last_seen FROM students WHERE id = ?", (student_id,)
+        ).fetchone()
+        if not row:
+            return None
+        now = time.time()
+        if (row[1] or 0) < now - TOUCH_INTERVAL:
+            conn.execute("UPDATE students SET last_seen = ? WHERE id = ?", (now, student_id))
+        return json.loads(row[0])
+
+    def find_by_content(self, content_hash, email, name):
+        # The index narrows to (content_hash, email); names are compared here
+        rows = self._connection().execute(
+            "SELECT id, data FROM students WHERE content_hash = ? AND email = ? ORDER BY created_at",
+            (content_hash, email),
+        )
+        wanted = name_key(name)
+        for student_id, data in rows:
+            if name_key(json.loads(data).get("name")) == wanted:
+                return student_id
+        return None
+
+    def iter_all(self):
+        cursor = self._connection().execute("SELECT id, data FROM students ORDER BY created_at")
+        for student_id, data in cursor:
+            yield student_id, json.loads(data)
+
+    def count(self):
+        return self._connection().execute("SELECT COUNT(*) FROM students").fetchone()[0]
+
+    def evict_idle(self, max_idle, archive_dir=None):
+        conn = self._connection()
+        cutoff = time.time() - max_idle
+        evicted = 0
+        while True:
+            rows = conn.execute(
+                "SELECT id, data FROM students WHERE last_seen < ? LIMIT ?",
+                (cutoff, WRITE_BATCH_SIZE),
+            ).fetchall()
+            if not rows:
+                return evicted
+            if archive_dir:
+                archive_records([(sid, json.loads(data)) for sid, data in rows], archive_dir)
+            conn.executemany("DELETE FROM students WHERE id = ?", [(sid,) for sid, _ in rows])
+            evicted += len(rows)
+
+
+class RedisStudentRepository(StudentRepository):
+    """Store backed by a redis-py compatible client."""
+
+    PREFIX = "aibir:student:"
+    CONTENT_PREFIX = "aibir:student_content:"
+    INDEX_KEY = "aibir:students"
+    SEEN_KEY = "aibir:student_seen"
+
+    def __init__(self, client=None, url: str = REDIS_URL):
+        if client is None:
+            if not REDIS_AVAILABLE:
+                raise RuntimeError("STUDENT_STORE=redis needs the redis package: pip install redis")
+            client = redis.Redis.from_url(url)
+        self.client = client
+
+    def _content_key(self, content_hash, email, name):
+        return f"{self.CONTENT_PREFIX}{content_hash}:{email}:{name_key(name)}"
+
+    def create_many(self, profiles):
+        ids = []
+        pipe = self.client.pipeline()
+        for profile in profiles:
+            student_id = str(uuid.uuid4())
+            pipe.set(self.PREFIX + student_id, json.dumps(profile))
+            pipe.rpush(self.INDEX_KEY, student_id)
+            pipe.zadd(self.SEEN_KEY, {student_id: time.time()})
+            if profile.get("content_hash"):
+                pipe.set(self._content_key(profile["content_hash"], profile.get("email"), profile.get("name")), student_id)
+            ids.append(student_id)
+        pipe.execute()
+        return ids
+
+    def get(self, student_id):
+        pipe = self.client.pipeline()
+        pipe.get(self.PREFIX + student_id)
+        pipe.zadd(self.SEEN_KEY, {student_id: time.time()}, xx=True)
+        data, _ = pipe.execute()
+        return json.loads(data) if data else None
+
+    def find_by_content(self, content_hash, email, name):
+        student_id = self.client.get(self._content_key(content_hash, email, name))
+        if isinstance(student_id, bytes):
+            student_id = student_id.decode()
+        return student_id
+
+    def iter_all(self):
+        ids = [i.decode() if isinstance(i, bytes) else i for i in self.client.lrange(self.INDEX_KEY, 0, -1)]
+        for start in range(0, len(ids), WRITE_BATCH_SIZE):
+            chunk = ids[start:start + WRITE_BATCH_SIZE]
+            for student_id, data in zip(chunk, self.client.mget([self.PREFIX + i for i in chunk])):
+                if data:
+                    yield student_id, json.loads(data)
+
+    def count(self):
+        return self.client.llen(self.INDEX_KEY)
+
+    def evict_idle(self, max_idle, archive_dir=None):
+        cutoff = time.time() - max_idle
+        idle = [
+            i.decode() if isinstance(i, bytes) else i
+            for i in self.client.zrangebyscore(self.SEEN_KEY, "-inf", cutoff)
+        ]
+        for start in range(0, len(idle), WRITE_BATCH_SIZE):
+            chunk = idle[start:start + WRITE_BATCH_SIZE]
+            records = [
+                (student_id, json.loads(data))
+                for student_id, data in zip(chunk, self.client.mget([self.PREFIX + i for i in chunk]))
+                if data
+            ]
+            if archive_dir and records:
+                archive_records(records, archive_dir)
+
+            pipe = self.client.pipeline()
+            for student_id, record in records:
+                if record.get("content_hash"):
+                    pipe.delete(self._content_key(record["content_hash"], record.get("email"), record.get("name")))
+            for student_id in chunk:
+                pipe.delete(self.PREFIX + student_id)
+                pipe.lrem(self.INDEX_KEY, 0, student_id)
+            pipe.zrem(self.SEEN_KEY, *chunk)
+            pipe.execute()
+        return len(idle)
+
+
+def create_repository(kind: str = STUDENT_STORE) -> StudentRepository:
+    """Build the repository named by STUDENT_STORE."""
+    if kind == "memory":
+        return MemoryStudentRepository()
+    if kind == "redis":
+        return RedisStudentRepository()
+    if kind != "sqlite":
+        logger.warning(f"Unknown STUDENT_STORE '{kind}', using sqlite")
+    return SQLiteStudentRepository()
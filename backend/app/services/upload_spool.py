@@ -0,0 +1,158 @@
+"""
+Memory-bounded upload spooling
+==============================
+Streams an UploadFile in fixed-size chunks, hashing as it goes. Small
+uploads stay in memory; anything past RESUME_SPOOL_BYTES is written to a
+named temporary file on disk and handed to the parser by path (the parse
+pool runs in other processes, so Starlette's anonymous spool file cannot
+be passed on). The copy runs in a worker thread, off the event loop.
+
+Size limits are enforced on the request stream by UploadSizeLimit, before
+Starlette buffers the multipart body: a Content-Length over the limit is
+refused outright and a chunked body is cut off once it passes it. The
+spooler then checks each file against RESUME_MAX_BYTES exactly.
+
+Peak memory per upload is therefore about max(chunk, spool threshold),
+independent of file size.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Optional, Union
+import asyncio
+import hashlib
+import os
+import tempfile
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+
+RESUME_MAX_BYTES = int(os.getenv("RESUME_MAX_BYTES", str(10 * 1024 * 1024)))
+RESUME_SPOOL_BYTES = int(os.getenv("RESUME_SPOOL_BYTES", str(1024 * 1024)))
+CHUNK_SIZE = 64 * 1024
+# Allowance for multipart boundaries, headers and form fields around the file
+FORM_OVERHEAD_BYTES = 64 * 1024
+
+
+class UploadTooLarge(ValueError):
+    """Raised when an upload exceeds RESUME_MAX_BYTES."""
+
+
+@dataclass
+class SpooledUpload:
+    digest: str
+    size: int
+    data: Optional[bytes] = None
+    path: Optional[str] = None
+
+    @property
+    def source(self) -> Union[bytes, str]:
+        """What the parser should read: in-memory bytes or a file path."""
+        return self.data if self.path is None else self.path
+
+    def cleanup(self):
+        if self.path and os.path.exists(self.path):
+            os.unlink(self.path)
+        self.data = None
+
+
+class _Spooler:
+    """Accumulates chunks in memory, spilling to a temp file past the threshold."""
+
+    def __init__(self, max_bytes: int = None, spool_bytes: int = None):
+        self.max_bytes = RESUME_MAX_BYTES if max_bytes is None else max_bytes
+        self.spool_bytes = RESUME_SPOOL_BYTES if spool_bytes is None else spool_bytes
+        self.hasher = hashlib.sha256()
+        self.buffer = bytearray()
+        self.spill = None
+        self.size = 0
+
+    def add(self, chunk: bytes):
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            raise UploadTooLarge(f"Resume exceeds {self.max_bytes / (1024 * 1024):.1f} MB limit")
+        self.hasher.update(chunk)
+
+        if self.spill is None:
+            self.buffer += chunk
+            if len(self.buffer) > self.spool_bytes:
+                self.spill = tempfile.NamedTemporaryFile(suffix=".pdf", delete=False)
+                self.spill.write(self.buffer)
+                self.buffer = bytearray()
+        else:
+            self.spill.write(chunk)
+
+    def finish(self) -> SpooledUpload:
+        if self.spill is None:
+            return SpooledUpload(digest=self.hasher.hexdigest(), size=self.size, data=bytes(self.buffer))
+        self.spill.close()
+        return SpooledUpload(digest=self.hasher.hexdigest(), size=self.size, path=self.spill.name)
+
+    def abort(self):
+        if self.spill is not None:
+            self.spill.close()
+            os.unlink(self.spill.name)
+
+
+async def spool_upload(upload, max_bytes: int = None, spool_bytes: int = None) -> SpooledUpload:
+    """Read an UploadFile into memory or, past the threshold, a temp file, in a worker thread."""
+    return await asyncio.to_thread(spool_file, upload.file, max_bytes, spool_bytes)
+
+
+def spool_file(fileobj, max_bytes: int = None, spool_bytes: int = None) -> SpooledUpload:
+    """Spool a plain file object (an UploadFile's file, a zip archive member)."""
+    spooler = _Spooler(max_bytes, spool_bytes)
+    try:
+        while True:
+            chunk = fileobj.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            spooler.add(chunk)
+    except BaseException:
+        spooler.abort()
+        raise
+    return spooler.finish()
+
+
+class UploadSizeLimit:
+    """
+    ASGI middleware capping request bodies per path prefix, e.g.
+    {"/resume/upload": RESUME_MAX_BYTES + FORM_OVERHEAD_BYTES}.
+
+    Oversized requests get a 413 without their body being read (declared
+    Content-Length) or as soon as the limit is passed (chunked bodies).
+    """
+
+    def __init__(self, app, limits: Dict[str, int]):
+        self.app = app
+        self.limits = limits
+
+    def _limit(self, path: str) -> Optional[int]:
+        for prefix, limit in self.limits.items():
+            if path.startswith(prefix):
+                return limit
+        return None
+
+    async def __call__(self, scope, receive, send):
+        limit = self._limit(scope["path"]) if scope["type"] == "http" else None
+        if limit is None:
+            return await self.app(scope, receive, send)
+
+        detail = f"Upload exceeds {limit / (1024 * 1024):.1f} MB limit"
+        length = dict(scope["headers"]).get(b"content-length", b"")
+        if length.isdigit() and int(length) > limit:
+            response = JSONResponse({"detail": detail}, status_code=413, headers={"Connection": "close"})
+            return await response(scope, receive, send)
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # Raised inside body parsing, so FastAPI turns it into the response
+                    raise HTTPException(status_code=413, detail=detail)
+            return message
+
+        await self.app(scope, limited_receive, send)
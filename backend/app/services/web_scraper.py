@@ -6,28 +6,47 @@ Fetches live job listings from Google Jobs, Indeed, Naukri, Internshala via Serp
 
 import time
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from typing import List, Dict, Iterable, Iterator, Optional, Sequence, Tuple
 import logging
 import os
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+import threading
+
 import requests
 
+from app.core.ml_engine import extract_skills_from_text
+from app.core.scoring import job_skills, rank_jobs
+from app.services.job_snapshot import SNAPSHOT_TTL_SECONDS, JobSnapshot, current_snapshot, job_id, publish_snapshot
+from app.services.serpapi_cassette import build_session
+from app.services.shared_snapshot import refresh_lock
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Cache with 15-minute TTL for live data
-JOB_CACHE = {"data": [], "timestamp": None, "expires_in": 900}
+# Only one thread refreshes a stale snapshot; others wait for its result.
+# Across workers the same goes for refresh_lock(): one process scrapes and
+# the rest adopt the snapshot it shares.
+_REFRESH_LOCK = threading.Lock()
 
 DEFAULT_QUERY = "software internship"
 SERPAPI_KEY = os.getenv("SERPAPI_KEY", "a4a2744c06fad4efd58020dbc03015245905cc146b18bef37abb6e1e0199dc7b")
-SERPAPI_BASE = "https://serpapi.com/search"
+SERPAPI_BASE = os.getenv("SERPAPI_BASE", "https://serpapi.com/search")
+
+# Live, recording or replaying transport, per SERPAPI_MODE (see serpapi_cassette)
+_session = build_session()
+
+
+def set_session(session: requests.Session):
+    """Swap the HTTP session used for SerpAPI (e.g. a replay session in benchmarks)."""
+    global _session
+    _session = session
 
 
 def _safe_get(url: str, params: dict = None) -> Optional[dict]:
     """Safely fetch JSON from SerpAPI."""
     try:
-        response = requests.get(url, params=params, timeout=15)
+        response = _session.get(url, params=params, timeout=15)
         if response.status_code != 200:
             logger.warning(f"HTTP {response.status_code} for {url} - {response.text[:200]}")
             return None
@@ -49,6 +68,7 @@ def _normalize_job(
 ) -> Dict:
     """Normalize job data to standard format."""
     return {
+        "id": job_id(title, company, source),
         "title": title.strip() if title else "",
         "company": company.strip() if company else "",
         "location": location.strip() if location else "India",
@@ -279,87 +299,190 @@ def fetch_angellist(query: str) -> List[Dict]:
 
 
 def is_cache_valid() -> bool:
-    """Check if cache is still valid."""
-    if not JOB_CACHE["timestamp"]:
-        return False
-    return (time.time() - JOB_CACHE["timestamp"]) < JOB_CACHE["expires_in"]
+    """Check if the published snapshot is still valid."""
+    snapshot = current_snapshot()
+    return snapshot.version > 0 and snapshot.is_fresh()
 
 
-def get_cached_jobs() -> List[Dict]:
-    """Get jobs from cache if valid."""
-    if is_cache_valid():
-        logger.info(f"📦 Cache hit: {len(JOB_CACHE['data'])} jobs")
-        return JOB_CACHE["data"]
+def get_cached_jobs() -> Sequence[Dict]:
+    """Get jobs from the current snapshot if valid."""
+    snapshot = current_snapshot()
+    if snapshot.version > 0 and snapshot.is_fresh():
+        logger.info(f"📦 Cache hit: {len(snapshot.jobs)} jobs")
+        return snapshot.jobs
     return []
 
 
-def scrape_all_jobs(resume_text: str = None) -> List[Dict]:
-    """Scrape all sources in parallel with live data + skill filtering."""
-    cached = get_cached_jobs()
-    if cached and not resume_text:
-        return cached
-    
-    query = _build_query(resume_text)
-    logger.info(f"🕷️ Fetching LIVE jobs for '{query}' via SerpAPI (parallel)...")
-    all_jobs = []
-    start_time = time.time()
-    
-    # Parallel execution
-    with ThreadPoolExecutor(max_workers=5) as executor:
+# Source label -> fetcher, run in parallel for every refresh
+FETCHERS = {
+    "Google Jobs": fetch_google_jobs,
+    "Indeed Direct": fetch_indeed_direct,
+    "Internshala": fetch_internshala,
+    "Naukri": fetch_naukri,
+    "Startups": fetch_angellist,
+}
+
+# Background refresh interval per source (see services/scheduler.py)
+SCRAPE_INTERVAL = int(os.getenv("SCRAPE_INTERVAL", "3600"))
+SCRAPE_JITTER = float(os.getenv("SCRAPE_JITTER", "0.1"))
+
+
+def _parse_intervals(spec: str) -> Dict[str, int]:
+    intervals = {name: SCRAPE_INTERVAL for name in FETCHERS}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, seconds = item.partition("=")
+        if name.strip() in intervals and seconds.strip().isdigit():
+            intervals[name.strip()] = int(seconds)
+        else:
+            logger.warning(f"Ignoring SCRAPE_INTERVALS entry '{item}'")
+    return intervals
+
+
+SOURCE_INTERVALS = _parse_intervals(os.getenv("SCRAPE_INTERVALS", ""))
+
+# A snapshot stays fresh until the slowest source is due again (jitter
+# included), plus SNAPSHOT_TTL_SECONDS of grace for the scrape itself. Only
+# then do request paths scrape inline: the scheduler leader refreshes it
+# well before, so the other workers never do.
+SNAPSHOT_EXPIRES_IN = int(max(SOURCE_INTERVALS.values()) * (1 + SCRAPE_JITTER)) + SNAPSHOT_TTL_SECONDS
+
+
+def iter_source_batches(query: str) -> Iterator[Tuple[str, List[Dict]]]:
+    """Run all fetchers in parallel, yielding (source, jobs) as each one finishes."""
+    with ThreadPoolExecutor(max_workers=len(FETCHERS)) as executor:
         futures = {
-            executor.submit(fetch_google_jobs, query): "Google Jobs",
-            executor.submit(fetch_indeed_direct, query): "Indeed Direct",
-            executor.submit(fetch_internshala, query): "Internshala",
-            executor.submit(fetch_naukri, query): "Naukri",
-            executor.submit(fetch_angellist, query): "Startups",
+            executor.submit(fetcher, query): name
+            for name, fetcher in FETCHERS.items()
         }
         
         for future in as_completed(futures, timeout=20):
             try:
-                jobs = future.result(timeout=18)
-                all_jobs.extend(jobs)
+                yield futures[future], future.result(timeout=18)
             except Exception as e:
                 logger.error(f"Fetch error: {e}")
-    
-    elapsed = time.time() - start_time
-    
-    # De-duplicate (title + company + source)
+
+
+def _dedupe_jobs(jobs: Iterable[Dict]) -> List[Dict]:
+    """De-duplicate on title + company + source (the job id), keeping the first seen."""
     unique = {}
-    for job in all_jobs:
-        key = f"{job.get('title','').lower()}|{job.get('company','').lower()}|{job.get('source','')}"
+    for job in jobs:
+        key = job.get("id") or job_id(job.get("title"), job.get("company"), job.get("source"))
         if key not in unique:
             unique[key] = job
-    all_jobs = list(unique.values())
-
-    # Filter by resume skills if provided
-    if resume_text:
-        resume_lower = resume_text.lower()
-        TECH_SKILLS = ['python', 'java', 'javascript', 'react', 'nodejs', 'fastapi', 'django', 
-                       'sql', 'mongodb', 'aws', 'docker', 'kubernetes', 'git', 'linux', 'kotlin']
-        matched_skills = [s for s in TECH_SKILLS if s in resume_lower]
-        
-        filtered_jobs = []
-        for job in all_jobs:
-            job_skills = job.get("skills", [])
-            match_count = sum(1 for skill in matched_skills if skill in job_skills)
-            job["relevance_score"] = match_count
-            if match_count > 0:
-                filtered_jobs.append(job)
-        
-        filtered_jobs.sort(key=lambda x: x.get("relevance_score", 0), reverse=True)
-        logger.info(f"✓ Filtered to {len(filtered_jobs)} matching jobs in {elapsed:.2f}s")
-        all_jobs = filtered_jobs
+    return list(unique.values())
+
+
+def _fetch_jobs(query: str) -> List[Dict]:
+    """Fetch all sources in parallel and de-duplicate."""
+    logger.info(f"🕷️ Fetching LIVE jobs for '{query}' via SerpAPI (parallel)...")
+    all_jobs = []
+    start_time = time.time()
+    
+    for _, jobs in iter_source_batches(query):
+        all_jobs.extend(jobs)
     
-    # Cache results
-    JOB_CACHE["data"] = all_jobs
-    JOB_CACHE["timestamp"] = time.time()
+    elapsed = time.time() - start_time
+    all_jobs = _dedupe_jobs(all_jobs)
     logger.info(f"✓ TOTAL: {len(all_jobs)} jobs fetched in {elapsed:.2f}s")
     return all_jobs
 
 
+def refresh_snapshot() -> JobSnapshot:
+    """Scrape the default query and publish the result as a new snapshot."""
+    return publish_snapshot(_fetch_jobs(DEFAULT_QUERY), SNAPSHOT_EXPIRES_IN)
+
+
+def refresh_source(name: str) -> int:
+    """
+    Re-fetch one source and publish it merged into the current snapshot.
+
+    The source's previous jobs are replaced, every other source is kept.
+    Raises if the fetcher comes back empty, leaving the old jobs in place.
+    Returns the number of jobs fetched.
+    """
+    fresh = FETCHERS[name](DEFAULT_QUERY)
+    if not fresh:
+        raise RuntimeError(f"{name} returned no jobs")
+    labels = {job["source"] for job in fresh}
+
+    with _REFRESH_LOCK, refresh_lock():
+        current = current_snapshot(sync=True)
+        kept = [job for job in current.jobs if job.get("source") not in labels]
+        publish_snapshot(_dedupe_jobs([*kept, *fresh]), SNAPSHOT_EXPIRES_IN)
+    return len(fresh)
+
+
+def iter_refresh_snapshot() -> Iterator[Tuple[str, List[Dict]]]:
+    """
+    Refresh the snapshot while yielding (source, jobs) as each fetcher finishes.
+
+    Publishes the new snapshot once every source is in. Yields nothing if
+    another thread or worker is already refreshing; callers then wait on
+    get_job_snapshot(). Abandoning the generator early abandons the refresh.
+    """
+    if not _REFRESH_LOCK.acquire(blocking=False):
+        return
+    try:
+        with refresh_lock(blocking=False) as acquired:
+            if not acquired:
+                return
+            logger.info(f"🕷️ Streaming LIVE jobs for '{DEFAULT_QUERY}' via SerpAPI (parallel)...")
+            all_jobs = []
+            for source, jobs in iter_source_batches(DEFAULT_QUERY):
+                all_jobs.extend(jobs)
+                yield source, jobs
+            publish_snapshot(_dedupe_jobs(all_jobs), SNAPSHOT_EXPIRES_IN)
+    finally:
+        _REFRESH_LOCK.release()
+
+
+def get_job_snapshot() -> JobSnapshot:
+    """Return the current snapshot, refreshing it first if stale."""
+    snapshot = current_snapshot()
+    if snapshot.version > 0 and snapshot.is_fresh():
+        return snapshot
+    with _REFRESH_LOCK:
+        # Another thread may have refreshed while we waited
+        snapshot = current_snapshot(sync=True)
+        if snapshot.version > 0 and snapshot.is_fresh():
+            return snapshot
+        with refresh_lock():
+            # ...or another worker
+            snapshot = current_snapshot(sync=True)
+            if snapshot.version > 0 and snapshot.is_fresh():
+                return snapshot
+            return refresh_snapshot()
+
+
+def scrape_all_jobs(resume_text: str = None) -> List[Dict]:
+    """
+    Scrape all sources in parallel with live data + skill filtering.
+
+    Without resume_text this returns the shared snapshot's jobs. With it, a
+    resume-specific query is fetched and ranked for this caller only: the
+    result is a private list with relevance_score and is never published.
+    """
+    if not resume_text:
+        return get_job_snapshot().jobs
+    
+    filtered_jobs = filter_relevant_jobs(_fetch_jobs(_build_query(resume_text)), resume_text)
+    logger.info(f"✓ Filtered to {len(filtered_jobs)} matching jobs")
+    return filtered_jobs
+
+
+def filter_relevant_jobs(jobs: Sequence[Dict], resume_text: str) -> List[Dict]:
+    """Jobs sharing at least one skill with the resume, best first, with relevance_score."""
+    ranked = rank_jobs(extract_skills_from_text(resume_text), [job_skills(job) for job in jobs])
+    return [
+        {**jobs[i], "relevance_score": score}
+        for i, score in ranked
+        if score > 0
+    ]
+
+
 def get_jobs_by_source(source: str = None) -> List[Dict]:
     """Get jobs filtered by source."""
-    all_jobs = get_cached_jobs() or scrape_all_jobs()
+    all_jobs = get_job_snapshot().jobs
     if source:
         return [j for j in all_jobs if j["source"] == source]
     return all_jobs
@@ -367,6 +490,6 @@ def get_jobs_by_source(source: str = None) -> List[Dict]:
 
 def search_jobs(query: str) -> List[Dict]:
     """Search jobs by keyword."""
-    all_jobs = get_cached_jobs() or scrape_all_jobs()
+    all_jobs = get_job_snapshot().jobs
     query_lower = query.lower()
     return [j for j in all_jobs if query_lower in j["title"].lower() or query_lower in j["company"].lower()]
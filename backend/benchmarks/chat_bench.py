@@ -0,0 +1,297 @@
+"""
+Chat streaming benchmark
+========================
+Measures the chat path under N concurrent streaming conversations:
+
+    ttft        time from POST /chat/stream to the first token event
+    tokens/s    per stream (after the first token) and in aggregate
+    loop lag    the app's event-loop lag while the level runs
+    dispatch    LLM queue depth, retries and rate-limit pauses (GET /metrics/llm)
+
+Everything runs locally: the Groq stand-in (benchmarks/groq_server.py, in
+its own process so it does not compete with the client for the GIL)
+emits tokens at --tps with optional --faults, a synthetic SerpAPI keeps
+startup offline, and uvicorn runs the app with throwaway data. Each
+virtual user keeps one server-side chat session and asks question after
+question (the response cache is off, so every turn reaches the LLM).
+
+Each level is also run straight against the stand-in, without our stack;
+the difference in time to first token is our overhead.
+
+Usage (from backend/):
+    python -m benchmarks.chat_bench --concurrency 1,10,50,100 --duration 10
+    python -m benchmarks.chat_bench --faults flaky --tps 80 --json chat.json
+    python -m benchmarks.chat_bench --faults limited,rpm=300 --concurrency 20
+"""
+
+from typing import Dict, List, Optional
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks import serpapi_server
+from benchmarks.load_test import BACKEND_DIR, _free_port, _percentile, start_app
+
+QUESTIONS = [
+    "How do I prepare for a backend internship interview?",
+    "Which projects should I add to my resume for ML roles?",
+    "How many applications should I send per week?",
+    "Is it worth learning Docker as a student?",
+    "How do I ask a senior engineer for a referral?",
+]
+
+
+class StreamRecorder:
+    """Timings of the streams in one level."""
+
+    def __init__(self):
+        self.ttft: List[float] = []
+        self.stream_tps: List[float] = []
+        self.tokens = 0
+        self.requests = 0
+        self.errors = 0
+
+    def add(self, started: float, first: Optional[float], finished: float, tokens: int, ok: bool):
+        self.requests += 1
+        self.tokens += tokens
+        if not ok or first is None:
+            self.errors += 1
+            return
+        self.ttft.append(first - started)
+        if tokens > 1 and finished > first:
+            self.stream_tps.append((tokens - 1) / (finished - first))
+
+    def summary(self, elapsed: float) -> Dict:
+        ttft = sorted(self.ttft)
+        tps = sorted(self.stream_tps)
+        entry = {
+            "requests": self.requests,
+            "errors": self.errors,
+            "tokens": self.tokens,
+            "aggregate_tps": round(self.tokens / elapsed, 1),
+        }
+        if ttft:
+            entry.update({f"ttft_{label}_ms": round(_percentile(ttft, q) * 1e3, 1)
+                          for label, q in (("p50", 0.50), ("p95", 0.95), ("p99", 0.99))})
+        if tps:
+            entry["stream_tps_p50"] = round(_percentile(tps, 0.5), 1)
+        return entry
+
+
+async def _sse_stream(response: httpx.Response):
+    """Yield (event, data) pairs from an SSE response."""
+    event = None
+    async for line in response.aiter_lines():
+        if line.startswith("event: "):
+            event = line[len("event: "):]
+        elif line.startswith("data: "):
+            payload = line[len("data: "):]
+            yield event, payload
+
+
+async def app_chat(client: httpx.AsyncClient, recorder: StreamRecorder, user_no: int, deadline: float):
+    """One virtual user: a session of questions through /chat/stream until the deadline."""
+    session_id = None
+    for turn in itertools.count():
+        if time.perf_counter() >= deadline:
+            return
+        message = f"{QUESTIONS[(user_no + turn) % len(QUESTIONS)]} (user {user_no}, turn {turn})"
+        started = time.perf_counter()
+        first, tokens, ok = None, 0, False
+        try:
+            async with client.stream("POST", "/chat/stream", json={
+                "message": message, "session_id": session_id, "start_session": True,
+            }) as response:
+                async for event, payload in _sse_stream(response):
+                    if event == "session":
+                        session_id = json.loads(payload)["session_id"]
+                    elif event == "token":
+                        first = first or time.perf_counter()
+                        tokens += 1
+                    elif event == "done":
+                        ok = True
+                    elif event == "error":
+                        break
+        except httpx.HTTPError:
+            pass
+        recorder.add(started, first, time.perf_counter(), tokens, ok)
+
+
+async def direct_chat(client: httpx.AsyncClient, recorder: StreamRecorder, user_no: int, deadline: float):
+    """Same traffic straight to the stand-in, bypassing the app."""
+    for turn in itertools.count():
+        if time.perf_counter() >= deadline:
+            return
+        body = {
+            "model": "stand-in",
+            "stream": True,
+            "messages": [{"role": "user", "content": QUESTIONS[(user_no + turn) % len(QUESTIONS)]}],
+        }
+        started = time.perf_counter()
+        first, tokens, ok = None, 0, False
+        try:
+            async with client.stream("POST", "/openai/v1/chat/completions", json=body) as response:
+                if response.status_code == 200:
+                    async for _, payload in _sse_stream(response):
+                        if payload == "[DONE]":
+                            ok = True
+                            break
+                        delta = json.loads(payload)["choices"][0]["delta"].get("content")
+                        if delta:
+                            first = first or time.perf_counter()
+                            tokens += 1
+        except httpx.HTTPError:
+            pass
+        recorder.add(started, first, time.perf_counter(), tokens, ok)
+
+
+async def per_worker(client: httpx.AsyncClient, path: str, workers: int, params: Dict = None) -> List[Dict]:
+    """GET a per-worker metrics endpoint until every worker (by pid) has answered, or we give up."""
+    by_pid = {}
+    for _ in range(max(4, 4 * workers)):
+        try:
+            # A fresh connection each time, so the kernel can hand it to another worker
+            response = await client.get(path, params=params, headers={"Connection": "close"})
+            stats = response.json()
+            by_pid[stats["pid"]] = stats
+        except (httpx.HTTPError, ValueError, KeyError):
+            pass
+        if len(by_pid) >= workers:
+            break
+    return list(by_pid.values())
+
+
+async def run_level(url: str, groq_url: str, concurrency: int, duration: float, workers: int, direct: bool) -> Dict:
+    limits = httpx.Limits(max_connections=concurrency * 2, max_keepalive_connections=concurrency * 2)
+    level = {"concurrency": concurrency}
+
+    async with httpx.AsyncClient(base_url=url, timeout=120, limits=limits) as client:
+        await per_worker(client, "/metrics/loop-lag", workers, {"reset": True})
+        before = {s["pid"]: s for s in await per_worker(client, "/metrics/llm", workers)}
+        recorder = StreamRecorder()
+        started = time.perf_counter()
+        deadline = started + duration
+        await asyncio.gather(*(app_chat(client, recorder, n, deadline) for n in range(concurrency)))
+        level["stack"] = recorder.summary(time.perf_counter() - started)
+        level["loop_lag"] = await per_worker(client, "/metrics/loop-lag", workers)
+        level["dispatch"] = []
+        for stats in await per_worker(client, "/metrics/llm", workers):
+            prior = before.get(stats["pid"], {})
+            level["dispatch"].append({
+                "pid": stats["pid"],
+                **{k: stats[k] - prior.get(k, 0) for k in ("granted", "retries", "rate_limited", "failed", "timeouts")},
+                "max_queue_depth": stats["max_queue_depth"],
+                "wait_max_ms": stats["wait_max_ms"],
+            })
+
+    if direct:
+        async with httpx.AsyncClient(base_url=groq_url, timeout=120, limits=limits) as client:
+            recorder = StreamRecorder()
+            started = time.perf_counter()
+            deadline = started + duration
+            await asyncio.gather(*(direct_chat(client, recorder, n, deadline) for n in range(concurrency)))
+            level["direct"] = recorder.summary(time.perf_counter() - started)
+        if "ttft_p50_ms" in level["stack"] and "ttft_p50_ms" in level["direct"]:
+            level["ttft_overhead_p50_ms"] = round(level["stack"]["ttft_p50_ms"] - level["direct"]["ttft_p50_ms"], 1)
+    return level
+
+
+def start_stand_in(port: int, args, verbose: bool = False) -> subprocess.Popen:
+    """The Groq stand-in as a subprocess; returns once it answers."""
+    process = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.groq_server", "--port", str(port),
+         "--first-token-latency", str(args.first_token_latency), "--tokens-per-second", str(args.tps),
+         "--tps-jitter", str(args.tps_jitter), "--reply-tokens", str(args.reply_tokens), "--faults", args.faults],
+        cwd=BACKEND_DIR,
+        stdout=None if verbose else subprocess.DEVNULL,
+        stderr=None if verbose else subprocess.DEVNULL,
+    )
+    for _ in range(100):
+        if process.poll() is not None:
+            raise RuntimeError(f"Groq stand-in exited with status {process.returncode}")
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/stats", timeout=1)
+            return process
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("Groq stand-in did not start within 10s")
+
+
+def print_report(report: Dict):
+    config = report["config"]
+    print(f"\nchat streaming: stand-in {config['first_token_latency'] * 1e3:g} ms to first token, "
+          f"{config['tps']:g} tokens/s, faults '{config['faults']}', {config['workers']} worker(s)")
+    print(f"{'conc':>5} {'reqs':>6} {'errs':>5} {'ttft p50':>9} {'p95':>8} {'p99':>8} {'overhead':>9} "
+          f"{'tok/s/stream':>13} {'tok/s total':>12} {'lag p99':>8} {'lag max':>8} {'retries':>8}")
+    for level in report["levels"]:
+        stack = level["stack"]
+        lag_p99 = max((lag.get("p99_ms", 0) for lag in level["loop_lag"]), default="-")
+        lag_max = max((lag.get("max_ms", 0) for lag in level["loop_lag"]), default="-")
+        retries = sum(d["retries"] for d in level["dispatch"])
+        print(f"{level['concurrency']:>5} {stack['requests']:>6} {stack['errors']:>5} "
+              f"{stack.get('ttft_p50_ms', '-'):>9} {stack.get('ttft_p95_ms', '-'):>8} {stack.get('ttft_p99_ms', '-'):>8} "
+              f"{level.get('ttft_overhead_p50_ms', '-'):>9} {stack.get('stream_tps_p50', '-'):>13} "
+              f"{stack['aggregate_tps']:>12} {lag_p99:>8} {lag_max:>8} {retries:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", default="1,10,50", help="comma-separated concurrent chats per level")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per level")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers")
+    parser.add_argument("--first-token-latency", type=float, default=0.2, help="stand-in time to first token (s)")
+    parser.add_argument("--tps", type=float, default=100.0, help="stand-in tokens per second per stream")
+    parser.add_argument("--tps-jitter", type=float, default=0.2, help="+/- share of the token rate")
+    parser.add_argument("--reply-tokens", type=int, default=120)
+    parser.add_argument("--faults", default="none", help="stand-in fault pattern (see groq_server)")
+    parser.add_argument("--no-direct", action="store_true", help="skip the run straight against the stand-in")
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--verbose", action="store_true", help="show the app's own log output")
+    args = parser.parse_args()
+    levels = [int(n) for n in args.concurrency.split(",") if n.strip()]
+
+    serp_port, groq_port = _free_port(), _free_port()
+    groq_url = f"http://127.0.0.1:{groq_port}"
+    process = stand_in = None
+    report = {"config": {
+        "workers": args.workers, "duration_s": args.duration, "first_token_latency": args.first_token_latency,
+        "tps": args.tps, "tps_jitter": args.tps_jitter, "reply_tokens": args.reply_tokens, "faults": args.faults,
+    }, "levels": []}
+
+    with tempfile.TemporaryDirectory(prefix="aibir-chat-") as data_dir:
+        server = serpapi_server.serve(serp_port, os.path.join(data_dir, "cassette"), "instant", synthetic=15)
+        try:
+            stand_in = start_stand_in(groq_port, args, args.verbose)
+            url, process = start_app(args.workers, data_dir, {
+                "SERPAPI_BASE": f"http://127.0.0.1:{serp_port}/search",
+                "GROQ_BASE_URL": groq_url,
+                "CHAT_CACHE_ENTRIES": "0",
+            }, args.verbose)
+            for concurrency in levels:
+                level = asyncio.run(run_level(url, groq_url, concurrency, args.duration, args.workers, not args.no_direct))
+                report["levels"].append(level)
+            report["stand_in"] = httpx.get(f"{groq_url}/stats").json()
+        finally:
+            for child in (process, stand_in):
+                if child is not None:
+                    child.terminate()
+                    child.wait(timeout=30)
+            server.shutdown()
+
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Synthetic benchmark fixtures
+============================
+Deterministic resume PDFs and job records for benchmarks. Resumes are
+written with a tiny PDF writer (Helvetica text, one object per page), so
+the exact ground-truth text of every page is known.
+"""
+
+import random
+from typing import List, Tuple
+
+from app.core.ml_engine import SKILL_VOCABULARY
+
+FIRST_NAMES = ["Aarav", "Diya", "Ishaan", "Meera", "Kabir", "Ananya", "Rohan", "Saanvi"]
+LAST_NAMES = ["Sharma", "Iyer", "Patel", "Reddy", "Gupta", "Nair", "Singh", "Das"]
+SECTIONS = ["Education", "Experience", "Projects", "Skills", "Achievements", "Certifications"]
+VERBS = ["Built", "Designed", "Led", "Optimised", "Shipped", "Automated", "Migrated", "Tested"]
+NOUNS = ["an API", "a dashboard", "a data pipeline", "a mobile app", "a recommender", "a CI pipeline"]
+
+LINES_PER_PAGE = 40
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(pages: List[List[str]]) -> bytes:
+    """Write a minimal PDF with the given lines on each page."""
+    n = len(pages)
+    font_id = 3 + 2 * n
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{' '.join(f'{3 + 2 * i} 0 R' for i in range(n))}] /Count {n} >>",
+    ]
+    for i, lines in enumerate(pages):
+        ops = ["BT", "/F1 10 Tf", "14 TL", "50 760 Td"]
+        ops += [f"({_escape(line)}) Tj T*" for line in lines]
+        ops.append("ET")
+        stream = "\n".join(ops)
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> >> /Contents {4 + 2 * i} 0 R >>"
+        )
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+    objects.append("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        out += f"{offset:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+
+def resume_lines(rng: random.Random, pages: int) -> List[List[str]]:
+    """Plausible resume text, LINES_PER_PAGE lines per page."""
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    skills = rng.sample(SKILL_VOCABULARY, 8)
+    lines = [name, f"{name.split()[0].lower()}@example.com | +91 98765 43210"]
+    while len(lines) < pages * LINES_PER_PAGE:
+        lines.append(rng.choice(SECTIONS))
+        for _ in range(rng.randint(3, 6)):
+            lines.append(f"{rng.choice(VERBS)} {rng.choice(NOUNS)} using {', '.join(rng.sample(skills, 2))}")
+    lines = lines[:pages * LINES_PER_PAGE]
+    return [lines[i:i + LINES_PER_PAGE] for i in range(0, len(lines), LINES_PER_PAGE)]
+
+
+def resume_corpus(page_counts=(1, 2, 5), per_size: int = 5, seed: int = 42) -> List[Tuple[str, bytes, str]]:
+    """(name, pdf bytes, ground-truth text) for each synthetic resume."""
+    rng = random.Random(seed)
+    corpus = []
+    for pages in page_counts:
+        for i in range(per_size):
+            page_lines = resume_lines(rng, pages)
+            truth = "\n".join(line for page in page_lines for line in page)
+            corpus.append((f"resume_{pages}p_{i}", make_pdf(page_lines), truth))
+    return corpus
+
+
+def resume_text(pages: int = 1, seed: int = 0) -> str:
+    """Ground-truth text of one synthetic resume."""
+    page_lines = resume_lines(random.Random(seed), pages)
+    return "\n".join(line for page in page_lines for line in page)
+
+
+COMPANIES = ["Infosys", "Razorpay", "Zomato", "Freshworks", "Swiggy", "CRED", "Zerodha", "Postman", "Meesho", "PhonePe"]
+CITIES = ["Bengaluru", "Hyderabad", "Pune", "Chennai", "Gurugram", "Mumbai", "Remote"]
+ROLES = ["Software", "Backend", "Frontend", "Data Science", "ML", "DevOps", "Full Stack", "Mobile"]
+
+
+def serpapi_job(rng: random.Random, site: str = "") -> dict:
+    """One raw google_jobs result, shaped like SerpAPI's jobs_results entries."""
+    skills = rng.sample(SKILL_VOCABULARY, rng.randint(2, 6))
+    company = rng.choice(COMPANIES)
+    title = f"{rng.choice(ROLES)} Intern"
+    return {
+        "title": title,
+        "company_name": company,
+        "location": rng.choice(CITIES),
+        "share_link": f"https://{site or 'jobs.example.com'}/{company.lower()}/{rng.randrange(10**8)}",
+        "description": f"{company} is hiring a {title}. You will work with {', '.join(skills)}.",
+        "detected_extensions": {"salary": f"₹{rng.randint(10, 60)},000 a month"},
+    }
+
+
+def serpapi_jobs_response(params: dict, n: int = 15) -> dict:
+    """Deterministic SerpAPI response for a query (same params, same jobs)."""
+    query = params.get("q", "")
+    rng = random.Random(query)
+    site = query.split("site:")[1].split()[0] if "site:" in query else ""
+    return {
+        "search_parameters": {k: v for k, v in params.items() if k != "api_key"},
+        "jobs_results": [serpapi_job(rng, site) for _ in range(n)],
+    }
+
+
+def raw_jobs(n: int, duplicate_rate: float = 0.1, seed: int = 0) -> List[dict]:
+    """n raw SerpAPI job results, about duplicate_rate of them repeats."""
+    rng = random.Random(seed)
+    jobs = []
+    for _ in range(n):
+        if jobs and rng.random() < duplicate_rate:
+            jobs.append(dict(rng.choice(jobs)))
+        else:
+            job = serpapi_job(rng)
+            # Unique titles so the corpus really has n - duplicates distinct jobs
+            job["title"] = f"{job['title']} #{len(jobs)}"
+            jobs.append(job)
+    return jobs
@@ -0,0 +1,319 @@
+"""
+Groq stand-in server
+====================
+A local server speaking the OpenAI-compatible chat completions API that
+the Groq SDK uses, so chat can be load-tested without a key or quota:
+
+    python -m benchmarks.groq_server --port 8766 --tokens-per-second 200
+    GROQ_BASE_URL=http://127.0.0.1:8766 GROQ_API_KEY=test uvicorn app.main:app
+
+Each reply is a canned answer of --reply-tokens words. Non-streaming
+requests are answered after --first-token-latency plus the time it would
+take to generate at --tokens-per-second; streaming requests (stream=true)
+get one SSE chunk per word at that rate (+/- --tps-jitter). Streams the
+client abandons stop being generated, and are counted in STATS (also
+served at GET /stats).
+
+--faults injects provider misbehaviour, as a named pattern optionally
+followed by overrides ("flaky,rate_limit=0.2,seed=3"):
+
+    rate_limit    share of requests answered 429 with retry-after
+    server_error  share answered 503
+    disconnect    share of streams cut off halfway through
+    every         every Nth request gets a 503 (0 = off)
+    rpm           requests per minute before 429s, like a real quota;
+                  x-ratelimit-* headers are sent on every response
+    retry_after   seconds advertised in retry-after (0 = header omitted)
+    seed          fault decisions are reproducible per request number
+"""
+
+from collections import deque
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import argparse
+import itertools
+import json
+import random
+import threading
+import time
+import uuid
+
+# Served, completed and abandoned streams, tokens sent and faults injected, across all requests
+STATS = {
+    "requests": 0,
+    "streams_completed": 0,
+    "streams_abandoned": 0,
+    "tokens_sent": 0,
+    "rate_limited": 0,
+    "server_errors": 0,
+    "disconnects": 0,
+}
+_stats_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class FaultProfile:
+    """Which requests the stand-in fails, and how."""
+    rate_limit: float = 0.0
+    server_error: float = 0.0
+    disconnect: float = 0.0
+    every: int = 0
+    rpm: int = 0
+    retry_after: float = 1.0
+    seed: int = 0
+
+
+FAULT_PATTERNS = {
+    "none": FaultProfile(),
+    "flaky": FaultProfile(rate_limit=0.05, server_error=0.02, disconnect=0.02),
+    "limited": FaultProfile(rpm=600, retry_after=2.0),
+    "outage": FaultProfile(server_error=0.5, retry_after=0.0),
+}
+
+
+def parse_faults(spec: str) -> FaultProfile:
+    """A named pattern, optionally followed by overrides: "limited,rpm=300,seed=7"."""
+    parts = [part.strip() for part in spec.split(",") if part.strip()]
+    base = FAULT_PATTERNS["none"]
+    if parts and "=" not in parts[0]:
+        name = parts.pop(0)
+        if name not in FAULT_PATTERNS:
+            raise ValueError(f"Unknown fault pattern '{name}' (choose from {', '.join(FAULT_PATTERNS)})")
+        base = FAULT_PATTERNS[name]
+    overrides = {}
+    for part in parts:
+        key, _, value = part.partition("=")
+        if key not in FaultProfile.__dataclass_fields__:
+            raise ValueError(f"Unknown fault setting '{key}'")
+        overrides[key] = int(value) if key in ("every", "rpm", "seed") else float(value)
+    return FaultProfile(**{**base.__dict__, **overrides})
+
+
+def _count(key: str, n: int = 1):
+    with _stats_lock:
+        STATS[key] += n
+
+
+def reset_stats():
+    with _stats_lock:
+        for key in STATS:
+            STATS[key] = 0
+
+WORDS = (
+    "Focus on projects that show real impact and keep your resume to one page. "
+    "Practise data structures daily, contribute to open source, and reach out to "
+    "engineers at companies you admire with a short, specific message."
+).split()
+
+
+class GroqHandler(BaseHTTPRequestHandler):
+    first_token_latency = 0.2
+    tokens_per_second = 200.0
+    tps_jitter = 0.0
+    reply_tokens = 120
+    faults = FAULT_PATTERNS["none"]
+    protocol_version = "HTTP/1.1"
+
+    # Shared by every handler of one server (set in serve())
+    _request_numbers = None
+    _window: deque = None
+    _window_lock = None
+
+    def _reply_words(self, rng: random.Random):
+        return [rng.choice(WORDS) for _ in range(self.reply_tokens)]
+
+    def _token_gap(self, rng: random.Random) -> float:
+        rate = self.tokens_per_second * (1 + rng.uniform(-self.tps_jitter, self.tps_jitter))
+        return 1 / max(rate, 1e-3)
+
+    def _rate_limit_headers(self) -> dict:
+        """x-ratelimit-* headers for the current one-minute window (rpm faults only)."""
+        if not self.faults.rpm:
+            return {}
+        with self._window_lock:
+            now = time.monotonic()
+            while self._window and self._window[0] <= now - 60:
+                self._window.popleft()
+            remaining = max(0, self.faults.rpm - len(self._window))
+            reset = 60 - (now - self._window[0]) if self._window else 0.0
+        return {
+            "x-ratelimit-limit-requests": str(self.faults.rpm),
+            "x-ratelimit-remaining-requests": str(remaining),
+            "x-ratelimit-reset-requests": f"{reset:.2f}s",
+        }
+
+    def _admit(self) -> bool:
+        """Count this request against the rpm window; False if over quota."""
+        if not self.faults.rpm:
+            return True
+        with self._window_lock:
+            now = time.monotonic()
+            while self._window and self._window[0] <= now - 60:
+                self._window.popleft()
+            if len(self._window) >= self.faults.rpm:
+                return False
+            self._window.append(now)
+            return True
+
+    def _send_json(self, status: int, payload: dict, headers: dict = None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_fault(self, status: int):
+        headers = self._rate_limit_headers()
+        if self.faults.retry_after:
+            headers["retry-after"] = f"{self.faults.retry_after:g}"
+        kind = "rate_limit_exceeded" if status == 429 else "service_unavailable"
+        _count("rate_limited" if status == 429 else "server_errors")
+        self._send_json(status, {"error": {"message": f"Injected {kind}", "type": kind}}, headers)
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/stats":
+            with _stats_lock:
+                self._send_json(200, dict(STATS))
+        else:
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        if not self.path.endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+            return
+
+        number = next(self._request_numbers)
+        _count("requests")
+        rng = random.Random(f"{self.faults.seed}:{number}")
+        if not self._admit() or rng.random() < self.faults.rate_limit:
+            self._send_fault(429)
+            return
+        if rng.random() < self.faults.server_error or (self.faults.every and number % self.faults.every == 0):
+            self._send_fault(503)
+            return
+
+        words = self._reply_words(rng)
+        if request.get("stream"):
+            self._stream(request, words, rng)
+            return
+        time.sleep(self.first_token_latency + sum(self._token_gap(rng) for _ in words))
+        prompt_tokens = sum(len(m.get("content", "").split()) for m in request.get("messages", []))
+        self._send_json(200, {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "stand-in"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": " ".join(words)},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": len(words),
+                "total_tokens": prompt_tokens + len(words),
+            },
+        }, self._rate_limit_headers())
+
+    def _chunk(self, completion_id: str, model: str, delta: dict, finish_reason=None) -> bytes:
+        payload = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+        return f"data: {json.dumps(payload)}\n\n".encode("utf-8")
+
+    def _stream(self, request: dict, words, rng: random.Random):
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        model = request.get("model", "stand-in")
+        cut_at = len(words) // 2 if rng.random() < self.faults.disconnect else None
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        for name, value in self._rate_limit_headers().items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.close_connection = True
+
+        time.sleep(self.first_token_latency)
+        sent = 0
+        try:
+            self.wfile.write(self._chunk(completion_id, model, {"role": "assistant", "content": ""}))
+            for i, word in enumerate(words):
+                if i == cut_at:
+                    # Drop the connection mid-answer, as a failing upstream would
+                    _count("disconnects")
+                    _count("tokens_sent", sent)
+                    return
+                if i:
+                    time.sleep(self._token_gap(rng))
+                self.wfile.write(self._chunk(completion_id, model, {"content": word + " "}))
+                self.wfile.flush()
+                sent += 1
+            self.wfile.write(self._chunk(completion_id, model, {}, "stop"))
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+            outcome = "streams_completed"
+        except (BrokenPipeError, ConnectionResetError):
+            outcome = "streams_abandoned"
+        with _stats_lock:
+            STATS[outcome] += 1
+            STATS["tokens_sent"] += sent
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    # The default backlog of 5 refuses connections under benchmark concurrency
+    request_queue_size = 1024
+
+
+def serve(port: int, first_token_latency: float = 0.2, tokens_per_second: float = 200.0,
+          reply_tokens: int = 120, host: str = "127.0.0.1", faults: str = "none", tps_jitter: float = 0.0):
+    """Start the stand-in in a background thread; returns the server (call .shutdown() to stop)."""
+    handler = type("Handler", (GroqHandler,), {
+        "first_token_latency": first_token_latency,
+        "tokens_per_second": tokens_per_second,
+        "tps_jitter": tps_jitter,
+        "reply_tokens": reply_tokens,
+        "faults": parse_faults(faults),
+        "_request_numbers": itertools.count(1),
+        "_window": deque(),
+        "_window_lock": threading.Lock(),
+    })
+    server = _Server((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="groq-stand-in", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--first-token-latency", type=float, default=0.2)
+    parser.add_argument("--tokens-per-second", type=float, default=200.0)
+    parser.add_argument("--tps-jitter", type=float, default=0.0, help="+/- share of the token rate, per token")
+    parser.add_argument("--reply-tokens", type=int, default=120)
+    parser.add_argument("--faults", default="none", help=f"fault pattern: {', '.join(FAULT_PATTERNS)} [,key=value...]")
+    args = parser.parse_args()
+
+    server = serve(args.port, args.first_token_latency, args.tokens_per_second, args.reply_tokens, args.host,
+                   args.faults, args.tps_jitter)
+    print(f"Groq stand-in on http://{args.host}:{args.port} ({args.tokens_per_second:g} tokens/s, faults: {args.faults})")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""
+Backend hot-path micro-benchmarks
+=================================
+Times the per-request hot paths over synthetic corpora of increasing
+size, to show scaling curves and catch regressions:
+
+    skills         extract_skills_from_text         resume pages
+    pdf            extract_text_from_pdf            resume pages
+    normalize      _normalize_job + _dedupe_jobs    jobs
+    relevance      filter_relevant_jobs             jobs
+    search         search_jobs on a published snapshot  jobs
+    email          generate_cold_email              resume pages
+    cover_letter   generate_cover_letter            resume pages
+
+Usage (from backend/):
+    python -m benchmarks.hot_paths                       # small scale, table
+    python -m benchmarks.hot_paths --scale full --json results.json
+    python -m benchmarks.hot_paths --save-baseline benchmarks/baselines/hot_paths.json
+    python -m benchmarks.hot_paths --baseline benchmarks/baselines/hot_paths.json
+
+Every run also times a fixed pure-Python reference workload, before and
+after the cases, and reports each case relative to it ("x ref"). With
+--baseline, cases are compared in those relative units, so a machine
+that is uniformly faster or slower (or busier than when the baseline was
+taken) does not show up as a regression; any case more than --tolerance
+slower, relative to the reference, is reported and the exit status is 1.
+Baselines are not committed: save one locally (benchmarks/baselines/ is
+git-ignored) before changing code, then compare.
+"""
+
+import os
+
+# Benchmarks publish throwaway snapshots; keep them out of the shared file
+os.environ.setdefault("SNAPSHOT_SHARE", "off")
+
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List
+
+from app.core.ml_engine import extract_skills_from_text
+from app.core.scoring import NUMPY_AVAILABLE
+from app.services.email_cover_letter_generator import generate_cold_email, generate_cover_letter
+from app.services.job_snapshot import publish_snapshot
+from app.services.resume_parser import extract_text_from_pdf
+from app.services.web_scraper import _dedupe_jobs, _normalize_job, filter_relevant_jobs, search_jobs
+from benchmarks.fixtures import make_pdf, raw_jobs, resume_lines, resume_text
+
+SCALES = {
+    "small": {"jobs": [100, 1_000, 10_000], "pages": [1, 5, 20]},
+    "full": {"jobs": [100, 1_000, 10_000, 100_000], "pages": [1, 5, 20, 50]},
+}
+
+JOB_DESCRIPTION = "Backend intern on a fast-paced team building Python APIs at scale; growth and impact."
+
+
+def _normalize_raw(raw: List[Dict]) -> List[Dict]:
+    return [
+        _normalize_job(
+            title=job["title"],
+            company=job["company_name"],
+            location=job["location"],
+            link=job["share_link"],
+            source="Google Jobs",
+            description=job["description"],
+            salary=job["detected_extensions"]["salary"],
+        )
+        for job in raw
+    ]
+
+
+# Each case: (size axis, setup(size) -> zero-argument callable to time)
+def _case_skills(pages):
+    text = resume_text(pages)
+    return lambda: extract_skills_from_text(text)
+
+
+def _case_pdf(pages):
+    pdf = make_pdf(resume_lines(random.Random(pages), pages))
+    return lambda: extract_text_from_pdf(pdf)
+
+
+def _case_normalize(n):
+    raw = raw_jobs(n)
+    return lambda: _dedupe_jobs(_normalize_raw(raw))
+
+
+def _case_relevance(n):
+    jobs = _normalize_raw(raw_jobs(n, duplicate_rate=0))
+    text = resume_text(2)
+    return lambda: filter_relevant_jobs(jobs, text)
+
+
+def _case_search(n):
+    publish_snapshot(_normalize_raw(raw_jobs(n, duplicate_rate=0)))
+    return lambda: search_jobs("backend")
+
+
+def _case_email(pages):
+    text = resume_text(pages)
+    return lambda: generate_cold_email("Backend Intern", "Razorpay", None, text, JOB_DESCRIPTION, "Asha")
+
+
+def _case_cover_letter(pages):
+    text = resume_text(pages)
+    return lambda: generate_cover_letter("Backend Intern", "Razorpay", text, JOB_DESCRIPTION, "Asha")
+
+
+CASES: Dict[str, tuple] = {
+    "skills": ("pages", _case_skills),
+    "pdf": ("pages", _case_pdf),
+    "normalize": ("jobs", _case_normalize),
+    "relevance": ("jobs", _case_relevance),
+    "search": ("jobs", _case_search),
+    "email": ("pages", _case_email),
+    "cover_letter": ("pages", _case_cover_letter),
+}
+
+
+def _reference_work(text: str):
+    """Fixed workload of the same kind as the cases: string scanning, dict and list churn."""
+    counts = {}
+    for word in text.lower().split():
+        counts[word] = counts.get(word, 0) + 1
+    return sorted(counts.items(), key=lambda item: -item[1])[:10], [line.strip() for line in text.splitlines()]
+
+
+def time_reference(repeat: int) -> float:
+    """Median seconds per reference call."""
+    text = resume_text(2)
+    return statistics.median(time_call(lambda: _reference_work(text), repeat))
+
+
+def time_call(fn: Callable, repeat: int, min_time: float = 0.05) -> List[float]:
+    """Per-call seconds for `repeat` rounds; fast calls are looped to last at least min_time per round."""
+    fn()  # warm-up
+    start = time.perf_counter()
+    fn()
+    once = time.perf_counter() - start
+    loops = max(1, int(min_time / once)) if once > 0 else 1000
+    rounds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        rounds.append((time.perf_counter() - start) / loops)
+    return rounds
+
+
+def run(cases: List[str], scale: str, repeat: int) -> Dict:
+    reference_before = time_reference(repeat)
+    results = []
+    for name in cases:
+        axis, setup = CASES[name]
+        for size in SCALES[scale][axis]:
+            rounds = time_call(setup(size), repeat)
+            median = statistics.median(rounds)
+            results.append({
+                "case": name,
+                "axis": axis,
+                "size": size,
+                "median_s": median,
+                "min_s": min(rounds),
+                "per_unit_us": median / size * 1e6,
+            })
+            print(f"  {name:<13} {axis:>5}={size:<7} {median * 1e3:10.3f} ms", file=sys.stderr)
+
+    # The less disturbed of the two reference timings
+    reference = min(reference_before, time_reference(repeat))
+    for result in results:
+        result["relative"] = result["median_s"] / reference
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "numpy": NUMPY_AVAILABLE,
+            "scale": scale,
+            "repeat": repeat,
+            "reference_s": reference,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+
+def compare(report: Dict, baseline: Dict, tolerance: float) -> List[Dict]:
+    """
+    Attach the baseline ratio (in reference-relative units) to every
+    result; return those slower than 1 + tolerance.
+    """
+    reference = {(r["case"], r["size"]): r.get("relative") for r in baseline["results"]}
+    regressions = []
+    for result in report["results"]:
+        base = reference.get((result["case"], result["size"]))
+        if base:
+            result["baseline_ratio"] = result["relative"] / base
+            if result["baseline_ratio"] > 1 + tolerance:
+                regressions.append(result)
+    return regressions
+
+
+def print_table(report: Dict):
+    print(f"reference workload: {report['meta']['reference_s'] * 1e6:.1f} us")
+    print(f"{'case':<13} {'size':>13} {'median':>12} {'per unit':>12} {'x ref':>9} {'vs base':>8}")
+    for r in report["results"]:
+        ratio = f"{r['baseline_ratio']:.2f}x" if "baseline_ratio" in r else "-"
+        print(
+            f"{r['case']:<13} {r['axis'] + '=' + str(r['size']):>13} "
+            f"{r['median_s'] * 1e3:>9.3f} ms {r['per_unit_us']:>9.2f} us {r['relative']:>9.1f} {ratio:>8}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--case", action="append", choices=list(CASES), help="run only these cases (repeatable)")
+    parser.add_argument("--scale", choices=list(SCALES), default="small")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="compare against this results file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown vs baseline (0.25 = 25%%)")
+    parser.add_argument("--save-baseline", help="write results as the new baseline")
+    args = parser.parse_args()
+
+    report = run(args.case or list(CASES), args.scale, args.repeat)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if "reference_s" not in baseline.get("meta", {}):
+            sys.exit(f"{args.baseline} predates reference-relative timings: save a new baseline")
+        regressions = compare(report, baseline, args.tolerance)
+        report["regressions"] = [(r["case"], r["size"]) for r in regressions]
+
+    print_table(report)
+    for path in filter(None, (args.json, args.save_baseline)):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) over {args.tolerance:.0%}:")
+        for r in regressions:
+            print(f"  {r['case']} {r['axis']}={r['size']}: {r['baseline_ratio']:.2f}x baseline")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+"""
+End-to-end load test
+====================
+Simulates concurrent students each running a full session against the
+FastAPI app:
+
+    upload resume -> recommendations -> job search -> cold email
+    -> cover letter -> chat
+
+By default it starts everything locally: a SerpAPI replay server with
+synthetic jobs (benchmarks/serpapi_server.py), a Groq stand-in
+(benchmarks/groq_server.py) and uvicorn with --workers, all on free
+ports and with throwaway data directories. --url targets an instance
+that is already running instead (its SerpAPI/Groq settings are then up
+to you).
+
+Reports throughput and p50/p95/p99 latency per endpoint, plus
+event-loop lag per worker (GET /metrics/loop-lag).
+
+Usage (from backend/):
+    python -m benchmarks.load_test --concurrency 50 --duration 60
+    python -m benchmarks.load_test --workers 4 --serp-profile realistic --json load.json
+"""
+
+from pathlib import Path
+from typing import Dict, List, Optional
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks import groq_server, serpapi_server
+from benchmarks.fixtures import make_pdf, resume_lines, resume_text
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+ENDPOINTS = ["upload", "recommend", "search", "email", "cover_letter", "chat"]
+SEARCH_TERMS = ["python", "backend", "data", "intern", "react", "ml"]
+CHAT_QUESTIONS = [
+    "How do I prepare for a backend internship interview?",
+    "Which projects should I add to my resume for ML roles?",
+    "How many applications should I send per week?",
+    "Is it worth learning Docker as a student?",
+]
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _percentile(ordered: List[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class Recorder:
+    """Latencies and failures per endpoint."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {name: [] for name in ENDPOINTS}
+        self.errors: Dict[str, int] = {name: 0 for name in ENDPOINTS}
+        self.sessions = 0
+
+    async def call(self, name: str, request) -> Optional[httpx.Response]:
+        started = time.perf_counter()
+        try:
+            response = await request
+        except httpx.HTTPError:
+            self.errors[name] += 1
+            return None
+        self.latencies[name].append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            self.errors[name] += 1
+            return None
+        return response
+
+    def summary(self, elapsed: float) -> Dict:
+        endpoints = {}
+        for name in ENDPOINTS:
+            ordered = sorted(self.latencies[name])
+            entry = {"requests": len(ordered), "errors": self.errors[name], "rps": round(len(ordered) / elapsed, 2)}
+            if ordered:
+                entry.update({
+                    f"{label}_ms": round(_percentile(ordered, q) * 1e3, 1)
+                    for label, q in (("p50", 0.50), ("p95", 0.95), ("p99", 0.99))
+                })
+            endpoints[name] = entry
+        total = sum(len(v) for v in self.latencies.values())
+        return {
+            "elapsed_s": round(elapsed, 2),
+            "sessions": self.sessions,
+            "requests": total,
+            "rps": round(total / elapsed, 2),
+            "endpoints": endpoints,
+        }
+
+
+async def student_session(client: httpx.AsyncClient, recorder: Recorder, resumes, student_no: int, think: float):
+    rng = random.Random(student_no)
+    pdf, text = resumes[student_no % len(resumes)]
+
+    async def pause():
+        if think:
+            await asyncio.sleep(rng.uniform(0.5 * think, 1.5 * think))
+
+    response = await recorder.call("upload", client.post(
+        "/resume/upload",
+        files={"resume": ("resume.pdf", pdf, "application/pdf")},
+        data={"student_name": f"Student {student_no}", "student_email": f"student{student_no}@example.com"},
+    ))
+    if response is None:
+        return
+    student_id = response.json()["student_id"]
+    await pause()
+
+    response = await recorder.call("recommend", client.get(f"/recommend/{student_id}"))
+    jobs = response.json().get("internships", []) if response is not None else []
+    await pause()
+
+    await recorder.call("search", client.get("/recommend/search/jobs", params={"q": rng.choice(SEARCH_TERMS)}))
+    await pause()
+
+    job = jobs[0] if jobs else {"title": "Software Intern", "company": "Acme", "description": "Python backend"}
+    await recorder.call("email", client.post("/api/generate/email", json={
+        "job_title": job["title"], "company_name": job["company"], "resume_text": text,
+        "job_description": job.get("description") or "", "user_name": f"Student {student_no}",
+    }))
+    await pause()
+
+    await recorder.call("cover_letter", client.post("/api/generate/cover-letter", json={
+        "job_title": job["title"], "company_name": job["company"], "resume_text": text,
+        "job_description": job.get("description") or "", "user_name": f"Student {student_no}",
+    }))
+    await pause()
+
+    await recorder.call("chat", client.post("/chat", json={"message": rng.choice(CHAT_QUESTIONS), "history": []}))
+    recorder.sessions += 1
+
+
+async def loop_lag(client: httpx.AsyncClient, workers: int, reset: bool = False) -> Dict[int, Dict]:
+    """Per-worker lag stats; requests are spread over workers, so ask several times."""
+    by_pid = {}
+    for _ in range(max(4, 4 * workers)):
+        try:
+            # A fresh connection each time, so the kernel can hand it to another worker
+            response = await client.get("/metrics/loop-lag", params={"reset": reset}, headers={"Connection": "close"})
+            stats = response.json()
+            by_pid[stats["pid"]] = stats
+        except (httpx.HTTPError, ValueError, KeyError):
+            pass
+    return by_pid
+
+
+async def run_load(url: str, concurrency: int, duration: float, think: float, workers: int, pages: int) -> Dict:
+    resumes = []
+    for seed in range(50):
+        lines = resume_lines(random.Random(seed), pages)
+        resumes.append((make_pdf(lines), resume_text(pages, seed)))
+
+    limits = httpx.Limits(max_connections=concurrency * 2, max_keepalive_connections=concurrency * 2)
+    async with httpx.AsyncClient(base_url=url, timeout=120, limits=limits) as client:
+        await loop_lag(client, workers, reset=True)
+        recorder = Recorder()
+        counter = itertools.count()
+        deadline = time.perf_counter() + duration
+
+        async def virtual_student():
+            while time.perf_counter() < deadline:
+                await student_session(client, recorder, resumes, next(counter), think)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(virtual_student() for _ in range(concurrency)))
+        report = recorder.summary(time.perf_counter() - started)
+        report["loop_lag"] = list((await loop_lag(client, workers)).values())
+    report["config"] = {"concurrency": concurrency, "duration_s": duration, "think_s": think, "workers": workers, "pages": pages}
+    return report
+
+
+def start_stack(workers: int, serp_profile: str, groq_latency: float, groq_tps: float, data_dir: str,
+                verbose: bool = False):
+    """SerpAPI replay + Groq stand-in + uvicorn; returns (url, [servers], process)."""
+    serp_port, groq_port = _free_port(), _free_port()
+    servers = [
+        serpapi_server.serve(serp_port, os.path.join(data_dir, "cassette"), serp_profile, synthetic=15),
+        groq_server.serve(groq_port, first_token_latency=groq_latency, tokens_per_second=groq_tps),
+    ]
+    try:
+        url, process = start_app(workers, data_dir, {
+            "SERPAPI_BASE": f"http://127.0.0.1:{serp_port}/search",
+            "GROQ_BASE_URL": f"http://127.0.0.1:{groq_port}",
+        }, verbose)
+    except RuntimeError:
+        for server in servers:
+            server.shutdown()
+        raise
+    return url, servers, process
+
+
+def start_app(workers: int, data_dir: str, env_overrides: Dict[str, str], verbose: bool = False):
+    """uvicorn on a free port with throwaway data in data_dir; returns (url, process) once it answers."""
+    app_port = _free_port()
+    env = {
+        **os.environ,
+        "SERPAPI_MODE": "live",
+        "GROQ_API_KEY": "load-test",
+        "SNAPSHOT_PATH": os.path.join(data_dir, "jobs.snapshot"),
+        "STUDENT_DB_PATH": os.path.join(data_dir, "students.db"),
+        **env_overrides,
+    }
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+         "--port", str(app_port), "--workers", str(workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=None if verbose else subprocess.DEVNULL,
+        stderr=None if verbose else subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{app_port}"
+    for _ in range(600):
+        if process.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with status {process.returncode}")
+        try:
+            if httpx.get(url + "/", timeout=1).status_code == 200:
+                return url, process
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("uvicorn did not become ready within 60s")
+
+
+def print_report(report: Dict):
+    print(f"\n{report['sessions']} sessions, {report['requests']} requests in {report['elapsed_s']}s "
+          f"({report['rps']} req/s) at concurrency {report['config']['concurrency']}")
+    print(f"{'endpoint':<13} {'reqs':>6} {'errors':>6} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for name, e in report["endpoints"].items():
+        print(f"{name:<13} {e['requests']:>6} {e['errors']:>6} {e['rps']:>7} "
+              f"{e.get('p50_ms', '-'):>8} {e.get('p95_ms', '-'):>8} {e.get('p99_ms', '-'):>8}")
+    print("\nevent-loop lag per worker:")
+    for lag in report["loop_lag"]:
+        print(f"  pid {lag['pid']}: p50 {lag.get('p50_ms', '-')} ms, p95 {lag.get('p95_ms', '-')} ms, "
+              f"p99 {lag.get('p99_ms', '-')} ms, max {lag.get('max_ms', '-')} ms ({lag['samples']} samples)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="target a running instance instead of starting one")
+    parser.add_argument("--concurrency", type=int, default=20, help="simultaneous student sessions")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds to keep starting sessions")
+    parser.add_argument("--think", type=float, default=0.0, help="mean pause between a student's steps (s)")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers (ignored with --url)")
+    parser.add_argument("--pages", type=int, default=1, help="pages per resume")
+    parser.add_argument("--serp-profile", default="realistic", help="SerpAPI replay profile")
+    parser.add_argument("--groq-latency", type=float, default=0.2, help="stand-in time to first token (s)")
+    parser.add_argument("--groq-tps", type=float, default=200.0, help="stand-in tokens per second")
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--verbose", action="store_true", help="show the app's own log output")
+    args = parser.parse_args()
+
+    servers, process = [], None
+    with tempfile.TemporaryDirectory(prefix="aibir-load-") as data_dir:
+        try:
+            url = args.url
+            if url is None:
+                url, servers, process = start_stack(
+                    args.workers, args.serp_profile, args.groq_latency, args.groq_tps, data_dir, args.verbose
+                )
+            report = asyncio.run(run_load(url, args.concurrency, args.duration, args.think, args.workers, args.pages))
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait(timeout=30)
+            for server in servers:
+                server.shutdown()
+
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
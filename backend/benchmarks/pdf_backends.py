@@ -0,0 +1,112 @@
+"""
+PDF extraction backend benchmark
+================================
+Compares every available extraction backend on a corpus of resumes:
+throughput (pages/s, MB/s) and text quality (similarity to ground truth).
+
+Usage (from backend/):
+    python -m benchmarks.pdf_backends
+    python -m benchmarks.pdf_backends --corpus path/to/pdfs --json results.json
+
+A real corpus is a directory of PDFs; a sibling <name>.txt is used as
+ground truth when present, otherwise quality is reported against the
+pypdf2 output.
+"""
+
+import argparse
+import difflib
+import io
+import json
+import re
+import time
+from pathlib import Path
+
+from app.services.resume_parser import BACKENDS, _Deadline, available_backends
+from benchmarks.fixtures import resume_corpus
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def similarity(extracted: str, truth: str) -> float:
+    """Character-level similarity in [0, 1] after whitespace normalisation."""
+    return difflib.SequenceMatcher(None, _normalize(extracted), _normalize(truth), autojunk=False).ratio()
+
+
+def load_corpus(directory: str):
+    corpus = []
+    for pdf in sorted(Path(directory).glob("*.pdf")):
+        truth_file = pdf.with_suffix(".txt")
+        truth = truth_file.read_text(encoding="utf-8") if truth_file.exists() else None
+        corpus.append((pdf.stem, pdf.read_bytes(), truth))
+    return corpus
+
+
+def extract_with(backend: str, data: bytes):
+    """One backend only: extract_pages() would fall back to another on failure and time that instead."""
+    return BACKENDS[backend](io.BytesIO(data), None, _Deadline())
+
+
+def run(corpus, backends, repeat: int = 3):
+    results = {}
+    for backend in backends:
+        pages = 0
+        total_bytes = 0
+        scores = []
+        elapsed = 0.0
+        failures = 0
+        errors = []
+        for name, data, truth in corpus:
+            try:
+                start = time.perf_counter()
+                for _ in range(repeat):
+                    extracted = extract_with(backend, data)
+                elapsed += (time.perf_counter() - start) / repeat
+            except Exception as e:
+                failures += 1
+                errors.append(f"{name}: {e}")
+                continue
+            pages += len([p for p in extracted if p.strip()])
+            total_bytes += len(data)
+            if truth is None:
+                truth = "".join(extract_with("pypdf2", data))
+            scores.append(similarity("".join(extracted), truth))
+
+        results[backend] = {
+            "documents": len(corpus) - failures,
+            "failures": failures,
+            "seconds": round(elapsed, 4),
+            "pages_per_sec": round(pages / elapsed, 1) if elapsed else None,
+            "mb_per_sec": round(total_bytes / 1e6 / elapsed, 2) if elapsed else None,
+            "quality": round(sum(scores) / len(scores), 4) if scores else None,
+            "errors": errors[:5],
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", help="Directory of resume PDFs (default: synthetic fixtures)")
+    parser.add_argument("--backend", action="append", help="Backend(s) to run (default: all available)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus) if args.corpus else resume_corpus()
+    backends = args.backend or available_backends()
+    results = run(corpus, backends, repeat=args.repeat)
+
+    print(f"{'backend':<12}{'docs':>6}{'failed':>8}{'pages/s':>10}{'MB/s':>8}{'quality':>9}")
+    for backend, r in results.items():
+        print(f"{backend:<12}{r['documents']:>6}{r['failures']:>8}{r['pages_per_sec'] or 0:>10}"
+              f"{r['mb_per_sec'] or 0:>8}{r['quality'] or 0:>9}")
+        for error in r["errors"]:
+            print(f"{'':<12}! {error}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Scoring consistency checks
+==========================
+Ranks the same random students against the same random jobs through every
+top-k path and checks they agree job for job, ties included (the lower job
+index wins):
+
+- scoring.top_k_matches (numpy)
+- scoring._top_k_bitset (the pure-Python fallback)
+- scoring.rank_jobs cut to k, as /recommend/{id} ranks one student, with
+  and without numpy
+- sharded_scoring.sharded_top_k, on a process pool of --workers shards
+
+Skill sets are small, so many jobs tie at the k-th place. The sharded
+check also refreshes the snapshot twice while a batch still holds the
+previous shared segment, which must stay attachable until released.
+
+Usage (from backend/):
+    python -m benchmarks.scoring_check
+    python -m benchmarks.scoring_check --students 200 --jobs 20000 --k 25
+"""
+
+import argparse
+import random
+import sys
+from types import SimpleNamespace
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.core import scoring, sharded_scoring
+from app.core.scoring import SKILL_COLUMNS, rank_jobs, top_k_matches
+
+Ranking = List[List[Tuple[int, int]]]
+
+
+def random_skills(rng: random.Random, n: int, low: int = 1, high: int = 4) -> List[List[str]]:
+    pool = SKILL_COLUMNS[:30]
+    return [rng.sample(pool, rng.randint(low, high)) for _ in range(n)]
+
+
+def ranked_top_k(students: Sequence[Sequence[str]], jobs: Sequence[Sequence[str]], k: int) -> Ranking:
+    """rank_jobs per student, cut to the top-k jobs sharing a skill."""
+    return [[pair for pair in rank_jobs(skills, jobs)[:k] if pair[1] > 0] for skills in students]
+
+
+def check_segment_rotation(jobs) -> Optional[str]:
+    """A segment held by a batch survives two refreshes and is freed on release; the failure, if any."""
+    from multiprocessing import shared_memory
+
+    snapshot = lambda version: SimpleNamespace(version=version, jobs=jobs, job_skills=jobs)
+    held = sharded_scoring._acquire_matrix(snapshot(-1))
+    try:
+        sharded_scoring.sharded_top_k([["Python"]], snapshot(-2), 1)
+        sharded_scoring.sharded_top_k([["Python"]], snapshot(-3), 1)
+        try:
+            shared_memory.SharedMemory(name=held.name).close()
+        except FileNotFoundError:
+            return "a segment held by a batch was freed by a refresh"
+    finally:
+        sharded_scoring._release_matrix(held)
+    try:
+        shared_memory.SharedMemory(name=held.name).close()
+    except FileNotFoundError:
+        return None
+    return "a retired segment was not freed after its last batch"
+
+
+def rankings(students, jobs, k: int, workers: int = 0) -> Dict[str, Ranking]:
+    """Top-k per student from every path; the numpy ones only when numpy is installed."""
+    results = {"bitset": scoring._top_k_bitset(students, jobs, k)}
+    if scoring.NUMPY_AVAILABLE:
+        results["numpy"] = top_k_matches(students, jobs, k)
+        results["rank_jobs"] = ranked_top_k(students, jobs, k)
+        if workers:
+            sharded_scoring.SCORING_WORKERS = workers
+            results["sharded"] = sharded_scoring.sharded_top_k(
+                students, SimpleNamespace(version=1, jobs=jobs, job_skills=jobs), k
+            )
+    scoring.NUMPY_AVAILABLE, numpy_available = False, scoring.NUMPY_AVAILABLE
+    try:
+        results["rank_jobs/no-numpy"] = ranked_top_k(students, jobs, k)
+    finally:
+        scoring.NUMPY_AVAILABLE = numpy_available
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=50)
+    parser.add_argument("--jobs", type=int, default=3000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=4, help="Shards for the sharded check (0 skips it)")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    students = random_skills(rng, args.students)
+    jobs = random_skills(rng, args.jobs)
+
+    try:
+        results = rankings(students, jobs, args.k, args.workers)
+        rotation = check_segment_rotation(jobs) if args.workers and scoring.NUMPY_AVAILABLE else None
+    finally:
+        sharded_scoring.shutdown()
+    expected = results.pop("bitset")
+    failed = rotation is not None
+    if rotation:
+        print(f"{'sharded segments':<20} FAILED ({rotation})")
+    elif args.workers and scoring.NUMPY_AVAILABLE:
+        print(f"{'sharded segments':<20} ok")
+    for name, ranking in results.items():
+        differing = sum(1 for got, want in zip(ranking, expected) if got != want)
+        if differing:
+            failed = True
+            print(f"{name:<20} FAILED ({differing}/{len(students)} students differ from the bitset top-k)")
+        else:
+            print(f"{name:<20} ok")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+SerpAPI replay server
+=====================
+Serves a recorded cassette (see app/services/serpapi_cassette.py) over
+HTTP, so the backend - or anything else - can run against SerpAPI offline:
+
+    python -m benchmarks.serpapi_server --port 8765 --profile realistic
+    SERPAPI_BASE=http://127.0.0.1:8765/search uvicorn app.main:app
+
+To fill a cassette, run the backend once with SERPAPI_MODE=record.
+--synthetic N answers unrecorded queries with N generated jobs instead of
+a 404, which is enough for load tests when no recording is at hand.
+"""
+
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import argparse
+import threading
+
+import requests
+
+from app.services.serpapi_cassette import (
+    SERPAPI_CASSETTE_DIR,
+    Cassette,
+    ReplayAdapter,
+    parse_profile,
+)
+from benchmarks.fixtures import serpapi_jobs_response
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    adapter: ReplayAdapter = None
+    timeout_seconds = 15.0
+
+    def do_GET(self):
+        try:
+            status, content_type, body = self.adapter.respond("GET", self.path, self.timeout_seconds)
+        except requests.exceptions.ReadTimeout:
+            # The client has given up by now; just drop the connection
+            self.close_connection = True
+            return
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(port: int, cassette_dir: str, profile: str, synthetic: int = 0, host: str = "127.0.0.1"):
+    """Start a replay server in a background thread; returns the server (call .shutdown() to stop)."""
+    fallback = partial(serpapi_jobs_response, n=synthetic) if synthetic else None
+    handler = type("Handler", (ReplayHandler,), {
+        "adapter": ReplayAdapter(Cassette(cassette_dir), parse_profile(profile), fallback),
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="serpapi-replay", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--cassette", default=SERPAPI_CASSETTE_DIR)
+    parser.add_argument("--profile", default="instant", help="instant | realistic | flaky, plus overrides e.g. 'flaky,seed=3'")
+    parser.add_argument("--synthetic", type=int, default=0, metavar="N", help="generate N jobs for unrecorded queries")
+    args = parser.parse_args()
+
+    server = serve(args.port, args.cassette, args.profile, args.synthetic, args.host)
+    print(f"Replaying {len(Cassette(args.cassette))} recorded responses on http://{args.host}:{args.port}/search ({args.profile})")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Storage backend checks
+======================
+Runs the same scenarios against every student store and chat session
+store (memory, sqlite, redis), so the backends nobody runs locally are
+exercised too:
+
+- students: create, get, dedup lookup, iteration, count and idle
+  eviction with archiving
+- chat sessions: new ids, save/load round trip, two requests racing on
+  one session (both exchanges must survive), delete
+
+The redis stores run against REDIS_URL when --redis-url is given,
+otherwise against fakeredis (pip install fakeredis) when installed, and
+are reported as skipped when neither is available.
+
+Usage (from backend/):
+    python -m benchmarks.store_check
+    python -m benchmarks.store_check --redis-url redis://localhost:6379/15
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+from app.services import chat_sessions
+from app.services.chat_sessions import (
+    ChatSession,
+    ChatSessionStore,
+    MemoryChatSessionStore,
+    RedisChatSessionStore,
+    SQLiteChatSessionStore,
+)
+from app.services.student_repository import (
+    MemoryStudentRepository,
+    RedisStudentRepository,
+    SQLiteStudentRepository,
+    StudentRepository,
+)
+
+
+def redis_client(url: Optional[str]):
+    """A real client for url, else a fakeredis one, else None."""
+    if url:
+        import redis
+        client = redis.Redis.from_url(url)
+        client.flushdb()
+        return client
+    try:
+        import fakeredis
+    except ImportError:
+        return None
+    return fakeredis.FakeRedis()
+
+
+def check_students(repo: StudentRepository, archive_dir: str) -> List[str]:
+    """Run the scenario; returns the failed expectations (empty when all pass)."""
+    failures = []
+
+    def expect(ok: bool, what: str):
+        if not ok:
+            failures.append(what)
+
+    profiles = [
+        {"name": f"Student {i}", "email": f"s{i}@example.com", "content_hash": f"hash{i}", "skills": ["python"]}
+        for i in range(5)
+    ]
+    ids = repo.create_many(profiles[:4])
+    ids.append(repo.create(profiles[4]))
+    expect(len(set(ids)) == 5, "create_many returns distinct ids")
+    expect(repo.get(ids[2]) == profiles[2], "get returns the stored profile")
+    expect(repo.get("missing") is None, "get of an unknown id is None")
+    expect(repo.find_by_content("hash3", "s3@example.com", "student  3") == ids[3],
+           "find_by_content finds by (hash, email, name), name ignoring case and spacing")
+    expect(repo.find_by_content("hash3", "other@example.com", "Student 3") is None, "find_by_content needs the same email")
+    expect(repo.find_by_content("hash3", "s3@example.com", "Someone Else") is None, "find_by_content needs the same name")
+    expect(repo.count() == 5, "count")
+    expect(sorted(sid for sid, _ in repo.iter_all()) == sorted(ids), "iter_all yields every student")
+
+    # Read one student, then evict everyone idle for longer than that read
+    time.sleep(0.05)
+    cutoff = time.time()
+    time.sleep(0.05)
+    repo.get(ids[0])
+    if isinstance(repo, SQLiteStudentRepository):
+        # SQLite only rewrites last_seen once it is TOUCH_INTERVAL old
+        repo._connection().execute("UPDATE students SET last_seen = ? WHERE id = ?", (time.time(), ids[0]))
+    evicted = repo.evict_idle(time.time() - cutoff, archive_dir)
+    expect(evicted == 4, f"evict_idle evicts the 4 idle students (got {evicted})")
+    expect(repo.count() == 1 and repo.get(ids[0]) is not None, "the recently read student stays")
+    expect(repo.find_by_content("hash1", "s1@example.com", "Student 1") is None, "eviction drops the dedup entry")
+
+    archived = []
+    for name in os.listdir(archive_dir):
+        with gzip.open(os.path.join(archive_dir, name), "rt", encoding="utf-8") as f:
+            archived.extend(json.loads(line)["id"] for line in f)
+    expect(sorted(archived) == sorted(ids[1:]), "evicted students are archived")
+    return failures
+
+
+def check_chat_sessions(store: ChatSessionStore) -> List[str]:
+    """Run the session scenario; returns the failed expectations."""
+    failures = []
+
+    def expect(ok: bool, what: str):
+        if not ok:
+            failures.append(what)
+
+    chat_sessions.set_session_store(store)
+    try:
+        session = chat_sessions.open_session("made-up-id")
+        expect(session.session_id != "made-up-id", "an unknown client session id is not adopted")
+        chat_sessions.record_exchange(session, "What is Python?", "A programming language.")
+        stored = store.load(session.session_id)
+        expect(stored is not None and stored.turns == session.turns, "a saved session loads back")
+
+        # Two requests load the same version, then both record an exchange
+        first = chat_sessions.open_session(session.session_id)
+        second = chat_sessions.open_session(session.session_id)
+        chat_sessions.record_exchange(first, "And Java?", "Also a language.")
+        chat_sessions.record_exchange(second, "And Rust?", "A systems language.")
+        questions = [t["content"] for t in store.load(session.session_id).turns if t["role"] == "user"]
+        expect(questions == ["What is Python?", "And Java?", "And Rust?"],
+               f"racing exchanges are both kept (got {questions})")
+
+        stale = ChatSession(session_id=session.session_id, version=1)
+        expect(not store.save(stale), "a save from an outdated version is refused")
+
+        store.delete(session.session_id)
+        expect(store.load(session.session_id) is None, "delete")
+    finally:
+        chat_sessions.set_session_store(None)
+    return failures
+
+
+def run(redis_url: Optional[str] = None) -> Dict[str, Optional[List[str]]]:
+    """Failures per store; None for a store that could not be run."""
+    workdir = tempfile.mkdtemp(prefix="store-check-")
+    client = redis_client(redis_url)
+    checks: Dict[str, Callable[[], Optional[List[str]]]] = {
+        "students/memory": lambda: check_students(MemoryStudentRepository(), os.path.join(workdir, "archive-memory")),
+        "students/sqlite": lambda: check_students(
+            SQLiteStudentRepository(os.path.join(workdir, "students.db")), os.path.join(workdir, "archive-sqlite")
+        ),
+        "students/redis": lambda: check_students(
+            RedisStudentRepository(client), os.path.join(workdir, "archive-redis")
+        ) if client is not None else None,
+        "chat_sessions/memory": lambda: check_chat_sessions(MemoryChatSessionStore()),
+        "chat_sessions/sqlite": lambda: check_chat_sessions(
+            SQLiteChatSessionStore(os.path.join(workdir, "sessions.db"))
+        ),
+        "chat_sessions/redis": lambda: check_chat_sessions(
+            RedisChatSessionStore(client)
+        ) if client is not None else None,
+    }
+    return {name: check() for name, check in checks.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--redis-url", help="Real redis to check against (its database is flushed)")
+    args = parser.parse_args()
+
+    failed = False
+    for name, failures in run(args.redis_url).items():
+        if failures is None:
+            print(f"{name:<22} skipped (no --redis-url and fakeredis is not installed)")
+        elif failures:
+            failed = True
+            print(f"{name:<22} FAILED")
+            for failure in failures:
+                print(f"{'':<22} - {failure}")
+        else:
+            print(f"{name:<22} ok")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
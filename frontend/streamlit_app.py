@@ -17,6 +17,23 @@ st.set_page_config(
 # Backend API URL
 BACKEND_URL = os.getenv("BACKEND_URL", "http://127.0.0.1:8001")
 
+
+def stream_chat_tokens(response):
+    """Yield text from a /chat/stream Server-Sent Events response."""
+    event = None
+    for line in response.iter_lines(decode_unicode=True):
+        if line.startswith("event: "):
+            event = line[len("event: "):]
+        elif line.startswith("data: "):
+            data = json.loads(line[len("data: "):])
+            if event == "session":
+                # Later questions continue the same server-side conversation
+                st.session_state.chat_session_id = data["session_id"]
+            elif event == "token":
+                yield data["text"]
+            elif event == "error":
+                yield data["message"]
+
 # ==================== FUTURISTIC AI-THEMED CSS ====================
 st.markdown("""
 <style>
@@ -378,6 +395,9 @@ if "student_id" not in st.session_state:
 if "chat_messages" not in st.session_state:
     st.session_state.chat_messages = []
 
+if "chat_session_id" not in st.session_state:
+    st.session_state.chat_session_id = None
+
 if "resume_uploaded" not in st.session_state:
     st.session_state.resume_uploaded = False
 
@@ -529,21 +549,16 @@ with tab3:
         if st.button("🚀 Get Advice", key="advisor_btn", use_container_width=True):
             if advisor_prompt:
                 try:
-                    with st.spinner("🤔 Thinking..."):
-                        response = requests.post(
-                            f"{BACKEND_URL}/chat",
-                            json={"message": advisor_prompt}
-                        )
-                        if response.status_code == 200:
-                            advice = response.json().get("response", "")
-                            st.success("✅ Advice generated!")
-                            st.markdown(f"""
-                            <div class="recommendation-card">
-                            {advice}
-                            </div>
-                            """, unsafe_allow_html=True)
-                        else:
-                            st.error(f"❌ Error: {response.text}")
+                    # Tokens are shown as they arrive (SSE from /chat/stream)
+                    response = requests.post(
+                        f"{BACKEND_URL}/chat/stream",
+                        json={"message": advisor_prompt, "session_id": st.session_state.chat_session_id},
+                        stream=True,
+                    )
+                    if response.status_code == 200:
+                        st.write_stream(stream_chat_tokens(response))
+                    else:
+                        st.error(f"❌ Error: {response.text}")
                 except Exception as e:
                     st.error(f"❌ Connection error: {str(e)}")
             else: